@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def temporary_caches():
+    """Как и manage.py test, тесты не трогают кеши сайта в SQLite."""
+    from core.test_runner import temporary_caches
+
+    with temporary_caches():
+        yield
@@ -1,5 +1,21 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.conf import settings
+
+        from .cache.tiered import reset_versions
+        from .db import tune_sqlite
+        from .metrics import install_query_counter
+        from .routers import install_write_tracker
+
+        connection_created.connect(tune_sqlite)
+        connection_created.connect(install_write_tracker)
+        request_started.connect(reset_versions)
+        if settings.METRICS_ENABLED:
+            connection_created.connect(install_query_counter)
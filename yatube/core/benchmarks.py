@@ -0,0 +1,155 @@
+import json
+import math
+import os
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+
+ViewCase = namedtuple('ViewCase', 'name url user status')
+
+PERCENTILES = (50, 95, 99)
+
+
+def view_cases(group, author, post):
+    """
+    Страницы posts, users и about, открываемые GET-запросом без
+    побочных эффектов. user: None - аноним, 'reader' - подписчик
+    автора, 'author' - автор поста.
+    """
+    return [
+        ViewCase('posts:index', reverse('posts:index'), None, 200),
+        ViewCase(
+            'posts:group_list',
+            reverse('posts:group_list', args=(group.slug,)), None, 200,
+        ),
+        ViewCase(
+            'posts:profile',
+            reverse('posts:profile', args=(author.username,)), None, 200,
+        ),
+        ViewCase(
+            'posts:profile (reader)',
+            reverse('posts:profile', args=(author.username,)),
+            'reader', 200,
+        ),
+        ViewCase(
+            'posts:post_detail',
+            reverse('posts:post_detail', args=(post.pk,)), None, 200,
+        ),
+        ViewCase(
+            'posts:post_create', reverse('posts:post_create'), 'author', 200,
+        ),
+        ViewCase(
+            'posts:post_edit',
+            reverse('posts:post_edit', args=(post.pk,)), 'author', 200,
+        ),
+        ViewCase(
+            'posts:follow_index', reverse('posts:follow_index'),
+            'reader', 200,
+        ),
+        ViewCase('users:signup', reverse('users:signup'), None, 200),
+        ViewCase('users:login', reverse('users:login'), None, 200),
+        ViewCase('users:logout', reverse('users:logout'), None, 200),
+        ViewCase(
+            'users:password_change_form',
+            reverse('users:password_change_form'), 'reader', 200,
+        ),
+        ViewCase(
+            'users:password_change_done',
+            reverse('users:password_change_done'), 'reader', 200,
+        ),
+        ViewCase(
+            'users:password_reset_form',
+            reverse('users:password_reset_form'), None, 200,
+        ),
+        ViewCase(
+            'users:password_reset_done',
+            reverse('users:password_reset_done'), None, 200,
+        ),
+        ViewCase(
+            'users:password_reset_confirm',
+            reverse('users:password_reset_confirm', args=('MQ', 'token')),
+            None, 200,
+        ),
+        ViewCase(
+            'users:password_reset_complete',
+            reverse('users:password_reset_complete'), None, 200,
+        ),
+        ViewCase('about:author', reverse('about:author'), None, 200),
+        ViewCase('about:tech', reverse('about:tech'), None, 200),
+    ]
+
+
+def isolated_caches(directory):
+    """
+    CACHES, где у каждого кеша своё место в directory: замеры чистят
+    кеш перед каждым запросом и не должны задевать кеш работающего сайта.
+    """
+    return {
+        alias: {
+            **params,
+            'LOCATION': os.path.join(directory, f'{alias}.sqlite3'),
+        }
+        for alias, params in settings.CACHES.items()
+    }
+
+
+def measure(client, case, repeat):
+    """Время ответа в мс для repeat запросов с пустым кешем."""
+    samples = []
+    for _ in range(repeat):
+        cache.clear()
+        started = time.perf_counter()
+        response = client.get(case.url)
+        samples.append((time.perf_counter() - started) * 1000)
+        if response.status_code != case.status:
+            raise AssertionError(
+                f'{case.name}: статус {response.status_code}, '
+                f'ожидался {case.status}'
+            )
+    return samples
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return {
+        f'p{rank}': round(
+            ordered[max(0, math.ceil(rank / 100 * len(ordered)) - 1)], 3
+        )
+        for rank in PERCENTILES
+    }
+
+
+def regressions(results, baseline, tolerance, min_delta=0):
+    """
+    Метрики, выросшие относительно базовой линии больше чем
+    на долю tolerance и больше чем на min_delta мс: иначе шум
+    на страницах в несколько миллисекунд выглядит регрессией.
+    """
+    found = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            previous = baseline.get(name, {}).get(metric)
+            if previous is None:
+                continue
+            if (
+                value > previous * (1 + tolerance)
+                and value - previous > min_delta
+            ):
+                found.append((name, metric, previous, value))
+    return found
+
+
+def load_baseline(path):
+    try:
+        with open(path) as baseline:
+            return json.load(baseline)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, results):
+    with open(path, 'w') as baseline:
+        json.dump(results, baseline, indent=2, sort_keys=True)
@@ -0,0 +1,285 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from ..stats import stored_key_prefix
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, '
+    'size INTEGER NOT NULL, accessed REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+    'CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY, bytes INTEGER)',
+    'INSERT OR IGNORE INTO usage (id, bytes) VALUES (1, 0)',
+    'CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN '
+    'UPDATE usage SET bytes = bytes + NEW.size WHERE id = 1; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN '
+    'UPDATE usage SET bytes = bytes - OLD.size WHERE id = 1; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_update AFTER UPDATE OF size ON cache '
+    'BEGIN UPDATE usage SET bytes = bytes - OLD.size + NEW.size '
+    'WHERE id = 1; END',
+    'CREATE TABLE IF NOT EXISTS evictions ('
+    'prefix TEXT PRIMARY KEY, count INTEGER NOT NULL)',
+)
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA busy_timeout = 5000',
+    'PRAGMA recursive_triggers = ON',
+)
+ACCESS_RESOLUTION = 1.0
+ACCESS_BATCH = 256
+EVICTION_BATCH = 32
+
+
+class SQLiteCache(BaseCache):
+    """
+    Общий для всех процессов узла кеш в файле SQLite.
+    Атомарные операции, вытеснение давно не читанных записей
+    при превышении MAX_BYTES и сроки жизни записей.
+
+    Чтение не берёт блокировку записи: время обращения копится
+    в потоке и пишется в транзакции ближайшей записи, перед
+    вытеснением, или пачкой по ACCESS_BATCH ключей. Истёкшие записи
+    чтение пропускает, удаляет их запись.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._max_bytes = int(options.get('MAX_BYTES', 64 * 1024 * 1024))
+        self._local = threading.local()
+
+    @property
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self._path, timeout=5, isolation_level=None
+            )
+            for pragma in PRAGMAS:
+                connection.execute(pragma)
+            with self._transaction(connection):
+                for statement in SCHEMA:
+                    connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            self._local.accessed = {}
+        return connection
+
+    @staticmethod
+    @contextmanager
+    def _transaction(connection):
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _load(self, connection, keys, now):
+        placeholders = ', '.join('?' * len(keys))
+        rows = connection.execute(
+            f'SELECT key, value, expires, accessed FROM cache '
+            f'WHERE key IN ({placeholders})',
+            keys,
+        ).fetchall()
+        found = {}
+        pending = self._local.accessed
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                continue
+            found[key] = value
+            if now - accessed > ACCESS_RESOLUTION:
+                pending[key] = now
+        if len(pending) >= ACCESS_BATCH:
+            with self._transaction(connection):
+                self._flush_accessed(connection)
+        return found
+
+    def _flush_accessed(self, connection):
+        pending = self._local.accessed
+        connection.executemany(
+            'UPDATE cache SET accessed = ? WHERE key = ? AND accessed < ?',
+            [(accessed, key, accessed) for key, accessed in pending.items()],
+        )
+        pending.clear()
+
+    def _store(self, connection, key, value, timeout, now):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        connection.execute(
+            'INSERT OR REPLACE INTO cache '
+            '(key, value, expires, size, accessed) VALUES (?, ?, ?, ?, ?)',
+            (key, data, self.get_backend_timeout(timeout), len(data), now),
+        )
+
+    def _evict(self, connection, now):
+        self._flush_accessed(connection)
+        connection.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        excess = connection.execute(
+            'SELECT bytes FROM usage WHERE id = 1'
+        ).fetchone()[0] - self._max_bytes
+        victims = []
+        while excess > 0:
+            rows = connection.execute(
+                'SELECT key, size FROM cache ORDER BY accessed LIMIT ? '
+                'OFFSET ?',
+                (EVICTION_BATCH, len(victims)),
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                victims.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+        connection.executemany('DELETE FROM cache WHERE key = ?', victims)
+        connection.executemany(
+            'INSERT INTO evictions (prefix, count) VALUES (?, ?) '
+            'ON CONFLICT (prefix) DO UPDATE '
+            'SET count = count + excluded.count',
+            Counter(stored_key_prefix(key) for key, in victims).items(),
+        )
+        return len(victims)
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        found = self._load(self._connection, [key], time.time())
+        if key not in found:
+            return default
+        return pickle.loads(found[key])
+
+    def get_many(self, keys, version=None):
+        if not keys:
+            return {}
+        key_map = {self._key(key, version): key for key in keys}
+        found = self._load(self._connection, list(key_map), time.time())
+        return {
+            key_map[key]: pickle.loads(value) for key, value in found.items()
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction(self._connection) as connection:
+            self._store(connection, key, value, timeout, now)
+            self._evict(connection, now)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        with self._transaction(self._connection) as connection:
+            for key, value in data.items():
+                self._store(
+                    connection, self._key(key, version), value, timeout, now
+                )
+            self._evict(connection, now)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction(self._connection) as connection:
+            if self._alive(connection, key, now):
+                return False
+            self._store(connection, key, value, timeout, now)
+            self._evict(connection, now)
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction(self._connection) as connection:
+            row = self._alive(connection, key, now)
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            connection.execute(
+                'UPDATE cache SET value = ?, size = ?, accessed = ? '
+                'WHERE key = ?',
+                (data, len(data), now, key),
+            )
+        return value
+
+    def incr_many(self, deltas, version=None):
+        """
+        Прибавляет deltas {ключ: приращение} к счётчикам в одной
+        транзакции. Отсутствующий счётчик начинается с нуля и хранится
+        без срока.
+        """
+        now = time.time()
+        with self._transaction(self._connection) as connection:
+            for key, delta in deltas.items():
+                key = self._key(key, version)
+                row = self._alive(connection, key, now)
+                value = (pickle.loads(row[0]) if row else 0) + delta
+                self._store(connection, key, value, None, now)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction(self._connection) as connection:
+            if self._alive(connection, key, now) is None:
+                return False
+            connection.execute(
+                'UPDATE cache SET expires = ?, accessed = ? WHERE key = ?',
+                (self.get_backend_timeout(timeout), now, key),
+            )
+        return True
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return self._alive(self._connection, key, time.time()) is not None
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        self._connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def delete_many(self, keys, version=None):
+        with self._transaction(self._connection) as connection:
+            connection.executemany(
+                'DELETE FROM cache WHERE key = ?',
+                [(self._key(key, version),) for key in keys],
+            )
+
+    def clear(self):
+        self._connection.execute('DELETE FROM cache')
+
+    def usage(self):
+        """Число записей, занятые байты и вытеснения по префиксам ключей."""
+        connection = self._connection
+        usage = defaultdict(lambda: {'entries': 0, 'bytes': 0, 'evictions': 0})
+        for key, size in connection.execute('SELECT key, size FROM cache'):
+            row = usage[stored_key_prefix(key)]
+            row['entries'] += 1
+            row['bytes'] += size
+        for prefix, count in connection.execute(
+            'SELECT prefix, count FROM evictions'
+        ):
+            usage[prefix]['evictions'] = count
+        return dict(usage)
+
+    def close(self, **kwargs):
+        pass
+
+    @staticmethod
+    def _alive(connection, key, now):
+        return connection.execute(
+            'SELECT value FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, now),
+        ).fetchone()
@@ -0,0 +1,176 @@
+import pickle
+import zlib
+from collections import namedtuple
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+from ...tracing import traced
+from ..stats import CacheStats
+
+Packed = namedtuple('Packed', 'codec data')
+
+CODECS = {
+    None: (lambda data, level: data, lambda data: data),
+    'zlib': (zlib.compress, zlib.decompress),
+}
+
+
+def load_lz4():
+    """lz4 импортируется, только если его выбрали в COMPRESSOR."""
+    try:
+        import lz4.frame
+    except ImportError:
+        return False
+    CODECS['lz4'] = (
+        lambda data, level: lz4.frame.compress(data, level),
+        lz4.frame.decompress,
+    )
+    return True
+
+
+def one_key(self, key, *args, **kwargs):
+    return {'key': key}
+
+
+def many_keys(self, keys, *args, **kwargs):
+    return {'keys': len(keys)}
+
+
+class StatsCache(BaseCache):
+    """
+    Обёртка над другим бэкендом: сжимает крупные значения
+    и считает попадания, промахи и объём записей по префиксам ключей.
+
+    OPTIONS: BACKEND и OPTIONS обёрнутого бэкенда, COMPRESS_MIN_SIZE,
+    COMPRESSOR (zlib или lz4), COMPRESS_LEVEL, STATS_FLUSH_INTERVAL.
+    Целые числа хранятся как есть, чтобы работали incr и decr.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._inner = import_string(options['BACKEND'])(
+            location, {**params, 'OPTIONS': options.get('OPTIONS', {})}
+        )
+        self._min_size = int(options.get('COMPRESS_MIN_SIZE', 1024))
+        self._codec = options.get('COMPRESSOR', 'zlib')
+        if self._codec == 'lz4' and 'lz4' not in CODECS:
+            load_lz4()
+        if self._codec not in CODECS:
+            self._codec = 'zlib'
+        self._level = options.get('COMPRESS_LEVEL', 6)
+        self.stats = CacheStats(options.get('STATS_FLUSH_INTERVAL', 10))
+
+    def _pack(self, key, value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        packed = Packed(None, data)
+        if len(data) >= self._min_size:
+            compress = CODECS[self._codec][0]
+            compressed = compress(data, self._level)
+            if len(compressed) < len(data):
+                packed = Packed(self._codec, compressed)
+        self.stats.count(
+            key, sets=1, raw_bytes=len(data), stored_bytes=len(packed.data)
+        )
+        return packed
+
+    @staticmethod
+    def _unpack(value):
+        if not isinstance(value, Packed):
+            return value
+        return pickle.loads(CODECS[value.codec][1](value.data))
+
+    def _flush_stats(self):
+        if self.stats.is_due():
+            self.stats.flush(self._inner)
+
+    @traced('cache.get', 'cache', one_key)
+    def get(self, key, default=None, version=None):
+        value = self._inner.get(key, version=version)
+        if value is None:
+            self.stats.count(key, misses=1)
+            self._flush_stats()
+            return default
+        self.stats.count(key, hits=1)
+        self._flush_stats()
+        return self._unpack(value)
+
+    @traced('cache.get_many', 'cache', many_keys)
+    def get_many(self, keys, version=None):
+        found = self._inner.get_many(keys, version=version)
+        for key in keys:
+            self.stats.count(key, **{'hits' if key in found else 'misses': 1})
+        self._flush_stats()
+        return {key: self._unpack(value) for key, value in found.items()}
+
+    @traced('cache.set', 'cache', one_key)
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._inner.set(key, self._pack(key, value), timeout, version)
+        self._flush_stats()
+
+    @traced('cache.set_many', 'cache', many_keys)
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        packed = {key: self._pack(key, value) for key, value in data.items()}
+        failed = self._inner.set_many(packed, timeout, version)
+        self._flush_stats()
+        return failed
+
+    @traced('cache.add', 'cache', one_key)
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._inner.add(key, self._pack(key, value), timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        return self._inner.incr(key, delta, version)
+
+    def decr(self, key, delta=1, version=None):
+        return self._inner.decr(key, delta, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._inner.touch(key, timeout, version)
+
+    def has_key(self, key, version=None):
+        return self._inner.has_key(key, version)  # noqa: W601
+
+    @traced('cache.delete', 'cache', one_key)
+    def delete(self, key, version=None):
+        self.stats.count(key, deletes=1)
+        return self._inner.delete(key, version)
+
+    @traced('cache.delete_many', 'cache', many_keys)
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.stats.count(key, deletes=1)
+        return self._inner.delete_many(keys, version)
+
+    def clear(self):
+        return self._inner.clear()
+
+    def close(self, **kwargs):
+        return self._inner.close(**kwargs)
+
+    def reset_stats(self):
+        self.stats.flush(self._inner)
+        CacheStats.reset(self._inner)
+
+    def report(self):
+        """
+        Сводка по префиксам: счётчики всех процессов и, если бэкенд
+        умеет считать занятое место, число записей, байты и вытеснения.
+        """
+        self.stats.flush(self._inner)
+        totals = CacheStats.collect(self._inner)
+        usage = getattr(self._inner, 'usage', dict)()
+        rows = []
+        for prefix in sorted(set(totals) | set(usage)):
+            row = {
+                'prefix': prefix,
+                **totals.get(prefix, {}),
+                **usage.get(prefix, {}),
+            }
+            requests = row.get('hits', 0) + row.get('misses', 0)
+            row['hit_rate'] = row.get('hits', 0) / requests if requests else 0
+            rows.append(row)
+        return sorted(rows, key=lambda row: -row.get('bytes', 0))
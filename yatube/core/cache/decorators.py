@@ -0,0 +1,107 @@
+import hashlib
+import re
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.utils.cache import patch_response_headers
+
+from .tiered import tiered_cache
+
+
+def canonical_path(request):
+    """
+    Путь с параметрами из CACHE_QUERY_PARAMS, значения которых подходят
+    под шаблон. Прочие параметры (utm_*, случайные) не плодят записи
+    кеша и не позволяют обойти его.
+    """
+    params = sorted(
+        (name, value)
+        for name, pattern in settings.CACHE_QUERY_PARAMS.items()
+        for value in request.GET.getlist(name)[:1]
+        if re.fullmatch(pattern, value)
+    )
+    if not params:
+        return request.path
+    return f'{request.path}?{urlencode(params)}'
+
+
+def page_key(request, prefix):
+    path = hashlib.md5(canonical_path(request).encode()).hexdigest()
+    user = request.user.pk if request.user.is_authenticated else 'anon'
+    return f'{prefix}:{path}:{user}'
+
+
+def is_cacheable(response):
+    return response.status_code == 200 and not response.cookies
+
+
+def anonymous_refresher(request, respond):
+    """
+    Пересчёт страницы для фонового обновления: respond получает новый
+    анонимный запрос на тот же адрес. Исходный запрос к тому времени
+    уже отвечен, его объект не потокобезопасен, а сессия
+    и пользователь могли устареть.
+    """
+    path = canonical_path(request)
+    secure = request.is_secure()
+    meta = {
+        name: request.META[name]
+        for name in ('HTTP_HOST', 'SERVER_NAME', 'SERVER_PORT')
+        if name in request.META
+    }
+
+    def refresh():
+        # django.test не грузится при старте воркера, см. snapshots.
+        from django.test import RequestFactory
+
+        fresh = RequestFactory().get(path, secure=secure, **meta)
+        fresh.user = AnonymousUser()
+        return respond(fresh)
+    return refresh
+
+
+def cache_page(timeout, key_prefix='page', tags=None,
+               stale_while_revalidate=False):
+    """
+    Кеширует GET-ответ представления в двухуровневом кеше
+    отдельно для каждого пользователя и адреса.
+
+    tags - функция от аргументов представления, возвращающая теги
+    страницы для инвалидации. С stale_while_revalidate страница
+    с истёкшим сроком отдаётся анониму сразу и обновляется в фоне
+    новым анонимным запросом; страницы пользователей пересчитываются
+    синхронно. Страницы, которые уже кеширует
+    AnonymousPageCacheMiddleware, второй раз не сохраняются.
+    """
+    def decorator(view):
+        prefix = f'{key_prefix}:{view.__module__}.{view.__name__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            def respond(request):
+                response = view(request, *args, **kwargs)
+                patch_response_headers(response, timeout)
+                return response
+
+            if getattr(request, 'page_cached', False):
+                return respond(request)
+
+            refresher = None
+            if not request.user.is_authenticated:
+                refresher = anonymous_refresher(request, respond)
+            return tiered_cache.get_or_set(
+                page_key(request, prefix),
+                lambda: respond(request),
+                timeout,
+                is_cacheable,
+                tags=tags(*args, **kwargs) if tags else (),
+                stale_while_revalidate=stale_while_revalidate,
+                refresher=refresher,
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,199 @@
+from django.core.cache import caches
+from django.http import Http404
+
+from .popularity import Popularity
+
+
+class ObjectCache:
+    """
+    Кеш экземпляров модели по первичному и естественному ключу.
+
+    Читает сквозь кеш: промахи догружаются из базы одним запросом.
+    Связанные объекты (related: поле -> ObjectCache) подставляются
+    из своих кешей одним пакетным чтением на все поля, поэтому
+    список id превращается в готовые объекты без SQL.
+    Сбрасывается обработчиком invalidate на сохранение и удаление.
+    Одиночные чтения через get() и отдачи страниц из кеша
+    через record_hit() учитываются в popularity: по ним top()
+    выбирает, какие объекты загрузить при прогреве.
+    С fields в кеш попадают только эти поля, остальные отложены.
+    """
+
+    def __init__(self, model, timeout, natural_key=None, related=None,
+                 loader=None, fields=None, alias='default'):
+        self.model = model
+        self.timeout = timeout
+        self.natural_key = natural_key
+        self.related = related or {}
+        self.loader = loader
+        self.fields = fields
+        self.alias = alias
+        self.prefix = f'obj:{model._meta.label_lower}'
+        self.popularity = Popularity(self.prefix)
+        # Страница из кеша знает только естественный ключ: искать
+        # по нему pk на каждом попадании дорого, pk находит top().
+        self.natural_popularity = (
+            Popularity(f'{self.prefix}:{natural_key}')
+            if natural_key is not None else None
+        )
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def key(self, pk):
+        return f'{self.prefix}:{pk}'
+
+    def natural(self, value):
+        return f'{self.prefix}:{self.natural_key}:{value}'
+
+    def queryset(self):
+        queryset = self.model._default_manager.all()
+        if self.fields is not None:
+            queryset = queryset.only(*self.fields)
+        return queryset
+
+    def load(self, pks):
+        if self.loader is not None:
+            return self.loader(pks)
+        return self.queryset().in_bulk(pks)
+
+    def get(self, pk=None, **lookup):
+        """
+        Возвращает объект по pk или по естественному ключу, например
+        get(slug='cats'). Если объекта нет, бросает DoesNotExist.
+        """
+        if not lookup:
+            instance = self.get_many([pk]).get(pk)
+            if instance is None:
+                raise self.model.DoesNotExist(
+                    f'{self.model.__name__} с pk={pk} не найден.'
+                )
+            self.popularity.record(pk)
+            return instance
+
+        (field, value), = lookup.items()
+        pk = self.cache.get(self.natural(value))
+        instance = None if pk is None else self.get_many([pk]).get(pk)
+        if instance is None or getattr(instance, field) != value:
+            instance = self.queryset().get(**lookup)
+            self.cache.set_many({
+                self.natural(value): instance.pk,
+                self.key(instance.pk): instance,
+            }, self.timeout)
+            self.hydrate([instance])
+        self.popularity.record(instance.pk)
+        return instance
+
+    def record_hit(self, pk=None, **lookup):
+        """
+        Учитывает обращение к объекту, которое обошлось без get(),
+        например отдачу его страницы из кеша страниц.
+        """
+        if not lookup:
+            self.popularity.record(pk)
+            return
+        (field, value), = lookup.items()
+        self.natural_popularity.record(value)
+
+    def top(self, count):
+        """pk count самых популярных объектов с учётом record_hit()."""
+        counts = self.popularity.counts()
+        if self.natural_popularity is not None:
+            natural = self.natural_popularity.counts()
+            pks = dict(
+                self.model._default_manager
+                .filter(**{f'{self.natural_key}__in': list(natural)})
+                .values_list(self.natural_key, 'pk')
+            )
+            for value, hits in natural.items():
+                if value in pks:
+                    counts[pks[value]] += hits
+        return [pk for pk, _ in counts.most_common(count)]
+
+    def get_many(self, pks):
+        """Словарь pk -> объект со связанными объектами; без отсутствующих."""
+        objects = fetch_many({self: pks})[self]
+        self.hydrate(objects.values())
+        return objects
+
+    def warm(self, pks):
+        """Загружает объекты из базы в кеш, перезаписывая старые копии."""
+        loaded = self.load(pks)
+        data = {self.key(pk): instance for pk, instance in loaded.items()}
+        if self.natural_key is not None:
+            data.update({
+                self.natural(getattr(instance, self.natural_key)): pk
+                for pk, instance in loaded.items()
+            })
+        self.cache.set_many(data, self.timeout)
+        self.hydrate(loaded.values())
+        return loaded
+
+    def hydrate(self, instances):
+        instances = list(instances)
+        if not self.related or not instances:
+            return
+        fields = {
+            name: self.model._meta.get_field(name) for name in self.related
+        }
+        wanted = {
+            self.related[name]: {
+                getattr(instance, field.attname) for instance in instances
+            } - {None}
+            for name, field in fields.items()
+        }
+        found = fetch_many(wanted)
+        for name, field in fields.items():
+            related = found[self.related[name]]
+            for instance in instances:
+                pk = getattr(instance, field.attname)
+                if pk in related:
+                    setattr(instance, name, related[pk])
+                elif pk is not None and field.null:
+                    setattr(instance, name, None)
+
+    def invalidate(self, sender, instance, **kwargs):
+        keys = [self.key(instance.pk)]
+        if self.natural_key is not None:
+            keys.append(self.natural(getattr(instance, self.natural_key)))
+        self.cache.delete_many(keys)
+
+
+def fetch_many(wanted):
+    """
+    Читает объекты нескольких ObjectCache одним обращением к кешу
+    и догружает промахи из базы: {кеш: pks} -> {кеш: {pk: объект}}.
+    """
+    keys = {
+        object_cache.key(pk): (object_cache, pk)
+        for object_cache, pks in wanted.items()
+        for pk in pks
+    }
+    found = {object_cache: {} for object_cache in wanted}
+    if not keys:
+        return found
+    caches_used = {object_cache.cache for object_cache in wanted}
+    for cache in caches_used:
+        for key, instance in cache.get_many(list(keys)).items():
+            object_cache, pk = keys[key]
+            found[object_cache][pk] = instance
+    for object_cache, pks in wanted.items():
+        missing = [pk for pk in pks if pk not in found[object_cache]]
+        if not missing:
+            continue
+        loaded = object_cache.load(missing)
+        object_cache.cache.set_many({
+            object_cache.key(pk): instance for pk, instance in loaded.items()
+        }, object_cache.timeout)
+        found[object_cache].update(loaded)
+    return found
+
+
+def get_cached_object_or_404(object_cache, pk=None, **lookup):
+    try:
+        return object_cache.get(pk, **lookup)
+    except object_cache.model.DoesNotExist:
+        raise Http404(
+            f'{object_cache.model._meta.object_name} не найден.'
+        )
@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class Popularity:
+    """
+    Счётчики обращений к объектам с экспоненциальным затуханием
+    (период полураспада POPULARITY_HALF_LIFE). Копятся в процессе
+    и периодически сливаются в общую запись в кеше, где хранятся
+    POPULARITY_MAX_ITEMS самых частых. Кеш POPULARITY_CACHE должен
+    переживать перезапуски, иначе прогреву не на что опереться.
+    Слияние из разных процессов не атомарно: часть обращений может
+    потеряться, для выбора популярных ключей это допустимо.
+    """
+
+    def __init__(self, name, alias=None):
+        self.key = f'popular:{name}'
+        self.alias = alias or settings.POPULARITY_CACHE
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._flushed = time.monotonic()
+
+    def record(self, item):
+        with self._lock:
+            self._counts[item] += 1
+        if (
+            time.monotonic() - self._flushed
+            >= settings.POPULARITY_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            local, self._counts = self._counts, Counter()
+            self._flushed = time.monotonic()
+        if not local:
+            return
+        cache = caches[self.alias]
+        now = time.time()
+        merged = self.decayed(cache.get(self.key), now)
+        merged.update(local)
+        cache.set(self.key, {
+            'updated': now,
+            'counts': dict(merged.most_common(settings.POPULARITY_MAX_ITEMS)),
+        }, None)
+
+    @staticmethod
+    def decayed(stored, now):
+        if not stored:
+            return Counter()
+        factor = 0.5 ** (
+            (now - stored['updated']) / settings.POPULARITY_HALF_LIFE
+        )
+        return Counter({
+            item: count * factor for item, count in stored['counts'].items()
+        })
+
+    def counts(self):
+        """Затухшие счётчики всех процессов, включая несохранённые."""
+        self.flush()
+        return self.decayed(caches[self.alias].get(self.key), time.time())
+
+    def top(self, count):
+        """count самых популярных объектов, начиная с самого частого."""
+        return [item for item, _ in self.counts().most_common(count)]
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import Counter, defaultdict
+
+COUNTERS = (
+    'hits', 'misses', 'sets', 'deletes', 'raw_bytes', 'stored_bytes',
+)
+STATS_KEY_PREFIX = 'cachestats:'
+PREFIXES_KEY = STATS_KEY_PREFIX + 'prefixes'
+
+
+def key_prefix(key):
+    """'page:posts.views.index:<хеш>:anon' -> 'page:posts.views.index'."""
+    return ':'.join(key.split(':', 2)[:2])
+
+
+def stored_key_prefix(key):
+    """Префикс ключа в виде, в котором его хранит бэкенд (с версией)."""
+    return key_prefix(key.split(':', 2)[-1])
+
+
+class CacheStats:
+    """
+    Счётчики операций кеша по префиксам ключей. Копятся в памяти
+    процесса и не чаще раза в interval секунд добавляются к общим
+    счётчикам в самом кеше, чтобы их видели все процессы. Бэкенд
+    с incr_many принимает все приращения одной транзакцией.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._counters = defaultdict(Counter)
+        self._lock = threading.Lock()
+        self._flushed = time.monotonic()
+
+    def count(self, key, **counts):
+        with self._lock:
+            self._counters[key_prefix(key)].update(counts)
+
+    def is_due(self):
+        return time.monotonic() - self._flushed >= self.interval
+
+    def flush(self, store):
+        with self._lock:
+            counters, self._counters = self._counters, defaultdict(Counter)
+            self._flushed = time.monotonic()
+        if not counters:
+            return
+        known = store.get(PREFIXES_KEY) or set()
+        if not known.issuperset(counters):
+            store.set(PREFIXES_KEY, known | set(counters), None)
+        deltas = {
+            f'{STATS_KEY_PREFIX}{prefix}:{name}': value
+            for prefix, counter in counters.items()
+            for name, value in counter.items()
+        }
+        if hasattr(store, 'incr_many'):
+            store.incr_many(deltas)
+            return
+        for key, value in deltas.items():
+            store.add(key, 0, None)
+            store.incr(key, value)
+
+    @staticmethod
+    def collect(store):
+        prefixes = sorted(store.get(PREFIXES_KEY) or ())
+        keys = {
+            f'{STATS_KEY_PREFIX}{prefix}:{name}': (prefix, name)
+            for prefix in prefixes
+            for name in COUNTERS
+        }
+        totals = {prefix: dict.fromkeys(COUNTERS, 0) for prefix in prefixes}
+        for key, value in store.get_many(list(keys)).items():
+            prefix, name = keys[key]
+            totals[prefix][name] = value
+        return totals
+
+    @staticmethod
+    def reset(store):
+        prefixes = store.get(PREFIXES_KEY) or ()
+        store.delete_many([
+            f'{STATS_KEY_PREFIX}{prefix}:{name}'
+            for prefix in prefixes
+            for name in COUNTERS
+        ] + [PREFIXES_KEY])
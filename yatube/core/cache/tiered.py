@@ -0,0 +1,367 @@
+import logging
+import math
+import os
+import pickle
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+
+from .. import routers
+
+Entry = namedtuple(
+    'Entry', 'value expires delta versions', defaults=((),)
+)
+
+EPOCH_KEY = 'tiered:epoch'
+TAG_KEY_PREFIX = 'tiered:tag:'
+KEY_VERSION_PREFIX = 'tiered:key:'
+LOCK_KEY_PREFIX = 'tiered:lock:'
+LOCK_STRIPES = 64
+LOCK_POLL_INTERVAL = 0.05
+PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+logger = logging.getLogger(__name__)
+
+# Состояние потока: версии из L2, прочитанные в текущем запросе,
+# и захваченные полосы блокировок.
+local = threading.local()
+
+
+def reset_versions(**kwargs):
+    """Обработчик request_started: версии перечитываются в каждом запросе."""
+    local.versions = {}
+
+
+class LRU:
+    """Потокобезопасный LRU-словарь с ограничением числа записей."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                self._data.move_to_end(key)
+            return item
+
+    def set(self, key, item):
+        with self._lock:
+            self._data[key] = item
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TieredCache:
+    """
+    Двухуровневый кеш: L1 в памяти процесса перед общим L2.
+
+    Защищает от лавины пересчётов: запись пересчитывается заранее
+    с вероятностью, растущей к концу срока (XFetch), а пересчёт ключа
+    выполняет только один запрос - остальные ждут или получают
+    устаревшее значение. Записи L1 хранятся сериализованными
+    и сверяются с эпохой L2 (меняется при очистке) и версией ключа
+    (меняется в invalidate()). Эпоха, версии ключей и теги читаются
+    одним get_many и запоминаются до конца запроса, а вне запросов -
+    на CACHE_L1_CHECK_INTERVAL: попадание в L1 не обращается к L2,
+    а изменения в других процессах видны со следующего запроса.
+    """
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+        self.l1 = LRU(settings.CACHE_L1_MAX_ENTRIES)
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+
+    @property
+    def l2(self):
+        return caches[self.alias]
+
+    def known_versions(self):
+        versions = getattr(local, 'versions', None)
+        if versions is None:
+            versions = local.versions = {}
+        state = versions.get(self.alias)
+        now = time.monotonic()
+        if (
+            state is None
+            or now - state[0] >= settings.CACHE_L1_CHECK_INTERVAL
+        ):
+            state = versions[self.alias] = (now, {})
+        return state[1]
+
+    def versions(self, keys):
+        """Версии по их ключам в L2; недостающие читаются одним get_many."""
+        known = self.known_versions()
+        missing = [key for key in keys if key not in known]
+        if missing:
+            found = self.l2.get_many(missing)
+            if EPOCH_KEY in missing and EPOCH_KEY not in found:
+                self.l2.add(EPOCH_KEY, uuid.uuid4().hex, None)
+                found[EPOCH_KEY] = self.l2.get(EPOCH_KEY)
+            for key in missing:
+                known[key] = found.get(key)
+        return tuple(known[key] for key in keys)
+
+    def stamp(self, key):
+        return self.versions((EPOCH_KEY, KEY_VERSION_PREFIX + key))
+
+    def get_entry(self, key):
+        stamp = self.stamp(key)
+        item = self.l1.get(key)
+        if item is not None and item[1] == stamp:
+            entry = pickle.loads(item[0])
+        else:
+            entry = self.l2.get(key)
+            if entry is not None:
+                self.l1.set(
+                    key, (pickle.dumps(entry, PICKLE_PROTOCOL), stamp)
+                )
+        if entry is not None and self.is_expired(entry, time.time()):
+            return None
+        return entry
+
+    @staticmethod
+    def is_expired(entry, now):
+        """Жёсткий срок: после него устаревшая копия уже не отдаётся."""
+        return now >= entry.expires + settings.CACHE_STALE_TIME
+
+    def set_entry(self, key, entry, timeout):
+        self.l2.set(key, entry, timeout + settings.CACHE_STALE_TIME)
+        self.l1.set(
+            key, (pickle.dumps(entry, PICKLE_PROTOCOL), self.stamp(key))
+        )
+
+    def bump(self, keys):
+        """Новые версии в L2 и сразу в версиях текущего запроса."""
+        versions = {key: uuid.uuid4().hex for key in keys}
+        self.l2.set_many(versions, None)
+        self.known_versions().update(versions)
+
+    def invalidate(self, *keys):
+        """
+        Удаляет записи и меняет их версии: копии в L1 других процессов
+        перестают совпадать, остальные записи L1 не затрагиваются.
+        """
+        self.l2.delete_many(keys)
+        self.bump([KEY_VERSION_PREFIX + key for key in keys])
+        for key in keys:
+            self.l1.delete(key)
+
+    def tag_versions(self, tags):
+        return self.versions([TAG_KEY_PREFIX + tag for tag in tags])
+
+    def invalidate_tags(self, *tags):
+        """
+        Помечает устаревшими записи с этими тегами. Сами записи
+        остаются в кеше и отдаются, если пересчёт упадёт с ошибкой базы.
+        """
+        self.bump([TAG_KEY_PREFIX + tag for tag in tags])
+
+    @staticmethod
+    def is_fresh(entry, now):
+        """XFetch: чем дороже пересчёт и ближе срок, тем раньше пересчёт."""
+        jitter = -entry.delta * settings.CACHE_EARLY_RECOMPUTE_BETA * (
+            math.log(1.0 - random.random())
+        )
+        return now + jitter < entry.expires
+
+    @staticmethod
+    def is_newer(entry, stale, versions):
+        return (
+            entry is not None
+            and entry.versions == versions
+            and (stale is None or entry.expires > stale.expires)
+            and time.time() < entry.expires
+        )
+
+    def get_or_set(self, key, producer, timeout, cacheable=None, tags=(),
+                   stale_while_revalidate=False, refresher=None):
+        """
+        Возвращает значение ключа, при необходимости пересчитывая его.
+
+        С stale_while_revalidate запись с истёкшим мягким сроком
+        отдаётся сразу, а пересчёт уходит в фоновый поток и выполняется
+        через refresher. producer в фоне не вызывается: он может
+        держать объекты текущего запроса. Без refresher запись
+        пересчитывается синхронно, как без stale_while_revalidate.
+        Запись, помеченная устаревшей через теги, пересчитывается
+        синхронно. Если пересчёт падает с ошибкой базы, отдаётся
+        устаревшая копия, пока она есть в кеше.
+        """
+        # Эпоха, версия ключа и теги - одним обращением к L2.
+        self.versions((
+            EPOCH_KEY, KEY_VERSION_PREFIX + key,
+            *(TAG_KEY_PREFIX + tag for tag in tags),
+        ))
+        versions = self.tag_versions(tags)
+        entry = self.get_entry(key)
+        if entry is None or entry.versions != versions:
+            return self.recompute(
+                key, producer, timeout, None, cacheable, versions, entry
+            )
+        if self.is_fresh(entry, time.time()):
+            return entry.value
+        if stale_while_revalidate and refresher is not None:
+            self.schedule_refresh(
+                key, refresher, timeout, cacheable, versions
+            )
+            return entry.value
+        return self.recompute(
+            key, producer, timeout, entry, cacheable, versions
+        )
+
+    def recompute(self, key, producer, timeout, stale, cacheable=None,
+                  versions=(), fallback=None):
+        fallback = fallback or stale
+        stripe = hash(key) % LOCK_STRIPES
+        held = self.held_stripes()
+        # Пересчёт внутри пересчёта (producer сам зовёт get_or_set)
+        # не ждёт полос: два потока, берущие полосы в разном порядке,
+        # ждали бы друг друга вечно. Без полосы от повторного пересчёта
+        # защищает блокировка ключа в L2.
+        acquired = stripe not in held and self._locks[stripe].acquire(
+            blocking=stale is None and not held
+        )
+        if not acquired and stale is not None and stripe not in held:
+            return stale.value
+        args = (key, producer, timeout, stale, cacheable, versions, fallback)
+        if not acquired:
+            return self.produce_once(*args)
+        held.add(stripe)
+        try:
+            return self.produce_once(*args)
+        finally:
+            held.discard(stripe)
+            self._locks[stripe].release()
+
+    def produce_once(self, key, producer, timeout, stale, cacheable,
+                     versions, fallback):
+        """Пересчёт под блокировкой ключа в L2, если его не сделали раньше."""
+        entry = self.get_entry(key)
+        if self.is_newer(entry, stale, versions):
+            return entry.value
+
+        lock_key = LOCK_KEY_PREFIX + key
+        locked = self.l2.add(lock_key, 1, settings.CACHE_LOCK_TIMEOUT)
+        if not locked:
+            if stale is not None:
+                return stale.value
+            entry = self.wait_for(key, versions)
+            if entry is not None:
+                return entry.value
+        try:
+            return self.produce(key, producer, timeout, cacheable, versions)
+        except DatabaseError:
+            if fallback is None:
+                raise
+            logger.warning(
+                'Ошибка базы при пересчёте %s, отдаём устаревшую копию',
+                key, exc_info=True,
+            )
+            return fallback.value
+        finally:
+            if locked:
+                self.l2.delete(lock_key)
+
+    @staticmethod
+    def held_stripes():
+        """Полосы блокировок, которые держит текущий поток."""
+        if not hasattr(local, 'stripes'):
+            local.stripes = set()
+        return local.stripes
+
+    def produce(self, key, producer, timeout, cacheable, versions):
+        started = time.time()
+        value = producer()
+        finished = time.time()
+        if cacheable is None or cacheable(value):
+            self.set_entry(
+                key,
+                Entry(value, finished + timeout, finished - started, versions),
+                timeout,
+            )
+        return value
+
+    def schedule_refresh(self, key, producer, timeout, cacheable, versions):
+        with self._pending_lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        args = (key, producer, timeout, cacheable, versions)
+        if settings.CACHE_REFRESH_WORKERS:
+            self.executor.submit(self.refresh_in_background, *args)
+        else:
+            self.refresh(*args)
+
+    @property
+    def executor(self):
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(
+                settings.CACHE_REFRESH_WORKERS, 'cache-refresh'
+            )
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def refresh_in_background(self, *args):
+        # Поток пула не наследует закрепление за основной базой
+        # от прошлых задач: обновление читает как обычный аноним.
+        routers.reset_pin()
+        try:
+            self.refresh(*args)
+        finally:
+            routers.reset_pin()
+            connections.close_all()
+
+    def refresh(self, key, producer, timeout, cacheable, versions):
+        lock_key = LOCK_KEY_PREFIX + key
+        try:
+            if not self.l2.add(lock_key, 1, settings.CACHE_LOCK_TIMEOUT):
+                return
+            try:
+                self.produce(key, producer, timeout, cacheable, versions)
+            except DatabaseError:
+                logger.warning(
+                    'Ошибка базы при фоновом обновлении %s', key,
+                    exc_info=True,
+                )
+            except Exception:
+                logger.exception('Сбой фонового обновления %s', key)
+            finally:
+                self.l2.delete(lock_key)
+        finally:
+            with self._pending_lock:
+                self._pending.discard(key)
+
+    def wait_for(self, key, versions=()):
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = self.l2.get(key)
+            if entry is not None and entry.versions == versions:
+                return entry
+        return None
+
+
+tiered_cache = TieredCache()
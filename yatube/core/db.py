@@ -0,0 +1,23 @@
+import sqlite3
+
+from django.conf import settings
+
+
+def apply_pragmas(raw_connection, pragmas):
+    for pragma, value in pragmas.items():
+        raw_connection.execute(f'PRAGMA {pragma} = {value}')
+
+
+def tune_sqlite(sender, connection, **kwargs):
+    """Настраивает каждое новое соединение с SQLite по SQLITE_PRAGMAS."""
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection.connection, settings.SQLITE_PRAGMAS)
+
+
+def copy_database(source, target_path):
+    """Копирует базу SQLite через backup API в файл target_path."""
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
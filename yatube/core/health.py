@@ -0,0 +1,119 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Выставлен, пока процесс прогревает кеш: воркер ещё не готов.
+warming = threading.Event()
+
+
+def database_aliases():
+    """Базы, которые обслуживают запросы: основная, шарды и реплики."""
+    return list(dict.fromkeys([
+        DEFAULT_DB_ALIAS,
+        *settings.POST_SHARDS,
+        *settings.DATABASE_REPLICAS,
+    ]))
+
+
+def check_database():
+    for alias in database_aliases():
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
+
+def check_cache():
+    cache = caches['default']
+    key = f'health:{uuid.uuid4().hex}'
+    cache.set(key, 1, 10)
+    try:
+        if cache.get(key) != 1:
+            raise RuntimeError('значение не прочиталось из кеша')
+    finally:
+        cache.delete(key)
+
+
+def check_storage():
+    name = default_storage.save(
+        f'health/{uuid.uuid4().hex}', ContentFile(b'ok')
+    )
+    default_storage.delete(name)
+
+
+CHECKS = {
+    'database': check_database,
+    'cache': check_cache,
+    'storage': check_storage,
+}
+
+
+class ReadinessProbe:
+    """
+    Проверки зависимостей для /readyz: запрос к каждой базе, запись
+    и чтение кеша, запись в хранилище медиа. Проверка без ошибки,
+    но медленнее своего бюджета из HEALTH_BUDGETS_MS тоже считается
+    непройденной. Результат хранится в процессе HEALTH_CACHE_SECONDS:
+    частые пробы балансировщика не добавляют нагрузки, а кеш Django
+    для этого не годится - он сам среди проверяемых.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._checked = None
+        self._results = None
+
+    def results(self):
+        with self._lock:
+            if (
+                self._checked is None
+                or time.monotonic() - self._checked
+                >= settings.HEALTH_CACHE_SECONDS
+            ):
+                self._results = {
+                    name: self.run(name, check)
+                    for name, check in CHECKS.items()
+                }
+                self._checked = time.monotonic()
+            return self._results
+
+    @staticmethod
+    def run(name, check):
+        budget = settings.HEALTH_BUDGETS_MS[name]
+        started = time.perf_counter()
+        try:
+            check()
+        except Exception as error:
+            result = {
+                'ok': False,
+                'error': f'{type(error).__name__}: {error}',
+            }
+        else:
+            result = {'ok': True}
+        elapsed = (time.perf_counter() - started) * 1000
+        if result['ok'] and elapsed > budget:
+            result = {'ok': False, 'error': 'превышен бюджет'}
+        return {
+            **result,
+            'duration_ms': round(elapsed, 3),
+            'budget_ms': budget,
+        }
+
+
+probe = ReadinessProbe()
+
+
+def readiness():
+    """Готовность воркера: (готов ли, подробности для ответа)."""
+    checks = probe.results()
+    is_warming = warming.is_set()
+    ready = not is_warming and all(check['ok'] for check in checks.values())
+    return ready, {'ready': ready, 'warming': is_warming, 'checks': checks}
@@ -0,0 +1,343 @@
+import http.client
+import io
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+from django.core.handlers.wsgi import get_path_info
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import OperationalError
+from django.db.backends.signals import connection_created
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import Resolver404, resolve, reverse
+
+from .benchmarks import percentiles
+
+CSRF_TOKEN = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+OK_STATUSES = (200, 302)
+LOAD_PASSWORD = 'load-test-password'
+
+DEFAULT_MIX = {
+    'browse_index': 35,
+    'browse_group': 15,
+    'open_post': 20,
+    'open_profile': 10,
+    'follow_feed': 6,
+    'comment': 7,
+    'follow': 4,
+    'create_post': 3,
+}
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class LockWaitRecorder:
+    """
+    Обёртка выполнения запросов к базе в процессе сервера. Пишущий
+    запрос дольше threshold секунд считается ожиданием блокировки
+    SQLite (busy_timeout), ошибка "database is locked" - отказом.
+    Счёт ведётся по маршруту текущего HTTP-запроса.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.stats = defaultdict(lambda: {
+            'writes': 0, 'lock_waits': 0, 'lock_wait_time': 0.0,
+            'locked': 0,
+        })
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(WRITE_STATEMENTS):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as error:
+            if 'locked' in str(error):
+                self.record(locked=1)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.threshold:
+                self.record(lock_waits=1, lock_wait_time=elapsed)
+            self.record(writes=1)
+
+    def record(self, **values):
+        endpoint = getattr(self.local, 'endpoint', '?')
+        with self.lock:
+            stats = self.stats[endpoint]
+            for name, value in values.items():
+                stats[name] += value
+
+    def install(self, sender, connection, **kwargs):
+        connection.execute_wrappers.append(self)
+
+    def wrap(self, application):
+        def recorded(environ, start_response):
+            try:
+                self.local.endpoint = resolve(
+                    get_path_info(environ)
+                ).view_name
+            except Resolver404:
+                self.local.endpoint = '?'
+            return application(environ, start_response)
+        return recorded
+
+
+def serve(application, pipe, threshold):
+    """
+    Тело процесса сервера: многопоточный WSGI-сервер на свободном
+    порту. Сообщает адрес в pipe, по команде останавливается
+    и отдаёт статистику ожиданий блокировок.
+    """
+    recorder = LockWaitRecorder(threshold)
+    connection_created.connect(recorder.install)
+    server = ThreadedWSGIServer(
+        ('127.0.0.1', 0), QuietHandler, allow_reuse_address=False
+    )
+    server.set_app(recorder.wrap(application))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    pipe.send(server.server_address)
+    pipe.recv()
+    server.shutdown()
+    server.server_close()
+    pipe.send({endpoint: dict(stats) for endpoint, stats in
+               recorder.stats.items()})
+
+
+class Session:
+    """Соединение keep-alive с cookie, как у одного браузера."""
+
+    def __init__(self, address):
+        self.address = address
+        self.cookies = {}
+        self.connection = None
+
+    def request(self, method, path, body=None, content_type=None):
+        headers = {'Host': '%s:%s' % self.address}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items()
+            )
+        if content_type:
+            headers['Content-Type'] = content_type
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(
+                *self.address, timeout=60
+            )
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+        elapsed = time.perf_counter() - started
+        for cookie in response.headers.get_all('Set-Cookie') or ():
+            self.store_cookie(cookie)
+        if response.will_close:
+            self.close()
+        return response.status, content, elapsed
+
+    def store_cookie(self, header):
+        pair, _, attributes = header.partition(';')
+        name, _, value = pair.partition('=')
+        if 'max-age=0' in attributes.lower().replace(' ', ''):
+            self.cookies.pop(name.strip(), None)
+        else:
+            self.cookies[name.strip()] = value.strip()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class Stats:
+    def __init__(self):
+        self.requests = defaultdict(int)
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def merge(self, other):
+        for name, requests in other.requests.items():
+            self.requests[name] += requests
+        for name, latencies in other.latencies.items():
+            self.latencies[name] += latencies
+        for name, errors in other.errors.items():
+            self.errors[name] += errors
+
+
+def sample_image():
+    from PIL import Image
+
+    content = io.BytesIO()
+    Image.new('RGB', (320, 200), (200, 80, 60)).save(content, 'JPEG')
+    return content.getvalue()
+
+
+class LoadClient:
+    """
+    Один виртуальный пользователь: анонимная сессия для просмотра
+    и сессия пользователя username для действий после входа.
+    Каждый сценарий - несколько запросов, как в браузере.
+    """
+
+    def __init__(self, address, username, data, seed):
+        self.anonymous = Session(address)
+        self.user = Session(address)
+        self.username = username
+        self.data = data
+        self.rng = random.Random(seed)
+        self.stats = Stats()
+        self.logged_in = False
+
+    def get(self, session, path):
+        return self.request(session, 'GET', path)
+
+    def request(self, session, method, path, body=None, content_type=None,
+                expected=OK_STATUSES):
+        name = resolve(urlsplit(path).path).view_name
+        self.stats.requests[name] += 1
+        try:
+            status, content, elapsed = session.request(
+                method, path, body, content_type
+            )
+        except (OSError, http.client.HTTPException):
+            self.stats.errors[name] += 1
+            return None
+        self.stats.latencies[name].append(elapsed * 1000)
+        if status not in expected:
+            self.stats.errors[name] += 1
+        return content
+
+    def post_form(self, form_path, path, fields):
+        """Открывает страницу с формой и отправляет её с CSRF-токеном."""
+        token = CSRF_TOKEN.search(self.get(self.user, form_path) or b'')
+        if token is None:
+            return
+        fields = {'csrfmiddlewaretoken': token.group(1).decode(), **fields}
+        if any(isinstance(value, io.IOBase) for value in fields.values()):
+            body = encode_multipart(BOUNDARY, fields)
+            content_type = MULTIPART_CONTENT
+        else:
+            body = urlencode(fields)
+            content_type = 'application/x-www-form-urlencoded'
+        # Успешная отправка формы всегда заканчивается редиректом.
+        self.request(
+            self.user, 'POST', path, body, content_type, expected=(302,)
+        )
+
+    def login(self):
+        if not self.logged_in:
+            login = reverse('users:login')
+            self.post_form(login, login, {
+                'username': self.username, 'password': LOAD_PASSWORD,
+            })
+            self.logged_in = 'sessionid' in self.user.cookies
+
+    def browse_index(self):
+        page = self.rng.choice((1, 1, 1, 2, 3))
+        self.get(self.anonymous, f'{reverse("posts:index")}?page={page}')
+
+    def browse_group(self):
+        slug = self.rng.choice(self.data['groups'])
+        self.get(self.anonymous, reverse('posts:group_list', args=(slug,)))
+
+    def open_post(self):
+        post_id = self.rng.choice(self.data['posts'])
+        self.get(
+            self.anonymous, reverse('posts:post_detail', args=(post_id,))
+        )
+
+    def open_profile(self):
+        author = self.rng.choice(self.data['authors'])
+        self.get(self.anonymous, reverse('posts:profile', args=(author,)))
+
+    def follow_feed(self):
+        self.login()
+        self.get(self.user, reverse('posts:follow_index'))
+
+    def comment(self):
+        self.login()
+        post_id = self.rng.choice(self.data['posts'])
+        self.post_form(
+            reverse('posts:post_detail', args=(post_id,)),
+            reverse('posts:add_comment', args=(post_id,)),
+            {'text': 'Комментарий под нагрузкой'},
+        )
+
+    def follow(self):
+        self.login()
+        author = self.rng.choice(self.data['authors'])
+        self.get(self.user, reverse('posts:profile', args=(author,)))
+        self.get(self.user, reverse('posts:profile_follow', args=(author,)))
+
+    def create_post(self):
+        self.login()
+        image = io.BytesIO(self.data['image'])
+        image.name = 'load.jpg'
+        create = reverse('posts:post_create')
+        self.post_form(create, create, {
+            'text': 'Пост под нагрузкой', 'image': image,
+        })
+
+    def run(self, mix, deadline):
+        flows = [getattr(self, name) for name in mix]
+        weights = list(mix.values())
+        while time.monotonic() < deadline:
+            self.rng.choices(flows, weights)[0]()
+        self.anonymous.close()
+        self.user.close()
+
+
+def run_clients(address, usernames, data, mix, duration, seed):
+    clients = [
+        LoadClient(address, username, data, seed + number)
+        for number, username in enumerate(usernames)
+    ]
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=client.run, args=(mix, deadline))
+        for client in clients
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    stats = Stats()
+    for client in clients:
+        stats.merge(client.stats)
+    return stats, elapsed
+
+
+def report(stats, server_stats, elapsed):
+    """Строки отчёта по маршрутам: пропускная способность и задержки."""
+    rows = []
+    for name, requests in sorted(stats.requests.items()):
+        latencies = stats.latencies[name]
+        server = server_stats.get(name, {})
+        rows.append({
+            'endpoint': name,
+            'requests': requests,
+            'rps': requests / elapsed,
+            **(percentiles(latencies) if latencies else {}),
+            'errors': stats.errors[name] / requests,
+            'lock_waits': server.get('lock_waits', 0),
+            'lock_wait_time': server.get('lock_wait_time', 0.0),
+            'locked': server.get('locked', 0),
+        })
+    return rows
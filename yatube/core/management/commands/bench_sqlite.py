@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db import apply_pragmas
+
+SCHEMA = (
+    'CREATE TABLE post ('
+    'id INTEGER PRIMARY KEY, text TEXT, pub_date REAL, author_id INTEGER)',
+    'CREATE INDEX post_pub_date ON post (pub_date)',
+    'CREATE TABLE comment ('
+    'id INTEGER PRIMARY KEY, post_id INTEGER, text TEXT, created REAL)',
+)
+READ_QUERY = (
+    'SELECT id, text, pub_date, author_id FROM post '
+    'ORDER BY pub_date DESC LIMIT 10 OFFSET ?'
+)
+WRITE_QUERY = 'INSERT INTO comment (post_id, text, created) VALUES (?, ?, ?)'
+
+
+class Workload:
+    def __init__(self, path, pragmas, persistent):
+        self.path = path
+        self.pragmas = pragmas
+        self.persistent = persistent
+        self.lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+        self.errors = 0
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=5)
+        apply_pragmas(connection, self.pragmas)
+        return connection
+
+    def run(self, operation, deadline):
+        connection = self.connect() if self.persistent else None
+        done = errors = 0
+        while time.monotonic() < deadline:
+            current = connection or self.connect()
+            try:
+                operation(current, done)
+                done += 1
+            except sqlite3.OperationalError:
+                errors += 1
+            finally:
+                if connection is None:
+                    current.close()
+        if connection is not None:
+            connection.close()
+        with self.lock:
+            self.errors += errors
+            if operation is self.read:
+                self.reads += done
+            else:
+                self.writes += done
+
+    @staticmethod
+    def read(connection, iteration):
+        connection.execute(READ_QUERY, (iteration % 100 * 10,)).fetchall()
+
+    @staticmethod
+    def write(connection, iteration):
+        with connection:
+            connection.execute(
+                WRITE_QUERY, (iteration % 1000, 'comment', time.time())
+            )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite при конкурентных чтениях '
+        'и записях: настройки по умолчанию против SQLITE_PRAGMAS '
+        'с постоянными соединениями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--posts', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        setups = (
+            ('default', {}, False),
+            ('tuned', settings.SQLITE_PRAGMAS, True),
+        )
+        for name, pragmas, persistent in setups:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self.seed(path, options['posts'])
+                workload = Workload(path, pragmas, persistent)
+                self.measure(workload, options)
+            seconds = options['seconds']
+            self.stdout.write(
+                f'{name:>8}: '
+                f'reads/s={workload.reads / seconds:10.1f} '
+                f'writes/s={workload.writes / seconds:8.1f} '
+                f'errors={workload.errors}'
+            )
+
+    @staticmethod
+    def seed(path, posts):
+        connection = sqlite3.connect(path)
+        with connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+            connection.executemany(
+                'INSERT INTO post (text, pub_date, author_id) '
+                'VALUES (?, ?, ?)',
+                (('post text ' * 20, i, i % 100) for i in range(posts)),
+            )
+        connection.close()
+
+    @staticmethod
+    def measure(workload, options):
+        deadline = time.monotonic() + options['seconds']
+        threads = [
+            threading.Thread(target=workload.run, args=(operation, deadline))
+            for operation, count in (
+                (workload.read, options['readers']),
+                (workload.write, options['writers']),
+            )
+            for _ in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
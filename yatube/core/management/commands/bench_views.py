@@ -0,0 +1,114 @@
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from core.benchmarks import (
+    isolated_caches,
+    load_baseline,
+    measure,
+    percentiles,
+    regressions,
+    save_baseline,
+    view_cases,
+)
+from posts.models import Follow, Group, Post
+from posts.seeding import Seeder
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет тестовую базу и измеряет p50/p95/p99 времени ответа '
+        'страниц posts, users и about. Сравнивает с базовой линией '
+        'BENCHMARK_BASELINE и завершается ошибкой при регрессии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--follows', type=float, default=10)
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--tolerance', type=float, default=0.3)
+        parser.add_argument('--min-delta', type=float, default=2.0)
+        parser.add_argument(
+            '--baseline', default=settings.BENCHMARK_BASELINE
+        )
+        parser.add_argument(
+            '--record', action='store_true',
+            help='Перезаписать базовую линию текущими результатами.',
+        )
+
+    def handle(self, *args, **options):
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        databases = runner.setup_databases()
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                with override_settings(CACHES=isolated_caches(directory)):
+                    results = self.run_benchmarks(options)
+        finally:
+            runner.teardown_databases(databases)
+            runner.teardown_test_environment()
+
+        baseline = load_baseline(options['baseline'])
+        if options['record'] or baseline is None:
+            save_baseline(options['baseline'], results)
+            self.stdout.write(
+                f'Базовая линия записана: {options["baseline"]}'
+            )
+            return
+        found = regressions(
+            results, baseline, options['tolerance'], options['min_delta']
+        )
+        if found:
+            raise CommandError('Регрессия времени ответа:\n' + '\n'.join(
+                f'  {name} {metric}: {old:.1f} -> {new:.1f} мс'
+                for name, metric, old, new in found
+            ))
+
+    def run_benchmarks(self, options):
+        group, author, post = self.seed(options)
+        reader = User.objects.create_user(username='bench-reader')
+        Follow.objects.create(user=reader, author=author)
+        clients = {None: Client(), 'reader': Client(), 'author': Client()}
+        clients['reader'].force_login(reader)
+        clients['author'].force_login(author)
+
+        results = {}
+        for case in view_cases(group, author, post):
+            results[case.name] = percentiles(
+                measure(clients[case.user], case, options['repeat'])
+            )
+            self.stdout.write(
+                f'{case.name:<32} ' + ' '.join(
+                    f'{metric}={value:7.1f}'
+                    for metric, value in results[case.name].items()
+                )
+            )
+        return results
+
+    @staticmethod
+    def seed(options):
+        Seeder(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+        ).run()
+        group = Group.objects.annotate(
+            post_count=Count('posts')
+        ).order_by('-post_count').first()
+        post = Post.objects.annotate(
+            comment_count=Count('comments')
+        ).order_by('-comment_count').first()
+        return group, post.author, post
@@ -0,0 +1,53 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+COLUMNS = (
+    ('prefix', 'Префикс', '<40', ''),
+    ('entries', 'Записей', '>8', ''),
+    ('bytes', 'Байт', '>12', ','),
+    ('evictions', 'Вытеснено', '>10', ''),
+    ('hits', 'Попадания', '>10', ''),
+    ('misses', 'Промахи', '>10', ''),
+    ('hit_rate', 'Доля', '>6', '.0%'),
+    ('raw_bytes', 'Записано', '>12', ','),
+    ('stored_bytes', 'После сжатия', '>12', ','),
+)
+
+
+def format_row(row):
+    cells = []
+    for name, _, align, spec in COLUMNS:
+        value = row.get(name)
+        text = '-' if value is None else format(value, spec)
+        cells.append(format(text, align))
+    return ' '.join(cells)
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает статистику кеша по префиксам ключей: записи, '
+        'занятые байты, вытеснения, попадания и степень сжатия.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alias', default='default')
+        parser.add_argument(
+            '--reset', action='store_true', help='Обнулить счётчики.'
+        )
+
+    def handle(self, *args, **options):
+        cache = caches[options['alias']]
+        if not hasattr(cache, 'report'):
+            raise CommandError(
+                f'Кеш {options["alias"]} не собирает статистику: '
+                'используйте бэкенд core.cache.backends.stats.StatsCache.'
+            )
+        if options['reset']:
+            cache.reset_stats()
+            self.stdout.write('Счётчики обнулены.')
+            return
+        self.stdout.write(' '.join(
+            format(title, align) for _, title, align, _ in COLUMNS
+        ))
+        for row in cache.report():
+            self.stdout.write(format_row(row))
@@ -0,0 +1,90 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.slowlog import log_files, read_entries
+
+
+def viewer_events(traces):
+    """
+    События выбранных трейсов для одного файла: каждый трейс -
+    отдельная строка (tid) с подписью, отсчёт времени от его начала.
+    """
+    events = []
+    for row, trace in enumerate(traces, 1):
+        origin = min(event['ts'] for event in trace['traceEvents'])
+        events.append({
+            'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': row,
+            'args': {'name': (
+                f'{trace["view"]} {trace["path"]} '
+                f'{trace["duration_ms"]:.0f} мс'
+            )},
+        })
+        events += [
+            {**event, 'pid': 1, 'tid': row, 'ts': event['ts'] - origin}
+            for event in trace['traceEvents']
+        ]
+    return events
+
+
+class Command(BaseCommand):
+    help = (
+        'Список сохранённых трейсов из TRACE_LOG и выгрузка выбранных '
+        'в файл формата Chrome Trace Event для Perfetto, '
+        'chrome://tracing или speedscope.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.TRACE_LOG)
+        parser.add_argument(
+            '--view', action='append', default=[],
+            help='Префикс имени маршрута. Можно повторять.',
+        )
+        parser.add_argument(
+            '--trace', action='append', default=[],
+            help='Идентификатор трейса. Можно повторять.',
+        )
+        parser.add_argument(
+            '--slowest', type=int, default=10,
+            help='Сколько самых медленных трейсов взять.',
+        )
+        parser.add_argument('--output', help='Файл для просмотрщика.')
+
+    def handle(self, *args, **options):
+        if not log_files(options['log']):
+            raise CommandError(f'Лог {options["log"]} пуст.')
+        traces = [
+            trace for trace in read_entries(options['log'])
+            if (not options['view']
+                or trace['view'].startswith(tuple(options['view'])))
+            and (not options['trace']
+                 or trace['trace_id'] in options['trace'])
+        ]
+        traces.sort(key=lambda trace: -trace['duration_ms'])
+        traces = traces[:options['slowest']]
+        if not traces:
+            raise CommandError('Подходящих трейсов нет.')
+
+        for trace in traces:
+            categories = {}
+            for event in trace['traceEvents']:
+                categories[event['cat']] = (
+                    categories.get(event['cat'], 0) + event['dur']
+                )
+            self.stdout.write(
+                f'{trace["trace_id"]} {trace["duration_ms"]:>9.1f} мс '
+                f'{trace["method"]} {trace["path"]} ({trace["view"]}) '
+                + ', '.join(
+                    f'{category} {total / 1000:.1f}'
+                    for category, total in sorted(categories.items())
+                    if category not in ('request', 'view')
+                )
+            )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({
+                    'traceEvents': viewer_events(traces),
+                    'displayTimeUnit': 'ms',
+                }, output, ensure_ascii=False)
+            self.stdout.write(f'Записано в {options["output"]}')
@@ -0,0 +1,183 @@
+import json
+import multiprocessing
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Count
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+from django.utils.module_loading import import_string
+
+from core.loadtest import (
+    DEFAULT_MIX,
+    LOAD_PASSWORD,
+    report,
+    run_clients,
+    sample_image,
+    serve,
+)
+from posts.models import Group, Post
+from posts.seeding import Seeder
+
+User = get_user_model()
+
+
+def parse_mix(value):
+    mix = dict(DEFAULT_MIX)
+    for item in filter(None, value.split(',')):
+        name, _, weight = item.partition('=')
+        if name not in DEFAULT_MIX:
+            raise CommandError(f'Неизвестный сценарий: {name}')
+        mix[name] = float(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def parse_setting(value):
+    name, _, raw = value.partition('=')
+    try:
+        return name, json.loads(raw)
+    except ValueError:
+        return name, raw
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест: поднимает WSGI_APPLICATION в отдельном '
+        'процессе на многопоточном сервере поверх заполненной тестовой '
+        'базы в файле и гоняет смесь сценариев анонимов и вошедших '
+        'пользователей. Отчёт: запросы в секунду, p50/p95/p99, доля '
+        'ошибок и ожидания блокировок SQLite по маршрутам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=30.0)
+        parser.add_argument(
+            '--mix', default='',
+            help='Веса сценариев: browse_index=50,comment=0,...',
+        )
+        parser.add_argument(
+            '--setting', action='append', default=[],
+            help='Переопределить настройку на время теста: '
+                 'POSTS_PER_PAGE=20 (значение в JSON).',
+        )
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=40000)
+        parser.add_argument('--follows', type=float, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--lock-wait-ms', type=float, default=20.0,
+            help='Пишущий запрос дольше этого считается ожиданием '
+                 'блокировки.',
+        )
+        parser.add_argument('--json', help='Сохранить отчёт в файл.')
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        overrides = dict(map(parse_setting, options['setting']))
+        with tempfile.TemporaryDirectory() as directory:
+            overrides.setdefault('CACHES', {
+                **settings.CACHES,
+                'stats': {
+                    **settings.CACHES['stats'],
+                    'LOCATION': os.path.join(directory, 'stats.sqlite3'),
+                },
+            })
+            overrides.setdefault(
+                'MEDIA_ROOT', os.path.join(directory, 'media')
+            )
+            database = connections[DEFAULT_DB_ALIAS].settings_dict
+            database['TEST'] = {
+                **database.get('TEST', {}),
+                'NAME': os.path.join(directory, 'load.sqlite3'),
+            }
+            database['CONN_MAX_AGE'] = 0
+
+            runner = DiscoverRunner(verbosity=0, interactive=False)
+            runner.setup_test_environment()
+            databases = runner.setup_databases()
+            try:
+                with override_settings(**overrides):
+                    rows = self.run_load(options, mix)
+            finally:
+                runner.teardown_databases(databases)
+                runner.teardown_test_environment()
+
+        self.write_report(rows)
+        if options['json']:
+            with open(options['json'], 'w') as output:
+                json.dump(rows, output, indent=2, ensure_ascii=False)
+
+    def run_load(self, options, mix):
+        data = self.seed(options)
+        usernames = [f'load{number}' for number in range(options['clients'])]
+        password = make_password(LOAD_PASSWORD)
+        for username in usernames:
+            User(username=username, password=password).save()
+
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        pipe, child_pipe = context.Pipe()
+        server = context.Process(
+            target=serve,
+            args=(
+                import_string(settings.WSGI_APPLICATION),
+                child_pipe,
+                options['lock_wait_ms'] / 1000,
+            ),
+        )
+        server.start()
+        try:
+            address = pipe.recv()
+            stats, elapsed = run_clients(
+                address, usernames, data, mix,
+                options['duration'], options['seed'],
+            )
+            pipe.send('stop')
+            server_stats = pipe.recv()
+        finally:
+            server.join(timeout=10)
+            if server.is_alive():
+                server.terminate()
+        return report(stats, server_stats, elapsed)
+
+    def seed(self, options):
+        Seeder(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            seed=options['seed'],
+        ).run()
+        authors = User.objects.annotate(
+            post_count=Count('posts')
+        ).order_by('-post_count').values_list('username', flat=True)
+        return {
+            'groups': list(Group.objects.values_list('slug', flat=True)),
+            'posts': list(Post.objects.values_list('pk', flat=True)[:1000]),
+            'authors': list(authors[:200]),
+            'image': sample_image(),
+        }
+
+    def write_report(self, rows):
+        self.stdout.write(
+            f'{"маршрут":<24}{"запросов":>9}{"rps":>8}{"p50":>8}'
+            f'{"p95":>8}{"p99":>8}{"ошибки":>8}{"ожид.":>7}{"с":>7}'
+            f'{"locked":>7}'
+        )
+        for row in rows:
+            self.stdout.write(
+                f'{row["endpoint"]:<24}{row["requests"]:>9}'
+                f'{row["rps"]:>8.1f}{row.get("p50", 0):>8.1f}'
+                f'{row.get("p95", 0):>8.1f}{row.get("p99", 0):>8.1f}'
+                f'{row["errors"]:>8.1%}{row["lock_waits"]:>7}'
+                f'{row["lock_wait_time"]:>7.2f}{row["locked"]:>7}'
+            )
@@ -0,0 +1,98 @@
+import os
+import pstats
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import collapse, frame_label, load_profiles
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводит профили SamplingProfilerMiddleware из PROFILER_ROOT '
+        'всех процессов: по маршрутам печатает самые дорогие функции '
+        'и аллокации, пишет свёрнутые стеки для flamegraph.pl или '
+        'speedscope и общий файл pstats.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--root', default=settings.PROFILER_ROOT)
+        parser.add_argument(
+            '--view', action='append', default=[],
+            help='Префикс имени маршрута, например posts: или '
+                 'posts:index. Можно повторять.',
+        )
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument(
+            '--collapsed',
+            help='Файл для свёрнутых стеков (мкс), - для вывода.',
+        )
+        parser.add_argument(
+            '--min-us', type=float, default=50,
+            help='Не выводить в стеки ветви короче, мкс.',
+        )
+        parser.add_argument('--pstats', help='Файл для общего профиля.')
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options['root']):
+            raise CommandError(f'Нет профилей в {options["root"]}.')
+        merged = load_profiles(options['root'], options['view'])
+        if not merged:
+            raise CommandError('Профилей для этих маршрутов нет.')
+
+        if options['collapsed']:
+            self.write_collapsed(merged, options)
+        if options['pstats']:
+            stats = pstats.Stats()
+            for view_stats, _ in merged.values():
+                stats.add(view_stats)
+            stats.dump_stats(options['pstats'])
+        if options['collapsed'] != '-':
+            for view_name, (stats, meta) in sorted(merged.items()):
+                self.write_summary(view_name, stats, meta, options['top'])
+
+    def write_collapsed(self, merged, options):
+        stacks = Counter()
+        for view_name, (stats, _) in merged.items():
+            stacks.update(
+                collapse(stats, view_name, options['min_us'] / 1e6)
+            )
+        lines = ''.join(
+            f'{stack} {value}\n' for stack, value in sorted(stacks.items())
+        )
+        if options['collapsed'] == '-':
+            self.stdout.write(lines, ending='')
+        else:
+            with open(options['collapsed'], 'w') as output:
+                output.write(lines)
+
+    def write_summary(self, view_name, stats, meta, top):
+        requests = meta['requests']
+        self.stdout.write(
+            f'{view_name}: {requests} запросов, '
+            f'в среднем {meta["seconds"] / requests * 1000:.1f} мс'
+        )
+        self.stdout.write(
+            f'  {"своё мс/запр":>13}{"всего мс/запр":>14}'
+            f'{"вызовов/запр":>13}  функция'
+        )
+        functions = sorted(
+            stats.stats.items(), key=lambda item: item[1][2], reverse=True
+        )
+        for function, (_, calls, own, total, _) in functions[:top]:
+            self.stdout.write(
+                f'  {own / requests * 1000:>13.3f}'
+                f'{total / requests * 1000:>14.3f}'
+                f'{calls / requests:>13.1f}  {frame_label(function)}'
+            )
+        if meta['memory_requests']:
+            memory_requests = meta['memory_requests']
+            self.stdout.write(
+                f'  пик памяти {meta["peak"] / 1024:.0f} КиБ, '
+                f'аллокации КиБ/запр ({memory_requests} запросов):'
+            )
+            for line, size in meta['allocations'].most_common(top):
+                self.stdout.write(
+                    f'  {size / memory_requests / 1024:>13.1f}  {line}'
+                )
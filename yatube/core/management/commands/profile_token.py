@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает подписанное значение заголовка PROFILER_HEADER: '
+        'запрос с ним профилируется в течение PROFILER_TOKEN_MAX_AGE '
+        'секунд после выдачи.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--memory', action='store_true',
+            help='Кроме времени считать аллокации через tracemalloc.',
+        )
+
+    def handle(self, *args, **options):
+        if settings.PROFILER_TOKEN_MAX_AGE <= 0:
+            raise CommandError('PROFILER_TOKEN_MAX_AGE выключает токены.')
+        token = make_token('memory' if options['memory'] else 'cpu')
+        self.stdout.write(f'{settings.PROFILER_HEADER}: {token}')
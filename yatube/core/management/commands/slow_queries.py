@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.slowlog import log_files, read_entries, summarize
+
+
+def top(counter, count=5):
+    return ', '.join(
+        f'{name} ({number})' for name, number in counter.most_common(count)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка лога медленных запросов SLOW_QUERY_LOG с ротированными '
+        'копиями: запросы по суммарному времени, маршруты, места вызова '
+        'и план выполнения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.SLOW_QUERY_LOG)
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument(
+            '--view', action='append', default=[],
+            help='Префикс имени маршрута. Можно повторять.',
+        )
+
+    def handle(self, *args, **options):
+        if not log_files(options['log']):
+            raise CommandError(f'Лог {options["log"]} пуст.')
+        summary = summarize(read_entries(options['log']), options['view'])
+        for row in summary[:options['top']]:
+            self.stdout.write(
+                f'{row["sql_id"]}: {row["count"]} раз, всего '
+                f'{row["total_ms"]:.0f} мс, p50 {row["p50"]:.0f} мс, '
+                f'p95 {row["p95"]:.0f} мс, p99 {row["p99"]:.0f} мс'
+            )
+            self.stdout.write(f'  {row["sql"]}')
+            self.stdout.write(f'  маршруты: {top(row["views"])}')
+            self.stdout.write(f'  вызовы: {top(row["sites"])}')
+            for line in row['plan'] or ('план не снят',):
+                self.stdout.write(f'  | {line}')
+        self.stdout.write(
+            f'Всего разных запросов: {len(summary)}, '
+            f'записей: {sum(row["count"] for row in summary)}'
+        )
@@ -0,0 +1,55 @@
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.startup import boot, suspects
+
+
+class Command(BaseCommand):
+    help = (
+        'Время и память запуска воркера: импорт приложения WSGI и urlconf '
+        'в отдельном интерпретаторе с -X importtime. Показывает самые '
+        'дорогие импорты и пакеты, которым не место при старте.'
+    )
+
+    def add_arguments(self, parser):
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
+            '--production', dest='debug', action='store_false',
+            default=None, help='Запуск с DJANGO_DEBUG=0.',
+        )
+        mode.add_argument(
+            '--debug', dest='debug', action='store_true',
+            help='Запуск с DJANGO_DEBUG=1.',
+        )
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--top', type=int, default=15)
+
+    def handle(self, *args, **options):
+        runs = []
+        for _ in range(max(options['repeat'], 1)):
+            try:
+                runs.append(boot(options['debug']))
+            except RuntimeError as error:
+                raise CommandError(f'Воркер не запустился:\n{error}')
+        times = [run[0] for run in runs]
+        elapsed, rss, modules, imports = min(runs, key=lambda run: run[0])
+        self.stdout.write(
+            f'Запуск: медиана {statistics.median(times):.0f} мс, '
+            f'лучший {min(times):.0f} мс, RSS {rss / 1024:.1f} МБ, '
+            f'модулей {modules}'
+        )
+        self.stdout.write('Импорты по полному времени (с зависимостями):')
+        for item in sorted(imports, key=lambda item: -item.cumulative_us)[
+            :options['top']
+        ]:
+            self.stdout.write(
+                f'  {item.cumulative_us / 1000:8.1f} мс  {item.name}'
+            )
+        self.stdout.write('Импорты по собственному времени:')
+        for item in sorted(imports, key=lambda item: -item.self_us)[
+            :options['top']
+        ]:
+            self.stdout.write(f'  {item.self_us / 1000:8.1f} мс  {item.name}')
+        for name, advice in suspects(imports):
+            self.stdout.write(self.style.WARNING(f'{name}: {advice}'))
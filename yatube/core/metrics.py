@@ -0,0 +1,241 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import caches
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+# Потоки, после которых остались ряды, сливаются в общий итог,
+# когда их набирается больше этого числа.
+MAX_THREAD_SERIES = 64
+
+REGISTRY = []
+local = threading.local()
+
+
+class Metric:
+    """
+    Ряды метрики по значениям меток. Каждый поток пишет в свой
+    словарь, поэтому на горячем пути нет блокировок; блокировка
+    берётся только при появлении нового потока и при выгрузке.
+    Ряды завершившихся потоков сливаются в общий итог, иначе
+    многопоточный сервер с потоком на соединение копил бы их
+    бесконечно. Значения живут в памяти процесса: каждый процесс
+    сервера отдаёт свои.
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._retired = {}
+        self._local = threading.local()
+        REGISTRY.append(self)
+
+    def _series(self):
+        try:
+            return self._local.series
+        except AttributeError:
+            series = self._local.series = {}
+            with self._lock:
+                if len(self._threads) >= MAX_THREAD_SERIES:
+                    self._retire()
+                self._threads.append((threading.current_thread(), series))
+            return series
+
+    def _retire(self):
+        alive = []
+        for thread, series in self._threads:
+            if thread.is_alive():
+                alive.append((thread, series))
+            else:
+                self._merge(self._retired, series)
+        self._threads = alive
+
+    @staticmethod
+    def _merge(target, series):
+        for labels, values in series.copy().items():
+            if labels in target:
+                target[labels] = [
+                    total + value
+                    for total, value in zip(target[labels], values)
+                ]
+            else:
+                target[labels] = list(values)
+
+    def collect(self):
+        """Сумма рядов всех потоков: {значения меток: список счётчиков}."""
+        with self._lock:
+            self._retire()
+            total = {labels: list(values)
+                     for labels, values in self._retired.items()}
+            for _, series in self._threads:
+                self._merge(total, series)
+        return total
+
+    def clear(self):
+        with self._lock:
+            self._threads = []
+            self._retired = {}
+            self._local = threading.local()
+
+    def expose(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        for labels, values in sorted(self.collect().items()):
+            lines += self.samples(dict(zip(self.labelnames, labels)), values)
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        series = self._series()
+        values = series.get(labels)
+        if values is None:
+            series[labels] = [amount]
+        else:
+            values[0] += amount
+
+    def samples(self, labels, values):
+        return [f'{self.name}{format_labels(labels)} {values[0]}']
+
+
+class Histogram(Metric):
+    """Гистограмма: счётчики по корзинам, сумма и число наблюдений."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, *labels):
+        series = self._series()
+        values = series.get(labels)
+        if values is None:
+            values = series[labels] = [0] * (len(self.buckets) + 1)
+        values[bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def samples(self, labels, values):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, values):
+            cumulative += count
+            le = '+Inf' if bound == math.inf else repr(float(bound))
+            lines.append(
+                f'{self.name}_bucket{format_labels({**labels, "le": le})} '
+                f'{cumulative}'
+            )
+        lines.append(f'{self.name}_sum{format_labels(labels)} {values[-1]}')
+        lines.append(f'{self.name}_count{format_labels(labels)} {cumulative}')
+        return lines
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels.items()
+    ) + '}'
+
+
+request_duration = Histogram(
+    'yatube_request_duration_seconds',
+    'Время ответа по маршрутам.',
+    ('view', 'method'), LATENCY_BUCKETS,
+)
+requests_total = Counter(
+    'yatube_requests_total',
+    'Ответы по маршрутам и статусам.',
+    ('view', 'method', 'status'),
+)
+request_queries = Histogram(
+    'yatube_request_queries',
+    'Число SQL-запросов за HTTP-запрос.',
+    ('view',), QUERY_COUNT_BUCKETS,
+)
+request_query_duration = Histogram(
+    'yatube_request_query_duration_seconds',
+    'Суммарное время SQL-запросов за HTTP-запрос.',
+    ('view',), LATENCY_BUCKETS,
+)
+requests_shed = Counter(
+    'yatube_requests_shed_total',
+    'Запросы сверх лимитов нагрузки: отказ 503 или устаревшая страница.',
+    ('class', 'outcome'),
+)
+template_duration = Histogram(
+    'yatube_template_render_duration_seconds',
+    'Время рендера шаблонов верхнего уровня.',
+    ('template',), LATENCY_BUCKETS,
+)
+
+
+def count_query(execute, sql, params, many, context):
+    """
+    execute_wrapper всех соединений: считает запросы и их время
+    для текущего HTTP-запроса, если его измеряет MetricsMiddleware.
+    """
+    if not getattr(local, 'active', False):
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        local.queries += 1
+        local.query_time += time.perf_counter() - started
+
+
+def install_query_counter(sender, connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def cache_lines():
+    """
+    Попадания и промахи кешей, которые их считают (StatsCache),
+    по префиксам ключей: берутся из общих счётчиков всех процессов,
+    так что горячий путь кеша ради метрик ничего не делает.
+    """
+    name = 'yatube_cache_requests_total'
+    lines = [
+        f'# HELP {name} Обращения к кешу по префиксам ключей.',
+        f'# TYPE {name} counter',
+    ]
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        if not hasattr(cache, 'report'):
+            continue
+        for row in cache.report():
+            for result, field in (('hit', 'hits'), ('miss', 'misses')):
+                labels = format_labels({
+                    'alias': alias, 'prefix': row['prefix'], 'result': result,
+                })
+                lines.append(f'{name}{labels} {row.get(field, 0)}')
+    return lines
+
+
+def render():
+    """Все метрики в текстовом формате Prometheus."""
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.expose()
+    lines += cache_lines()
+    return '\n'.join(lines) + '\n'
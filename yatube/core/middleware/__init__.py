@@ -0,0 +1,15 @@
+from django.urls import Resolver404, resolve
+
+
+def view_name(request):
+    """
+    Имя маршрута запроса. Ответ из кеша страниц отдаётся до разбора
+    адреса, тогда маршрут определяется по пути.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return 'unresolved'
+    return match.view_name
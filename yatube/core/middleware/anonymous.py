@@ -0,0 +1,114 @@
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import import_string
+
+from ..cache.decorators import (
+    anonymous_refresher,
+    canonical_path,
+    is_cacheable,
+)
+from ..cache.tiered import tiered_cache
+
+PERSONAL_COOKIES = ('messages',)
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Кеш целых страниц для анонимных GET-запросов к маршрутам
+    из ANONYMOUS_CACHE_ROUTES. Стоит перед сессиями и аутентификацией:
+    при попадании ответ отдаётся без сессии и запросов к базе.
+    Запрос с cookie сессии или сообщений идёт мимо кеша.
+
+    ANONYMOUS_CACHE_ROUTES: 'пространство:имя' -> путь к функции,
+    которая по аргументам маршрута возвращает теги страницы
+    для инвалидации по событиям, или None. Ключ строится по пути
+    и параметрам из CACHE_QUERY_PARAMS; запрос помечается page_cached,
+    чтобы cache_page представления не хранил вторую копию.
+
+    ANONYMOUS_CACHE_HITS: 'пространство:имя' -> путь к функции,
+    которая по аргументам маршрута учитывает обращение к объекту
+    страницы, отданной из кеша: представление при этом не вызывается,
+    и его чтения кеша объектов не попадают в статистику прогрева.
+    """
+
+    def __init__(self, get_response):
+        if not settings.ANONYMOUS_CACHE_ROUTES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.routes = {
+            route: import_string(tags) if tags else None
+            for route, tags in settings.ANONYMOUS_CACHE_ROUTES.items()
+        }
+        self.hits = {
+            route: import_string(record)
+            for route, record in settings.ANONYMOUS_CACHE_HITS.items()
+        }
+
+    def __call__(self, request):
+        route = self.match(request)
+        if route is None:
+            return self.get_response(request)
+        name, tags, record, kwargs = route
+        response = tiered_cache.get_or_set(
+            page_key(name, request),
+            lambda: self.respond(request),
+            settings.CACHE_TIME,
+            is_cacheable,
+            tags=tags(**kwargs) if tags else (),
+            stale_while_revalidate=True,
+            refresher=anonymous_refresher(request, self.respond),
+        )
+        if record is not None and not getattr(request, 'page_cached', False):
+            record(**kwargs)
+        return response
+
+    def respond(self, request):
+        request.page_cached = True
+        return self.get_response(request)
+
+    def match(self, request):
+        match = resolve_cacheable(request)
+        if match is None or match.view_name not in self.routes:
+            return None
+        return (
+            match.view_name.replace(':', '.'),
+            self.routes[match.view_name],
+            self.hits.get(match.view_name),
+            match.kwargs,
+        )
+
+
+def resolve_cacheable(request):
+    """Маршрут анонимного GET-запроса или None, если запрос мимо кеша."""
+    if request.method != 'GET' or any(
+        cookie in request.COOKIES
+        for cookie in (settings.SESSION_COOKIE_NAME, *PERSONAL_COOKIES)
+    ):
+        return None
+    try:
+        return resolve(request.path_info)
+    except Resolver404:
+        return None
+
+
+def page_key(name, request):
+    path = hashlib.md5(canonical_path(request).encode()).hexdigest()
+    return f'anon:{name}:{path}'
+
+
+def cached_page(request):
+    """
+    Страница анонима из кеша как есть: устаревшая или помеченная
+    устаревшей тегами, пока не истёк жёсткий срок. Без пересчёта.
+    """
+    match = resolve_cacheable(request)
+    routes = settings.ANONYMOUS_CACHE_ROUTES
+    if match is None or match.view_name not in routes:
+        return None
+    entry = tiered_cache.get_entry(
+        page_key(match.view_name.replace(':', '.'), request)
+    )
+    return None if entry is None else entry.value
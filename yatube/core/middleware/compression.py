@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+
+class HtmlGZipMiddleware(GZipMiddleware):
+    """Сжимает на лету только HTML-ответы крупнее HTML_COMPRESS_MIN_SIZE."""
+
+    def process_response(self, request, response):
+        if not response.get('Content-Type', '').startswith('text/html'):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.HTML_COMPRESS_MIN_SIZE
+        ):
+            return response
+        return super().process_response(request, response)
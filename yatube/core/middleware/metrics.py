@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import view_name
+from .. import metrics
+
+# Прочие методы считаются под меткой other: число рядов ограничено.
+METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS')
+
+
+class MetricsMiddleware:
+    """
+    Время ответа, статус, число и время SQL-запросов по маршрутам
+    для /metrics. Стоит сразу после TracingMiddleware, раньше кеша
+    страниц, чтобы учитывать и ответы из кеша.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = metrics.local
+        state.active, state.queries, state.query_time = True, 0, 0.0
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            state.active = False
+        elapsed = time.perf_counter() - started
+        name = view_name(request)
+        method = request.method if request.method in METHODS else 'other'
+        metrics.request_duration.observe(elapsed, name, method)
+        metrics.requests_total.inc(name, method, str(response.status_code))
+        metrics.request_queries.observe(state.queries, name)
+        metrics.request_query_duration.observe(state.query_time, name)
+        return response
@@ -0,0 +1,68 @@
+import cProfile
+import random
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import view_name
+from ..profiling import (
+    MemoryTrace,
+    profiled_request,
+    profiles,
+    read_token,
+)
+
+
+class SamplingProfilerMiddleware:
+    """
+    Профилирует cProfile долю PROFILER_SAMPLE_RATE запросов и запросы
+    с подписанным заголовком PROFILER_HEADER (make_token, команда
+    profile_token). С PROFILER_TRACEMALLOC или токеном режима memory
+    заодно считает аллокации. Профили складываются по маршрутам
+    в ProfileStore; остальные запросы платят один вызов random().
+    """
+
+    def __init__(self, get_response):
+        if (
+            settings.PROFILER_SAMPLE_RATE <= 0
+            and settings.PROFILER_TOKEN_MAX_AGE <= 0
+        ):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = 'HTTP_' + settings.PROFILER_HEADER.upper().replace(
+            '-', '_'
+        )
+
+    def __call__(self, request):
+        mode = self.mode(request)
+        if mode is None:
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        memory = MemoryTrace() if mode == 'memory' else nullcontext()
+        started = time.perf_counter()
+        with memory:
+            try:
+                profiler.enable()
+            except ValueError:
+                # Другой профилировщик уже работает в этом потоке.
+                return self.get_response(request)
+            try:
+                response = profiled_request(self.get_response, request)
+            finally:
+                profiler.disable()
+        profiles.add(
+            view_name(request), profiler,
+            time.perf_counter() - started,
+            memory if mode == 'memory' else None,
+        )
+        return response
+
+    def mode(self, request):
+        token = request.META.get(self.header)
+        if token and settings.PROFILER_TOKEN_MAX_AGE > 0:
+            return read_token(token)
+        if random.random() < settings.PROFILER_SAMPLE_RATE:
+            return 'memory' if settings.PROFILER_TRACEMALLOC else 'cpu'
+        return None
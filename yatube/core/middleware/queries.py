@@ -0,0 +1,47 @@
+import logging
+import random
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from ..queries import QueryInspector
+
+logger = logging.getLogger(__name__)
+
+
+class RepeatedQueriesError(AssertionError):
+    pass
+
+
+class QueryInspectorMiddleware:
+    """
+    Для доли QUERY_INSPECTOR_SAMPLE_RATE запросов записывает все
+    SQL-запросы и сообщает о группах из QUERY_INSPECTOR_THRESHOLD
+    и более одинаковых запросов из одного места. С
+    QUERY_INSPECTOR_STRICT вместо предупреждения в лог бросает
+    RepeatedQueriesError - так N+1 роняет тесты.
+    """
+
+    def __init__(self, get_response):
+        if settings.QUERY_INSPECTOR_SAMPLE_RATE <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_INSPECTOR_SAMPLE_RATE:
+            return self.get_response(request)
+        with QueryInspector() as inspector:
+            response = self.get_response(request)
+        repeated = inspector.repeated()
+        if repeated and settings.QUERY_INSPECTOR_STRICT:
+            raise RepeatedQueriesError(
+                f'Повторяющиеся запросы на {request.path}:\n'
+                + inspector.report()
+            )
+        for group in repeated:
+            logger.warning(
+                'N+1 на %s: %d одинаковых запросов из %s%s: %s',
+                request.path, group.count, group.site,
+                ' (шаблон)' if group.template else '', group.sql,
+            )
+        return response
@@ -0,0 +1,61 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+
+from . import view_name
+from .. import metrics
+from ..shedding import Limiter, request_class
+from .anonymous import cached_page
+
+
+class LoadSheddingMiddleware:
+    """
+    Сброс нагрузки: в процессе одновременно работает не больше
+    SHEDDING_MAX_IN_FLIGHT запросов и не больше SHEDDING_LIMITS
+    по классам: маршрутам из SHEDDING_VIEW_CLASSES класс задан явно,
+    остальным по методу (read, write, upload). Запрос сверх лимита ждёт
+    места SHEDDING_QUEUE_TIMEOUT_MS, потом получает быстрый 503
+    с Retry-After. Анонимному чтению вместо отказа отдаётся страница
+    из кеша анонимов, даже устаревшая. Маршруты SHEDDING_EXEMPT_VIEWS
+    (пробы балансировщика, метрики) проходят мимо лимитов и не ждут
+    в очереди.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SHEDDING_MAX_IN_FLIGHT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.limiter = Limiter(
+            settings.SHEDDING_MAX_IN_FLIGHT, settings.SHEDDING_LIMITS
+        )
+
+    def __call__(self, request):
+        name = view_name(request)
+        if name in settings.SHEDDING_EXEMPT_VIEWS:
+            return self.get_response(request)
+        kind = request_class(request, name)
+        if not self.limiter.acquire(
+            kind, settings.SHEDDING_QUEUE_TIMEOUT_MS / 1000
+        ):
+            return self.shed(request, kind)
+        try:
+            return self.get_response(request)
+        finally:
+            self.limiter.release(kind)
+
+    def shed(self, request, kind):
+        if kind == 'read':
+            response = cached_page(request)
+            if response is not None:
+                metrics.requests_shed.inc(kind, 'stale')
+                return response
+        metrics.requests_shed.inc(kind, 'rejected')
+        response = HttpResponse(
+            'Сервер перегружен, повторите запрос позже.',
+            content_type='text/plain; charset=utf-8',
+            status=HTTPStatus.SERVICE_UNAVAILABLE,
+        )
+        response['Retry-After'] = str(settings.SHEDDING_RETRY_AFTER)
+        return response
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import view_name
+from ..slowlog import slow_query_log
+
+
+class SlowQueryLogMiddleware:
+    """
+    На время запроса ставит SlowQueryLog на все соединения: запросы
+    дольше SLOW_QUERY_THRESHOLD_MS попадают в лог SLOW_QUERY_LOG
+    с маршрутом запроса. Сводку печатает команда slow_queries.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_THRESHOLD_MS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with slow_query_log(
+            settings.SLOW_QUERY_THRESHOLD_MS / 1000,
+            lambda: view_name(request),
+        ):
+            return self.get_response(request)
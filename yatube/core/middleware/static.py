@@ -0,0 +1,117 @@
+import json
+import mimetypes
+import os
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class StaticFile:
+    def __init__(self, path, immutable):
+        self.path = path
+        self.immutable = immutable
+        self.content_type, _ = mimetypes.guess_type(path)
+        self.variants = {
+            encoding: path + suffix
+            for encoding, suffix in ENCODINGS
+            if os.path.isfile(path + suffix)
+        }
+        stat = os.stat(path)
+        self.mtime = stat.st_mtime
+        self.size = stat.st_size
+
+
+class StaticFilesMiddleware:
+    """
+    Отдаёт собранную collectstatic статику из STATIC_ROOT.
+    Выбирает предсжатый вариант по Accept-Encoding, файлам с хешем
+    в имени выставляет долгий неизменяемый кеш.
+    """
+
+    def __init__(self, get_response):
+        root = settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.files = self.scan(root)
+
+    def __call__(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.path_info.startswith(self.prefix)
+        ):
+            static_file = self.files.get(
+                request.path_info[len(self.prefix):]
+            )
+            if static_file is not None:
+                return self.serve(request, static_file)
+        return self.get_response(request)
+
+    @staticmethod
+    def scan(root):
+        hashed_names = set()
+        manifest_path = os.path.join(root, 'staticfiles.json')
+        if os.path.isfile(manifest_path):
+            with open(manifest_path) as manifest:
+                hashed_names.update(json.load(manifest)['paths'].values())
+
+        files = {}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                files[name] = StaticFile(path, name in hashed_names)
+        return files
+
+    @staticmethod
+    def accepted_encodings(request):
+        accepted = set()
+        for value in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+            encoding, _, params = value.strip().partition(';')
+            if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00'):
+                accepted.add(encoding.strip().lower())
+        return accepted
+
+    def serve(self, request, static_file):
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            static_file.mtime,
+            static_file.size,
+        ):
+            return HttpResponseNotModified()
+
+        path, content_encoding = static_file.path, None
+        accepted = self.accepted_encodings(request)
+        for encoding, _ in ENCODINGS:
+            if encoding in accepted and encoding in static_file.variants:
+                path = static_file.variants[encoding]
+                content_encoding = encoding
+                break
+
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type=(
+                static_file.content_type or 'application/octet-stream'
+            ),
+        )
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+        if static_file.variants:
+            response['Vary'] = 'Accept-Encoding'
+        response['Last-Modified'] = http_date(static_file.mtime)
+        if static_file.immutable:
+            response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}'
+            )
+        return response
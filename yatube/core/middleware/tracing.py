@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import view_name
+from .. import tracing
+
+
+class TracingMiddleware:
+    """
+    Трейс запросов к маршрутам с префиксами из TRACE_VIEWS: корневой
+    спан на весь запрос, спаны SQL, кеша, шаблонов и миниатюр внутри.
+    Стоит первым, чтобы время остальных middleware попало в трейс;
+    время самого представления выделяет TracedViewMiddleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TRACE_VIEWS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.views = tuple(settings.TRACE_VIEWS)
+
+    def __call__(self, request):
+        name = view_name(request)
+        if not name.startswith(self.views):
+            return self.get_response(request)
+        trace, stack = tracing.start(name, request.method, request.path)
+        try:
+            return self.get_response(request)
+        finally:
+            tracing.finish(trace, stack)
+
+
+class TracedViewMiddleware:
+    """
+    Последний в MIDDLEWARE: его спан покрывает представление
+    с рендером шаблона, всё снаружи - работа middleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TRACE_VIEWS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with tracing.span('view', 'view'):
+            return self.get_response(request)
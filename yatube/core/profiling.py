@@ -0,0 +1,257 @@
+import atexit
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core import signing
+
+TOKEN_SALT = 'core.profiling'
+MODES = ('cpu', 'memory')
+MEMORY_TOP_LINES = 20
+
+
+def make_token(mode='cpu'):
+    """Значение заголовка PROFILER_HEADER, включающее профилирование."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(mode)
+
+
+def read_token(value):
+    """Режим из подписанного заголовка или None, если подпись неверна."""
+    try:
+        mode = signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            value, max_age=settings.PROFILER_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+    return mode if mode in MODES else None
+
+
+def file_stem(view_name):
+    return view_name.replace(':', '.').replace(os.sep, '_')
+
+
+class MemoryTrace:
+    """
+    Аллокации за время запроса по строкам кода. tracemalloc
+    глобален: пока он включён, в разницу снимков попадают и
+    аллокации параллельных запросов, поэтому цифры приблизительные.
+    """
+
+    _lock = threading.Lock()
+    _users = 0
+
+    def __enter__(self):
+        with self._lock:
+            if not MemoryTrace._users:
+                tracemalloc.start(settings.PROFILER_TRACEMALLOC_FRAMES)
+            MemoryTrace._users += 1
+        tracemalloc.reset_peak()
+        self.start = tracemalloc.take_snapshot()
+        self.start_size = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc_info):
+        end = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            MemoryTrace._users -= 1
+            if not MemoryTrace._users:
+                tracemalloc.stop()
+        ignored = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        self.peak = peak - self.start_size
+        self.lines = Counter({
+            f'{short_path(stat.traceback[0].filename)}:'
+            f'{stat.traceback[0].lineno}': stat.size_diff
+            for stat in end.filter_traces(ignored).compare_to(
+                self.start.filter_traces(ignored), 'lineno'
+            )[:MEMORY_TOP_LINES]
+            if stat.size_diff > 0
+        })
+
+
+class ProfileStore:
+    """
+    Профили cProfile, сложенные по маршрутам в пределах процесса.
+    Раз в PROFILER_FLUSH_INTERVAL секунд и при выходе пишутся
+    в PROFILER_ROOT: <маршрут>.<pid>.prof (формат pstats) и рядом
+    .json с числом запросов и аллокациями. Файл каждого процесса
+    перезаписывается целиком, так что собирать их можно в любой
+    момент командой merge_profiles.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._meta = defaultdict(lambda: {
+            'requests': 0, 'seconds': 0.0, 'memory_requests': 0,
+            'peak': 0, 'allocations': Counter(),
+        })
+        self._dirty = set()
+        self._flushed = time.monotonic()
+        atexit.register(self.flush)
+
+    def add(self, view_name, profiler, seconds, memory=None):
+        with self._lock:
+            if view_name in self._stats:
+                self._stats[view_name].add(profiler)
+            else:
+                self._stats[view_name] = pstats.Stats(profiler)
+            meta = self._meta[view_name]
+            meta['requests'] += 1
+            meta['seconds'] += seconds
+            if memory is not None:
+                meta['memory_requests'] += 1
+                meta['peak'] = max(meta['peak'], memory.peak)
+                meta['allocations'].update(memory.lines)
+            self._dirty.add(view_name)
+        if (
+            time.monotonic() - self._flushed
+            >= settings.PROFILER_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._flushed = time.monotonic()
+            dirty, self._dirty = self._dirty, set()
+            if not dirty:
+                return
+            os.makedirs(settings.PROFILER_ROOT, exist_ok=True)
+            for view_name in dirty:
+                path = os.path.join(
+                    settings.PROFILER_ROOT,
+                    f'{file_stem(view_name)}.{os.getpid()}',
+                )
+                self._stats[view_name].dump_stats(f'{path}.prof.tmp')
+                os.replace(f'{path}.prof.tmp', f'{path}.prof')
+                with open(f'{path}.json.tmp', 'w') as meta:
+                    json.dump(
+                        {'view': view_name, **self._meta[view_name]}, meta
+                    )
+                os.replace(f'{path}.json.tmp', f'{path}.json')
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+            self._meta.clear()
+            self._dirty.clear()
+
+
+profiles = ProfileStore()
+
+
+def load_profiles(root, views=()):
+    """
+    Складывает файлы всех процессов по маршрутам. views - префиксы
+    имён маршрутов; пустой - все. Возвращает {маршрут: (Stats, meta)}.
+    """
+    merged = {}
+    for name in sorted(os.listdir(root)):
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(root, name[:-len('.json')])
+        with open(f'{path}.json') as meta_file:
+            meta = json.load(meta_file)
+        view_name = meta.pop('view')
+        if views and not view_name.startswith(tuple(views)):
+            continue
+        try:
+            stats = pstats.Stats(f'{path}.prof')
+        except (OSError, EOFError, ValueError):
+            continue
+        if view_name not in merged:
+            meta['allocations'] = Counter(meta['allocations'])
+            merged[view_name] = (stats, meta)
+            continue
+        total_stats, total = merged[view_name]
+        total_stats.add(stats)
+        for field in ('requests', 'seconds', 'memory_requests'):
+            total[field] += meta[field]
+        total['peak'] = max(total['peak'], meta['peak'])
+        total['allocations'].update(meta['allocations'])
+    return merged
+
+
+def short_path(filename):
+    """Путь относительно проекта или каталога из sys.path."""
+    for directory in sorted(
+        {settings.BASE_DIR, *filter(None, sys.path)}, key=len, reverse=True
+    ):
+        if filename.startswith(directory + os.sep):
+            return os.path.relpath(filename, directory)
+    return filename
+
+
+def frame_label(function):
+    filename, lineno, name = function
+    if filename == '~':
+        label = name
+    else:
+        label = f'{name} ({short_path(filename)}:{lineno})'
+    return label.replace(';', ',')
+
+
+def profiled_request(get_response, request):
+    """Корень каждого профиля: точка отсчёта для свёрнутых стеков."""
+    return get_response(request)
+
+
+def collapse(stats, root, min_seconds=0.0, max_depth=64):
+    """
+    Свёрнутые стеки для flamegraph.pl/speedscope: {"a;b;c": мкс}.
+    cProfile хранит только рёбра вызывающий-вызываемый, поэтому
+    время вызываемой функции делится между вызывающими пропорционально
+    времени на каждом ребре. Обёртки вроде inner из django.core.handlers
+    вызывают сами себя через цепочку middleware, и сумма рёбер может
+    превышать время узла: тогда дочерние доли урезаются до него, чтобы
+    общее время сходилось с измеренным. Стеки получаются приблизительными;
+    ветви короче min_seconds целиком относятся к вызывающей функции.
+    """
+    children = defaultdict(list)
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, edge_time) in callers.items():
+            children[caller].append((function, edge_time))
+    roots = [
+        function for function in stats.stats
+        if function[2] == profiled_request.__name__
+        and function[0] == __file__
+    ] or [
+        function for function, (_, _, _, _, callers) in stats.stats.items()
+        if not callers
+    ]
+
+    stacks = Counter()
+
+    def visit(function, stack, share):
+        _, _, own_time, total_time, _ = stats.stats[function]
+        stack = stack + [frame_label(function)]
+        called = sum(edge_time for _, edge_time in children[function])
+        scale = min(1.0, (total_time - own_time) / called) if called else 0
+        if len(stack) > max_depth:
+            scale = 0
+        rest = total_time * share
+        for child, edge_time in children[function]:
+            child_total = stats.stats[child][3]
+            edge_time *= scale * share
+            if child_total <= 0 or edge_time < min_seconds:
+                continue
+            edge_time = min(edge_time, child_total)
+            visit(child, stack, edge_time / child_total)
+            rest -= edge_time
+        stacks[';'.join(stack)] += max(rest, 0) * 1e6
+
+    for function in roots:
+        visit(function, [root], 1.0)
+    return Counter({
+        stack: round(value) for stack, value in stacks.items()
+        if round(value) > 0
+    })
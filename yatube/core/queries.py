@@ -0,0 +1,110 @@
+import os
+import re
+import sys
+from collections import Counter, namedtuple
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+
+Query = namedtuple('Query', 'sql site template')
+QueryGroup = namedtuple('QueryGroup', 'sql site template count')
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+\b')
+SPACES = re.compile(r'\s+')
+
+RENDER_ANNOTATED = Node.render_annotated.__code__
+SITE_PACKAGES = os.sep + 'site-packages' + os.sep
+# Обёртки выполнения запросов - не место вызова.
+WRAPPER_FILES = tuple(
+    os.path.join(os.path.dirname(__file__), name)
+    for name in (
+        'queries.py', 'metrics.py', 'routers.py', 'slowlog.py', 'tracing.py',
+    )
+)
+
+
+def normalize(sql):
+    """SQL без значений: запросы, различающиеся только ими, совпадают."""
+    sql = IN_LIST.sub('IN (...)', sql)
+    sql = STRING.sub('?', sql)
+    sql = NUMBER.sub('?', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def is_project_file(filename):
+    return (
+        filename.startswith(settings.BASE_DIR)
+        and SITE_PACKAGES not in filename
+        and filename not in WRAPPER_FILES
+    )
+
+
+def call_site():
+    """
+    Откуда выполнен запрос: строка шаблона, если запрос вызван
+    обращением к атрибуту при рендере, иначе ближайшая строка кода
+    проекта. Возвращает (место, из шаблона ли).
+    """
+    frame = sys._getframe(1)
+    site = None
+    while frame is not None:
+        if frame.f_code is RENDER_ANNOTATED:
+            node = frame.f_locals['self']
+            origin = node.origin.template_name or node.origin.name
+            return f'{origin}:{node.token.lineno}', True
+        filename = frame.f_code.co_filename
+        if site is None and is_project_file(filename):
+            path = os.path.relpath(filename, settings.BASE_DIR)
+            site = f'{path}:{frame.f_lineno}'
+        frame = frame.f_back
+    return site or '?', False
+
+
+class QueryInspector:
+    """
+    Собирает запросы ко всем базам, выполненные в текущем потоке
+    внутри блока with, и группирует их по нормализованному SQL
+    и месту вызова. Много одинаковых запросов из одного места -
+    признак N+1.
+    """
+
+    def __init__(self, aliases=None):
+        self.aliases = aliases or list(connections)
+        self.queries = []
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in self.aliases:
+            self._stack.enter_context(
+                connections[alias].execute_wrapper(self)
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(Query(normalize(sql), *call_site()))
+        return execute(sql, params, many, context)
+
+    def groups(self):
+        return [
+            QueryGroup(*query, count)
+            for query, count in Counter(self.queries).most_common()
+        ]
+
+    def repeated(self, threshold=None):
+        threshold = threshold or settings.QUERY_INSPECTOR_THRESHOLD
+        return [group for group in self.groups() if group.count >= threshold]
+
+    def report(self):
+        return '\n'.join(
+            f'{group.count:>4} x {group.site}'
+            f'{" (шаблон)" if group.template else ""}: {group.sql}'
+            for group in self.groups()
+        )
@@ -0,0 +1,29 @@
+from functools import lru_cache
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import get_script_prefix, reverse
+
+REVERSE_CACHE_SIZE = 16384
+
+
+@lru_cache(maxsize=REVERSE_CACHE_SIZE)
+def _reverse(prefix, viewname, args):
+    return reverse(viewname, args=args)
+
+
+def cached_reverse(viewname, *args):
+    """
+    reverse() с запоминанием результата для адресов, которые строятся
+    в каждой карточке ленты: повторный вызов - поиск в словаре.
+    """
+    return _reverse(get_script_prefix(), viewname, args)
+
+
+cached_reverse.cache_info = _reverse.cache_info
+
+
+@receiver(setting_changed)
+def clear_reverse_cache(setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        _reverse.cache_clear()
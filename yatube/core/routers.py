@@ -0,0 +1,80 @@
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def reset_pin(pinned=False):
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def has_written():
+    return getattr(_state, 'wrote', False)
+
+
+def track_writes(execute, sql, params, many, context):
+    """
+    execute_wrapper всех соединений: любая запись в основную базу
+    или шард, через какой бы роутер, save() или QuerySet.update()
+    она ни прошла, закрепляет чтение потока за основной базой.
+    """
+    if (
+        sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS)
+        and context['connection'].alias not in settings.DATABASE_REPLICAS
+    ):
+        _state.pinned = True
+        _state.wrote = True
+    return execute(sql, params, many, context)
+
+
+def install_write_tracker(sender, connection, **kwargs):
+    if track_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_writes)
+
+
+class ReplicaRouter:
+    """
+    Отправляет чтение на реплики из DATABASE_REPLICAS, запись -
+    в основную базу. После записи чтение в рамках запроса
+    закрепляется за основной базой: записи отмечает track_writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or is_pinned():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if (
+            instance is not None
+            and instance._state.db
+            and instance._state.db not in settings.DATABASE_REPLICAS
+        ):
+            return instance._state.db
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
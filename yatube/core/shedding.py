@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+def request_class(request, view=None):
+    """
+    Класс запроса для лимитов. Маршрут view из SHEDDING_VIEW_CLASSES
+    получает свой класс, остальные делятся по методу на чтение,
+    запись и загрузку файла. Загрузку видно по типу тела, не разбирая
+    его.
+    """
+    kind = settings.SHEDDING_VIEW_CLASSES.get(view)
+    if kind is not None:
+        return kind
+    if request.method in SAFE_METHODS:
+        return 'read'
+    if request.META.get('CONTENT_TYPE', '').startswith('multipart/'):
+        return 'upload'
+    return 'write'
+
+
+class Limiter:
+    """
+    Счётчик запросов в работе на процесс: общий лимит total и лимиты
+    по классам. Запрос ждёт свободного места не дольше timeout секунд,
+    чтобы пережить короткий всплеск, а дальше получает отказ: очередь
+    за блокировками SQLite не растёт, и время ответа принятых запросов
+    остаётся ограниченным. Классу без своего лимита достаётся общий.
+    """
+
+    def __init__(self, total, limits):
+        self.total = total
+        self.limits = limits
+        self.in_flight = Counter()
+        self._condition = threading.Condition()
+
+    def has_room(self, kind):
+        return (
+            sum(self.in_flight.values()) < self.total
+            and self.in_flight[kind] < self.limits.get(kind, self.total)
+        )
+
+    def acquire(self, kind, timeout=0):
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while not self.has_room(kind):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self.in_flight[kind] += 1
+            return True
+
+    def release(self, kind):
+        with self._condition:
+            self.in_flight[kind] -= 1
+            self._condition.notify_all()
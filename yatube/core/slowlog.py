@@ -0,0 +1,170 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.db import connections
+
+from .benchmarks import percentiles
+from .queries import call_site, normalize
+
+logger = logging.getLogger(__name__)
+
+EXPLAINED_STATEMENTS = ('SELECT', 'WITH')
+# Запоминать планы не больше чем для стольких разных запросов.
+MAX_EXPLAINED = 10000
+PLAIN_TYPES = (bool, int, float, type(None))
+
+
+def sql_id(sql):
+    return hashlib.md5(sql.encode()).hexdigest()[:12]
+
+
+def redact(params):
+    """
+    Параметры без содержимого строк: числа остаются, строки и байты
+    заменяются типом и длиной - в лог не попадают пароли и тексты.
+    """
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {name: redact_value(value) for name, value in params.items()}
+    return [redact_value(value) for value in params]
+
+
+def redact_value(value):
+    if isinstance(value, PLAIN_TYPES):
+        return value
+    if isinstance(value, (str, bytes, memoryview)):
+        return f'<{type(value).__name__}:{len(value)}>'
+    return f'<{type(value).__name__}>'
+
+
+class SlowQueryLog:
+    """
+    execute_wrapper: запросы дольше threshold секунд пишутся в лог
+    core.slowlog одной строкой JSON с маршрутом, нормализованным SQL,
+    скрытыми параметрами, временем и местом вызова. План запроса
+    (EXPLAIN QUERY PLAN на SQLite) снимается один раз на процесс
+    для каждого нормализованного SELECT; следующие записи ссылаются
+    на него через sql_id.
+    """
+
+    _explained = set()
+    _lock = threading.Lock()
+
+    def __init__(self, threshold, view):
+        self.threshold = threshold
+        self.view = view
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= self.threshold:
+                self.log(sql, params, many, context['connection'], duration)
+
+    def log(self, sql, params, many, connection, duration):
+        normalized = normalize(sql)
+        site, template = call_site()
+        entry = {
+            'time': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'view': self.view(),
+            'alias': connection.alias,
+            'sql_id': sql_id(normalized),
+            'sql': normalized,
+            'params': None if many else redact(params),
+            'duration_ms': round(duration * 1000, 3),
+            'site': site,
+            'template': template,
+        }
+        if not many:
+            plan = self.explain(entry['sql_id'], sql, params, connection)
+            if plan is not None:
+                entry['plan'] = plan
+        logger.warning(json.dumps(entry, ensure_ascii=False))
+
+    def explain(self, key, sql, params, connection):
+        if not sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+            return None
+        with self._lock:
+            if key in self._explained or len(self._explained) >= MAX_EXPLAINED:
+                return None
+            self._explained.add(key)
+        prefix = connection.ops.explain_query_prefix()
+        # create_cursor() обходит execute_wrappers: EXPLAIN не попадёт
+        # ни в этот лог, ни в другие обёртки.
+        cursor = connection.create_cursor()
+        try:
+            cursor.execute(f'{prefix} {sql}', params)
+            return [str(row[-1]) for row in cursor.fetchall()]
+        except Exception as error:
+            return [f'EXPLAIN не удался: {error}']
+        finally:
+            cursor.close()
+
+
+def log_files(path):
+    """Файл лога и его копии после ротации, от старых к новым."""
+    backups = []
+    while os.path.exists(f'{path}.{len(backups) + 1}'):
+        backups.append(f'{path}.{len(backups) + 1}')
+    return backups[::-1] + ([path] if os.path.exists(path) else [])
+
+
+def read_entries(path):
+    for filename in log_files(path):
+        with open(filename, encoding='utf-8') as log:
+            for line in log:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(entries, views=()):
+    """
+    Сводка по нормализованным запросам, самые затратные первыми:
+    число, суммарное время, p50/p95/p99, маршруты, места вызова, план.
+    """
+    groups = defaultdict(lambda: {
+        'durations': [], 'views': Counter(), 'sites': Counter(),
+        'plan': None,
+    })
+    for entry in entries:
+        if views and not entry['view'].startswith(tuple(views)):
+            continue
+        group = groups[entry['sql_id']]
+        group['sql'] = entry['sql']
+        group['durations'].append(entry['duration_ms'])
+        group['views'][entry['view']] += 1
+        group['sites'][entry['site']] += 1
+        if entry.get('plan'):
+            group['plan'] = entry['plan']
+    summary = []
+    for key, group in groups.items():
+        durations = group.pop('durations')
+        summary.append({
+            'sql_id': key,
+            'count': len(durations),
+            'total_ms': round(sum(durations), 3),
+            **percentiles(durations),
+            **group,
+        })
+    return sorted(summary, key=lambda row: -row['total_ms'])
+
+
+def slow_query_log(threshold, view):
+    """Обёртка SlowQueryLog для всех соединений на время блока with."""
+    stack = ExitStack()
+    wrapper = SlowQueryLog(threshold, view)
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(wrapper))
+    return stack
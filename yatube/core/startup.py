@@ -0,0 +1,101 @@
+import os
+import subprocess
+import sys
+from collections import namedtuple
+
+from django.conf import settings
+
+Import = namedtuple('Import', 'name self_us cumulative_us')
+
+# Запуск воркера: приложение WSGI и разбор urlconf, как при первом
+# запросе. Печатает время в миллисекундах и RSS в килобайтах.
+BOOT_SCRIPT = '''
+import os, sys, time
+started = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings_module!r})
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+elapsed = (time.perf_counter() - started) * 1000
+rss = 0
+try:
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1])
+except OSError:
+    pass
+print(f'boot {{elapsed:.1f}} {{rss}} {{len(sys.modules)}}', file=sys.stderr)
+'''
+
+# Модули, которым незачем грузиться при старте продакшен-воркера.
+SUSPECTS = {
+    'setuptools': (
+        'Django 2.2 тянет distutils, а setuptools подменяет его своей '
+        'копией: запускайте с SETUPTOOLS_USE_DISTUTILS=stdlib.'
+    ),
+    'pkg_resources': (
+        'сканирует все установленные дистрибутивы при импорте; '
+        'sorl-thumbnail 12.7 берёт через него номер своей версии.'
+    ),
+    'debug_toolbar': (
+        'отладочная панель: DJANGO_DEBUG=1 только при разработке.'
+    ),
+    'django.contrib.admin.sites': (
+        'админка нужна только воркерам с /admin/: остальные запускайте '
+        'с DJANGO_ADMIN=0.'
+    ),
+    'django.test': 'тестовый клиент импортируется при старте.',
+    'PIL': 'Pillow нужна только при обработке картинок.',
+}
+
+
+def parse_importtime(lines):
+    """Строки python -X importtime: «import time: self | cumulative | name»."""
+    imports = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        imports.append(Import(
+            fields[2].strip(), int(fields[0]), int(fields[1]),
+        ))
+    return imports
+
+
+def boot(debug=None):
+    """
+    Запускает воркер в отдельном интерпретаторе с -X importtime.
+    Возвращает (время запуска в мс, RSS в КБ, число модулей, импорты).
+    """
+    env = dict(os.environ)
+    if debug is not None:
+        env['DJANGO_DEBUG'] = '1' if debug else '0'
+    script = BOOT_SCRIPT.format(
+        settings_module=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'yatube.settings'
+        ),
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    lines = result.stderr.splitlines()
+    summary = [line for line in lines if line.startswith('boot ')]
+    if result.returncode or not summary:
+        raise RuntimeError(result.stderr.strip()[-2000:])
+    elapsed, rss, modules = summary[-1].split()[1:]
+    return float(elapsed), int(rss), int(modules), parse_importtime(lines)
+
+
+def suspects(imports):
+    """Подсказки по тяжёлым пакетам, попавшим в запуск."""
+    loaded = {item.name.split('.')[0] for item in imports}
+    loaded |= {item.name for item in imports}
+    return [
+        (name, advice) for name, advice in SUSPECTS.items()
+        if name in loaded
+    ]
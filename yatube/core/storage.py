@@ -0,0 +1,60 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.txt', '.html', '.json', '.map',
+)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Статика с хешем содержимого в имени и предсжатыми копиями
+    .gz и .br (если установлен brotli) рядом с каждым файлом.
+    Пока collectstatic не запускался и манифеста нет, {% static %}
+    отдаёт имена без хеша, а не падает с ValueError.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed = set()
+        for name, hashed_name, result in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name:
+                processed.add(name)
+                processed.add(hashed_name)
+            yield name, hashed_name, result
+
+        if dry_run:
+            return
+
+        for name in sorted(processed):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+
+        variants = {'.gz': gzip.compress(content, compresslevel=9)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(content)
+
+        for suffix, compressed in variants.items():
+            if len(compressed) >= len(content):
+                continue
+            compressed_name = name + suffix
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
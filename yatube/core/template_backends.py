@@ -0,0 +1,44 @@
+import time
+
+from django.template.backends.django import (
+    DjangoTemplates,
+    Template,
+    reraise,
+)
+from django.template.exceptions import TemplateDoesNotExist
+
+from . import metrics
+from .tracing import span
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        name = self.template.origin.template_name or '<string>'
+        started = time.perf_counter()
+        try:
+            with span(name, 'template'):
+                return super().render(context, request)
+        finally:
+            metrics.template_duration.observe(
+                time.perf_counter() - started, name,
+            )
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    DjangoTemplates, замеряющий рендер шаблонов, которые отдают
+    render() и get_template(), и отмечающий его спаном трейса.
+    Вложенные {% include %} и {% extends %} входят во время шаблона
+    верхнего уровня; спаны для include ставит тег из core.templatetags.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,27 @@
+from django import template
+from django.template.loader_tags import IncludeNode, do_include
+
+from ..tracing import span
+
+register = template.Library()
+
+
+class TracedIncludeNode(IncludeNode):
+    def render(self, context):
+        # Для {% include "имя" %} var - само имя шаблона.
+        with span(str(self.template.var), 'template'):
+            return super().render(context)
+
+
+@register.tag('include')
+def traced_include(parser, token):
+    """
+    {% include %} со спаном трейса. Подключается через builtins
+    в TEMPLATES и заменяет встроенный тег во всех шаблонах.
+    """
+    node = do_include(parser, token)
+    return TracedIncludeNode(
+        node.template,
+        extra_context=node.extra_context,
+        isolated_context=node.isolated_context,
+    )
@@ -0,0 +1,31 @@
+import tempfile
+from contextlib import contextmanager
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+from .benchmarks import isolated_caches
+
+
+@contextmanager
+def temporary_caches():
+    """
+    Все кеши - во временном каталоге: тесты чистят кеш и не должны
+    задевать кеш сайта, а записи прошлых прогонов - попадать в тесты.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        with override_settings(CACHES=isolated_caches(directory)):
+            yield
+
+
+class TemporaryCachesRunner(DiscoverRunner):
+    """Запуск тестов manage.py test с кешами во временном каталоге."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._caches = temporary_caches()
+        self._caches.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from ..cache.decorators import anonymous_refresher, canonical_path
+from ..cache.tiered import tiered_cache
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Текст поста')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_hit_costs_no_queries(self):
+        """
+        Проверяем, что повторный анонимный запрос отдаётся из кеша
+        без запросов к базе и без рендеринга шаблона.
+        """
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertIsNone(second.context)
+        self.assertEqual(first.content, second.content)
+
+    def test_session_cookie_bypasses_cache(self):
+        """Проверяем, что запросы с сессией не попадают в кеш анонимов."""
+        url = reverse('about:author')
+        self.client.get(url)
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertIsNotNone(response.context)
+
+    def test_comment_invalidates_post_page(self):
+        """Проверяем, что новый комментарий сразу виден анониму."""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        self.client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Новый комментарий'
+        )
+        self.assertContains(self.client.get(url), 'Новый комментарий')
+
+    def test_query_params_outside_allow_list_ignored(self):
+        """
+        Проверяем, что посторонние параметры запроса не создают новых
+        записей кеша, а номер страницы создаёт.
+        """
+        url = reverse('posts:index')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url, {'utm_source': 'mail', 'x': '42'})
+            self.client.get(url, {'page': 'junk'})
+        self.assertIsNotNone(self.client.get(url, {'page': '2'}).context)
+        request = RequestFactory().get(url, {'x': '1', 'page': '3'})
+        self.assertEqual(canonical_path(request), f'{url}?page=3')
+
+    def test_page_stored_once(self):
+        """
+        Проверяем, что страница из кеша анонимов не сохраняется второй
+        раз кешем страниц представления.
+        """
+        with mock.patch.object(
+            tiered_cache, 'set_entry', wraps=tiered_cache.set_entry
+        ) as set_entry:
+            self.client.get(reverse('posts:index'))
+        keys = [call.args[0] for call in set_entry.call_args_list]
+        self.assertEqual(len(keys), 1)
+        self.assertTrue(keys[0].startswith('anon:'))
+
+    def test_refresh_uses_fresh_anonymous_request(self):
+        """
+        Проверяем, что фоновое обновление получает новый анонимный
+        запрос на тот же адрес, а не уже отвеченный запрос.
+        """
+        request = RequestFactory().get('/group/cats/?page=2')
+        request.user = self.user
+        request.session = {'secret': 'value'}
+        received = []
+        refresh = anonymous_refresher(request, received.append)
+        refresh()
+        fresh, = received
+        self.assertIsNot(fresh, request)
+        self.assertFalse(fresh.user.is_authenticated)
+        self.assertFalse(hasattr(fresh, 'session'))
+        self.assertEqual(fresh.get_full_path(), '/group/cats/?page=2')
+        self.assertEqual(fresh.get_host(), request.get_host())
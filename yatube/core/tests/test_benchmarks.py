@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from ..benchmarks import isolated_caches, percentiles, regressions
+
+
+class BenchmarkTests(SimpleTestCase):
+    def test_percentiles(self):
+        """Проверяем расчёт перцентилей по ближайшему рангу."""
+        self.assertEqual(
+            percentiles(list(range(1, 101))),
+            {'p50': 50, 'p95': 95, 'p99': 99},
+        )
+
+    def test_regressions(self):
+        """
+        Проверяем, что регрессией считается рост больше допуска
+        и больше минимальной разницы.
+        """
+        baseline = {'fast': {'p50': 2.0}, 'slow': {'p50': 100.0}}
+        results = {
+            'fast': {'p50': 3.5},
+            'slow': {'p50': 140.0},
+            'new': {'p50': 10.0},
+        }
+        self.assertEqual(
+            regressions(results, baseline, tolerance=0.3, min_delta=2.0),
+            [('slow', 'p50', 100.0, 140.0)],
+        )
+
+    def test_isolated_caches(self):
+        """Проверяем, что все кеши замеров лежат во временном каталоге."""
+        caches = isolated_caches('/tmp/bench')
+        self.assertEqual(set(caches), set(settings.CACHES))
+        for alias, params in caches.items():
+            self.assertEqual(params['LOCATION'], f'/tmp/bench/{alias}.sqlite3')
+            self.assertEqual(
+                params['BACKEND'], settings.CACHES[alias]['BACKEND']
+            )
+
+    def test_tests_run_on_temporary_caches(self):
+        """Проверяем, что тесты не работают с кешами в каталоге сайта."""
+        for alias, params in settings.CACHES.items():
+            with self.subTest(alias=alias):
+                self.assertFalse(
+                    params['LOCATION'].startswith(settings.BASE_DIR)
+                )
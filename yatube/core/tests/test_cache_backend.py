@@ -0,0 +1,111 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from ..cache.backends.sqlite import SQLiteCache
+
+
+def increment(path, times):
+    cache = SQLiteCache(path, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.path, {})
+
+    def test_values_shared_between_instances(self):
+        """
+        Проверяем, что значение, записанное одним экземпляром,
+        видно другому экземпляру на том же файле.
+        """
+        self.cache.set('key', {'value': 1})
+        other = SQLiteCache(self.path, {})
+        self.assertEqual(other.get('key'), {'value': 1})
+
+    def test_get_many_and_set_many(self):
+        """Проверяем пакетные запись и чтение."""
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2}
+        )
+
+    def test_expired_value_not_returned(self):
+        """Проверяем, что запись с истёкшим сроком не возвращается."""
+        self.cache.set('key', 'value', timeout=0.05)
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'new'))
+
+    def test_incr_atomic_across_processes(self):
+        """Проверяем, что incr атомарен при работе нескольких процессов."""
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=increment, args=(self.path, 50))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_lru_eviction_by_bytes(self):
+        """
+        Проверяем, что при превышении MAX_BYTES вытесняются давно
+        не читанные записи.
+        """
+        cache = SQLiteCache(self.path, {'OPTIONS': {'MAX_BYTES': 3000}})
+        cache.set('old', b'x' * 1000)
+        cache.set('hot', b'x' * 1000)
+        with cache._transaction(cache._connection) as connection:
+            connection.execute(
+                "UPDATE cache SET accessed = accessed - 10 "
+                "WHERE key LIKE '%old'"
+            )
+        cache.set('new', b'x' * 1500)
+        self.assertIsNone(cache.get('old'))
+        self.assertIsNotNone(cache.get('hot'))
+        self.assertIsNotNone(cache.get('new'))
+
+    def test_get_takes_no_write_lock(self):
+        """
+        Проверяем, что чтение не ждёт блокировки записи, даже когда
+        время обращения к записи устарело.
+        """
+        self.cache.set('key', 'value')
+        self.cache._connection.execute(
+            'UPDATE cache SET accessed = accessed - 10'
+        )
+        writer = sqlite3.connect(self.path, isolation_level=None)
+        self.addCleanup(writer.close)
+        writer.execute('BEGIN IMMEDIATE')
+        try:
+            started = time.monotonic()
+            self.assertEqual(self.cache.get('key'), 'value')
+            self.assertLess(time.monotonic() - started, 1)
+        finally:
+            writer.execute('ROLLBACK')
+
+    def test_reads_recorded_before_eviction(self):
+        """
+        Проверяем, что отложенное время чтения записывается до
+        вытеснения и прочитанная запись остаётся в кеше.
+        """
+        cache = SQLiteCache(self.path, {'OPTIONS': {'MAX_BYTES': 3000}})
+        cache.set('hot', b'x' * 1000)
+        cache.set('old', b'x' * 1000)
+        cache._connection.execute('UPDATE cache SET accessed = accessed - 10')
+        cache.get('hot')
+        cache.set('new', b'x' * 1500)
+        self.assertIsNone(cache.get('old'))
+        self.assertIsNotNone(cache.get('hot'))
@@ -0,0 +1,142 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from ..cache.backends.stats import Packed, StatsCache
+
+User = get_user_model()
+
+
+def stats_cache(backend='django.core.cache.backends.locmem.LocMemCache',
+                location='stats-tests', **options):
+    return StatsCache(location, {'OPTIONS': {
+        'BACKEND': backend,
+        'COMPRESS_MIN_SIZE': 100,
+        'STATS_FLUSH_INTERVAL': 0,
+        **options,
+    }})
+
+
+class StatsCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = stats_cache()
+        self.cache.clear()
+
+    def test_large_values_compressed(self):
+        """
+        Проверяем, что крупное значение хранится сжатым
+        и читается без изменений, а мелкое не сжимается.
+        """
+        value = 'текст поста ' * 100
+        self.cache.set('page:index:1', value)
+        self.cache.set('page:index:2', 'short')
+        stored = self.cache._inner.get('page:index:1')
+        self.assertIsInstance(stored, Packed)
+        self.assertEqual(stored.codec, 'zlib')
+        self.assertLess(len(stored.data), len(value))
+        self.assertIsNone(self.cache._inner.get('page:index:2').codec)
+        self.assertEqual(self.cache.get('page:index:1'), value)
+        self.assertEqual(self.cache.get_many(['page:index:2']), {
+            'page:index:2': 'short'
+        })
+
+    def test_counters_by_prefix(self):
+        """Проверяем подсчёт попаданий, промахов и объёма по префиксам."""
+        self.cache.set('page:index:1', 'x' * 1000)
+        self.cache.get('page:index:1')
+        self.cache.get('page:index:2')
+        self.cache.get_many(['obj:post:1'])
+        rows = {row['prefix']: row for row in self.cache.report()}
+        self.assertEqual(rows['page:index']['hits'], 1)
+        self.assertEqual(rows['page:index']['misses'], 1)
+        self.assertEqual(rows['page:index']['hit_rate'], 0.5)
+        self.assertGreater(
+            rows['page:index']['raw_bytes'],
+            rows['page:index']['stored_bytes'],
+        )
+        self.assertEqual(rows['obj:post']['misses'], 1)
+
+        self.cache.reset_stats()
+        self.assertEqual(self.cache.report(), [])
+
+    def test_incr_on_integers(self):
+        """Проверяем, что целые хранятся как есть и incr работает."""
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+
+    def test_sqlite_usage_and_evictions(self):
+        """
+        Проверяем, что SQLite-бэкенд отдаёт занятое место
+        и число вытеснений по префиксам.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = stats_cache(
+            'core.cache.backends.sqlite.SQLiteCache',
+            os.path.join(directory.name, 'cache.sqlite3'),
+            OPTIONS={'MAX_BYTES': 4000},
+        )
+        for number in range(10):
+            cache.set(f'page:index:{number}', os.urandom(1000))
+        usage = cache._inner.usage()['page:index']
+        self.assertLessEqual(usage['bytes'], 4000)
+        self.assertGreater(usage['evictions'], 0)
+        self.assertEqual(usage['entries'] + usage['evictions'], 10)
+
+    def test_sqlite_flush_is_one_transaction(self):
+        """
+        Проверяем, что сброс счётчиков в SQLite - одна транзакция
+        записи, сколько бы ни было префиксов и счётчиков.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = stats_cache(
+            'core.cache.backends.sqlite.SQLiteCache',
+            os.path.join(directory.name, 'cache.sqlite3'),
+            STATS_FLUSH_INTERVAL=60,
+        )
+        inner = cache._inner
+        for number in range(5):
+            cache.set(f'page:view{number}:1', 'x' * 200)
+            cache.get(f'page:view{number}:1')
+            cache.get(f'page:view{number}:2')
+        cache.stats.flush(inner)
+        cache.get('page:view0:1')
+        with mock.patch.object(
+            inner, '_transaction', wraps=inner._transaction
+        ) as transaction:
+            cache.stats.flush(inner)
+        self.assertEqual(transaction.call_count, 1)
+        rows = {row['prefix']: row for row in cache.report()}
+        self.assertEqual(rows['page:view0']['hits'], 2)
+        self.assertEqual(rows['page:view0']['misses'], 1)
+
+
+class CacheStatsViewsTests(TestCase):
+    def test_command_and_admin_page(self):
+        """
+        Проверяем, что сводка доступна командой и в админке,
+        а в админку не пускает обычных пользователей.
+        """
+        cache = stats_cache()
+        cache.set('page:index:1', 'x' * 1000)
+        out = StringIO()
+        call_command('cache_stats', stdout=out)
+        self.assertIn('Префикс', out.getvalue())
+
+        url = reverse('cache_stats')
+        self.client.force_login(User.objects.create_user('user'))
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(
+            User.objects.create_user('admin', is_staff=True)
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Статистика кеша')
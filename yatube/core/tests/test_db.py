@@ -0,0 +1,32 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+
+class SQLiteTuningTests(TestCase):
+    def test_pragmas_applied_to_connection(self):
+        """Проверяем, что новое соединение получает SQLITE_PRAGMAS."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+
+        self.assertEqual(
+            busy_timeout, settings.SQLITE_PRAGMAS['busy_timeout']
+        )
+        self.assertEqual(synchronous, 1, 'Ожидается synchronous=NORMAL')
+
+    def test_bench_sqlite_reports_both_setups(self):
+        """Проверяем, что бенчмарк сравнивает обе конфигурации."""
+        out = StringIO()
+        call_command(
+            'bench_sqlite', seconds=0.1, readers=1, writers=1, posts=100,
+            stdout=out,
+        )
+        output = out.getvalue()
+        self.assertIn('default:', output)
+        self.assertIn('tuned:', output)
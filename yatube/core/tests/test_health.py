@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+from http import HTTPStatus
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..health import database_aliases, probe, warming
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+BUDGETS = {'database': 10000, 'cache': 10000, 'storage': 10000}
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, HEALTH_BUDGETS_MS=BUDGETS)
+class HealthTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        probe.reset()
+        self.addCleanup(probe.reset)
+
+    def test_healthz(self):
+        """Проверяем, что /healthz отвечает, не обращаясь к базе."""
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('healthz'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_ready(self):
+        """Проверяем, что /readyz проходит все проверки зависимостей."""
+        response = self.client.get(reverse('readyz'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        details = response.json()
+        self.assertTrue(details['ready'])
+        self.assertEqual(
+            set(details['checks']), {'database', 'cache', 'storage'}
+        )
+        for check in details['checks'].values():
+            self.assertTrue(check['ok'])
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_probes_only_configured_databases(self):
+        """
+        Проверяем, что проба обходит основную базу и настроенные
+        реплики, а не все объявленные алиасы.
+        """
+        self.assertEqual(database_aliases(), ['default', 'replica'])
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(database_aliases(), ['default'])
+
+    def test_results_cached(self):
+        """
+        Проверяем, что повторная проба в пределах HEALTH_CACHE_SECONDS
+        не обращается к зависимостям.
+        """
+        self.client.get(reverse('readyz'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('readyz'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_not_ready_while_warming(self):
+        """Проверяем, что во время прогрева кеша воркер не готов."""
+        warming.set()
+        self.addCleanup(warming.clear)
+        response = self.client.get(reverse('readyz'))
+        self.assertEqual(
+            response.status_code, HTTPStatus.SERVICE_UNAVAILABLE
+        )
+        self.assertTrue(response.json()['warming'])
+
+    def test_budget_exceeded(self):
+        """Проверяем, что медленная зависимость делает воркер неготовым."""
+        with override_settings(HEALTH_BUDGETS_MS={**BUDGETS, 'cache': -1}):
+            response = self.client.get(reverse('readyz'))
+        self.assertEqual(
+            response.status_code, HTTPStatus.SERVICE_UNAVAILABLE
+        )
+        cache_check = response.json()['checks']['cache']
+        self.assertFalse(cache_check['ok'])
+        self.assertEqual(cache_check['error'], 'превышен бюджет')
+
+    def test_failed_dependency(self):
+        """Проверяем, что ошибка хранилища попадает в ответ /readyz."""
+        with mock.patch(
+            'core.health.default_storage.save',
+            side_effect=OSError('только чтение'),
+        ):
+            response = self.client.get(reverse('readyz'))
+        self.assertEqual(
+            response.status_code, HTTPStatus.SERVICE_UNAVAILABLE
+        )
+        self.assertIn(
+            'только чтение', response.json()['checks']['storage']['error']
+        )
@@ -0,0 +1,95 @@
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+
+from posts.models import Comment, Follow, Group, Post
+from ..loadtest import (
+    DEFAULT_MIX,
+    LOAD_PASSWORD,
+    LoadClient,
+    LockWaitRecorder,
+    Session,
+    sample_image,
+)
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class LoadClientTests(LiveServerTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        User.objects.create_user(username='load0', password=LOAD_PASSWORD)
+        group = Group.objects.create(title='Группа', slug='load')
+        post = Post.objects.create(
+            author=self.author, group=group, text='Текст'
+        )
+        self.data = {
+            'groups': [group.slug],
+            'posts': [post.pk],
+            'authors': [self.author.username],
+            'image': sample_image(),
+        }
+
+    def test_all_flows_without_errors(self):
+        """
+        Проверяем, что все сценарии смеси проходят без ошибок
+        и их действия доходят до базы.
+        """
+        client = LoadClient(
+            (self.server_thread.host, self.server_thread.port),
+            'load0', self.data, seed=0,
+        )
+        for flow in DEFAULT_MIX:
+            getattr(client, flow)()
+        client.run(DEFAULT_MIX, time.monotonic() + 0.5)
+
+        self.assertEqual(dict(client.stats.errors), {})
+        self.assertIn('posts:index', client.stats.requests)
+        self.assertTrue(Comment.objects.exists())
+        self.assertTrue(Follow.objects.filter(author=self.author).exists())
+        self.assertTrue(
+            Post.objects.filter(author__username='load0')
+            .exclude(image='').exists()
+        )
+
+
+class LoadHelpersTests(SimpleTestCase):
+    def test_session_cookies(self):
+        """Проверяем, что удалённая сервером cookie забывается."""
+        session = Session(('127.0.0.1', 0))
+        session.store_cookie('sessionid=abc; HttpOnly; Path=/')
+        self.assertEqual(session.cookies, {'sessionid': 'abc'})
+        session.store_cookie(
+            'sessionid=""; expires=Thu, 01 Jan 1970 00:00:00 GMT; '
+            'Max-Age=0; Path=/'
+        )
+        self.assertEqual(session.cookies, {})
+
+    def test_lock_waits_recorded_for_slow_writes(self):
+        """
+        Проверяем, что долгие пишущие запросы считаются ожиданием
+        блокировки маршрута, а чтения не учитываются.
+        """
+        recorder = LockWaitRecorder(threshold=0.01)
+        recorder.local.endpoint = 'posts:add_comment'
+
+        def slow(*args):
+            time.sleep(0.02)
+
+        recorder(slow, 'SELECT 1', (), False, {})
+        recorder(slow, 'INSERT INTO t VALUES (1)', (), False, {})
+        stats = recorder.stats['posts:add_comment']
+        self.assertEqual(stats['writes'], 1)
+        self.assertEqual(stats['lock_waits'], 1)
@@ -0,0 +1,125 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from .. import metrics
+
+User = get_user_model()
+
+
+def clear_metrics():
+    for metric in metrics.REGISTRY:
+        metric.clear()
+
+
+class MetricsEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=author, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+        clear_metrics()
+        self.addCleanup(clear_metrics)
+
+    @override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_request_query_template_and_cache_metrics(self):
+        """
+        Проверяем, что после запроса к посту в /metrics есть время
+        ответа, статус, SQL-запросы, рендер шаблона и промахи кеша.
+        """
+        self.client.get(reverse('posts:post_detail', args=(self.post.pk,)))
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        text = response.content.decode()
+        for line in (
+            'yatube_request_duration_seconds_count'
+            '{view="posts:post_detail",method="GET"} 1',
+            'yatube_requests_total'
+            '{view="posts:post_detail",method="GET",status="200"} 1',
+            'yatube_request_queries_count{view="posts:post_detail"} 1',
+            'yatube_template_render_duration_seconds_count'
+            '{template="posts/post_detail.html"} 1',
+            'yatube_cache_requests_total{alias="default",'
+            'prefix="anon:posts.post_detail",result="miss"}',
+        ):
+            self.assertIn(line, text)
+        queries = metrics.request_queries.collect()[('posts:post_detail',)]
+        self.assertGreater(queries[-1], 0)
+
+    @override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN='secret')
+    def test_endpoint_protected(self):
+        """
+        Проверяем, что без разрешённого адреса и токена /metrics
+        не виден, а с верным токеном доступен.
+        """
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(
+            self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong')
+            .status_code, 404,
+        )
+        self.assertEqual(
+            self.client.get(url, HTTP_AUTHORIZATION='Bearer secret')
+            .status_code, 200,
+        )
+
+    @override_settings(
+        METRICS_ALLOWED_IPS=['10.0.0.5'],
+        METRICS_TRUSTED_PROXIES=['127.0.0.1'],
+        METRICS_TOKEN=None,
+    )
+    def test_client_address_behind_trusted_proxy(self):
+        """
+        Проверяем, что за доверенным прокси доступ решает адрес клиента
+        из X-Forwarded-For, а не адрес самого прокси.
+        """
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(
+            self.client.get(url, HTTP_X_FORWARDED_FOR='203.0.113.7')
+            .status_code, 404,
+        )
+        self.assertEqual(
+            self.client.get(
+                url, HTTP_X_FORWARDED_FOR='203.0.113.7, 10.0.0.5'
+            ).status_code, 200,
+        )
+
+    def test_unknown_methods_share_label(self):
+        """Проверяем, что нестандартные методы считаются как other."""
+        for method in ('BREW', 'PROPFIND'):
+            self.client.generic(method, reverse('about:author'))
+        series = metrics.requests_total.collect()
+        methods = {method for _, method, _ in series}
+        self.assertEqual(methods, {'other'})
+
+
+class HistogramTests(SimpleTestCase):
+    def test_thread_series_summed_and_retired(self):
+        """
+        Проверяем, что наблюдения из разных потоков складываются,
+        а ряды завершившихся потоков не копятся.
+        """
+        histogram = metrics.Histogram('test_seconds', 'Тест.', ('view',),
+                                      (0.1, 1))
+        self.addCleanup(metrics.REGISTRY.remove, histogram)
+        threads = [
+            threading.Thread(target=histogram.observe, args=(value, 'a'))
+            for value in (0.05, 0.5, 5) * 30
+        ]
+        for thread in threads:
+            thread.start()
+            thread.join()
+
+        self.assertEqual(histogram.collect(), {('a',): [30, 30, 30, 166.5]})
+        self.assertEqual(histogram._threads, [])
+        lines = histogram.expose()
+        self.assertIn('test_seconds_bucket{view="a",le="1.0"} 60', lines)
+        self.assertIn('test_seconds_count{view="a"} 90', lines)
@@ -0,0 +1,118 @@
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from ..profiling import collapse, make_token, profiled_request, profiles
+
+User = get_user_model()
+
+
+class SamplingProfilerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=author, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+        profiles.clear()
+        self.addCleanup(profiles.clear)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+
+    def merge(self, *args, **options):
+        output = io.StringIO()
+        call_command(
+            'merge_profiles', *args, root=self.root, stdout=output,
+            **options,
+        )
+        return output.getvalue()
+
+    def test_sampled_requests_aggregated_by_view(self):
+        """
+        Проверяем, что профили складываются по маршрутам, а сводка
+        и свёрнутые стеки указывают на код представления.
+        """
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        with self.settings(
+            PROFILER_SAMPLE_RATE=1.0, PROFILER_ROOT=self.root,
+            PROFILER_TRACEMALLOC=True,
+        ):
+            for _ in range(3):
+                self.client.get(url)
+            profiles.flush()
+
+        self.assertEqual(
+            [name for name in os.listdir(self.root)
+             if name.endswith('.prof')],
+            [f'posts.post_detail.{os.getpid()}.prof'],
+        )
+        summary = self.merge()
+        self.assertIn('posts:post_detail: 3 запросов', summary)
+        self.assertIn('пик памяти', summary)
+        stacks = self.merge(collapsed='-')
+        self.assertTrue(all(
+            line.startswith('posts:post_detail;profiled_request')
+            for line in stacks.splitlines()
+        ))
+        self.assertIn('post_detail (posts/views.py:', stacks)
+
+    @override_settings(PROFILER_SAMPLE_RATE=0.0)
+    def test_signed_header_enables_profiling(self):
+        """
+        Проверяем, что без выборки профилируется только запрос
+        с верно подписанным заголовком.
+        """
+        with self.settings(PROFILER_ROOT=self.root):
+            self.client.get(reverse('posts:index'), HTTP_X_PROFILE='cpu')
+            profiles.flush()
+            self.assertEqual(os.listdir(self.root), [])
+            self.client.get(
+                reverse('posts:index'), HTTP_X_PROFILE=make_token()
+            )
+            profiles.flush()
+        self.assertIn('posts:index: 1 запросов', self.merge())
+
+
+def leaf():
+    return sum(range(20000))
+
+
+def branch():
+    return [leaf() for _ in range(5)]
+
+
+class CollapseTests(SimpleTestCase):
+    def test_collapsed_time_matches_profile(self):
+        """
+        Проверяем, что свёрнутые стеки начинаются с корня профиля
+        и в сумме дают измеренное время запроса.
+        """
+        profiler = cProfile.Profile()
+        profiler.enable()
+        profiled_request(lambda request: branch(), None)
+        profiler.disable()
+        stats = pstats.Stats(profiler)
+        root, = [
+            timing for function, timing in stats.stats.items()
+            if function[2] == 'profiled_request'
+        ]
+
+        stacks = collapse(stats, 'view')
+        self.assertAlmostEqual(
+            sum(stacks.values()), root[3] * 1e6, delta=len(stacks)
+        )
+        self.assertTrue(any(
+            stack.startswith('view;profiled_request') and 'leaf (' in stack
+            for stack in stacks
+        ))
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from ..middleware.queries import RepeatedQueriesError
+from ..queries import QueryInspector, normalize
+
+User = get_user_model()
+
+CARDS = Template(
+    '{% for post in posts %}\n'
+    '{{ post.author.username }}\n'
+    '{% endfor %}'
+)
+
+
+class QueryInspectorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(4):
+            author = User.objects.create_user(username=f'author{number}')
+            Post.objects.create(author=author, text='Текст')
+
+    def test_normalize(self):
+        """Проверяем, что запросы с разными значениями совпадают."""
+        self.assertEqual(
+            normalize('SELECT * FROM t WHERE id IN (%s, %s) AND a = 1'),
+            normalize('SELECT  *  FROM t WHERE id IN (%s) AND a = 25'),
+        )
+
+    def test_template_lazy_queries_grouped(self):
+        """
+        Проверяем, что ленивые запросы из шаблона собираются в одну
+        группу с местом в шаблоне.
+        """
+        posts = list(Post.objects.all())
+        with QueryInspector() as inspector:
+            CARDS.render(Context({'posts': posts}))
+        group, = inspector.repeated()
+        self.assertEqual(group.count, 4)
+        self.assertTrue(group.template)
+        self.assertTrue(group.site.endswith(':2'))
+
+    def test_view_queries_point_to_code(self):
+        """Проверяем, что запрос из кода указывает на строку проекта."""
+        with QueryInspector() as inspector:
+            list(Post.objects.all())
+        query, = inspector.queries
+        self.assertFalse(query.template)
+        self.assertTrue(query.site.startswith('core/tests/test_queries.py'))
+
+    @override_settings(
+        QUERY_INSPECTOR_SAMPLE_RATE=1.0,
+        QUERY_INSPECTOR_STRICT=True,
+    )
+    def test_strict_middleware_fails_request(self):
+        """
+        Проверяем, что в строгом режиме повторяющиеся запросы
+        роняют запрос, а страница без них отдаётся.
+        """
+        url = reverse('posts:post_detail', args=(Post.objects.first().pk,))
+        with override_settings(QUERY_INSPECTOR_THRESHOLD=1):
+            with self.assertRaises(RepeatedQueriesError):
+                self.client.get(url)
+        cache.clear()
+        self.assertEqual(self.client.get(url).status_code, 200)
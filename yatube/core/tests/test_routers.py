@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test import (
+    Client,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from posts.models import Post
+from posts.sharding import local_shards
+from .. import routers
+from ..db import copy_database
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.user, text='Текст')
+
+    def setUp(self):
+        routers.reset_pin()
+        self.router = routers.ReplicaRouter()
+
+    def tearDown(self):
+        routers.reset_pin()
+
+    def test_reads_go_to_replica_until_write(self):
+        """
+        Проверяем, что чтение уходит на реплику, а после записи
+        закрепляется за основной базой.
+        """
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        self.assertTrue(routers.has_written())
+        self.assertEqual(self.router.db_for_read(Post), DEFAULT_DB_ALIAS)
+
+    def test_write_sets_pin_cookie(self):
+        """
+        Проверяем, что после записи пользователь получает cookie,
+        которая закрепляет его чтение за основной базой.
+        """
+        client = Client()
+        routers.reset_pin(pinned=True)
+        client.force_login(ReplicaRouterTests.user)
+        response = client.post(
+            reverse('posts:add_comment', args=(ReplicaRouterTests.post.pk,)),
+            data={'text': 'Комментарий'},
+        )
+        self.assertIn('pin_primary', response.cookies)
+        self.assertFalse(routers.is_pinned())
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ShardedPinTests(TransactionTestCase):
+    def test_post_write_on_shard_pins_primary(self):
+        """
+        Проверяем, что запись поста на шард, которую направляет роутер
+        шардов, тоже закрепляет чтение за основной базой.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            with local_shards(2, directory) as shards:
+                with override_settings(POST_SHARDS=shards):
+                    author = User.objects.create_user(username='writer')
+                    routers.reset_pin()
+                    self.addCleanup(routers.reset_pin)
+                    post = Post.objects.create(author=author, text='Текст')
+                    self.assertIn(post._state.db, shards)
+                    self.assertTrue(routers.is_pinned())
+                    self.assertTrue(routers.has_written())
+
+
+class ReplicaSyncTests(TransactionTestCase):
+    def test_replica_file_synced_with_backup_api(self):
+        """Проверяем, что реплика получает данные через backup API."""
+        Post.objects.create(
+            author=User.objects.create_user(username='writer'),
+            text='Текст',
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'replica.sqlite3')
+            connection.ensure_connection()
+            copy_database(connection.connection, path)
+            replica = sqlite3.connect(path)
+            count = replica.execute(
+                'SELECT COUNT(*) FROM posts_post'
+            ).fetchone()[0]
+            replica.close()
+        self.assertEqual(count, 1)
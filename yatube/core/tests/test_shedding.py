@@ -0,0 +1,149 @@
+import threading
+import time
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from ..shedding import Limiter, request_class
+
+User = get_user_model()
+
+NO_READS = {'read': 0, 'write': 4, 'upload': 2}
+NO_WRITES = {'read': 32, 'write': 0, 'upload': 0}
+
+
+class LimiterTests(SimpleTestCase):
+    def test_class_and_total_limits(self):
+        """Проверяем, что соблюдаются и лимит класса, и общий лимит."""
+        limiter = Limiter(3, {'read': 2, 'write': 2})
+        self.assertTrue(limiter.acquire('read'))
+        self.assertTrue(limiter.acquire('read'))
+        self.assertFalse(limiter.acquire('read'))
+        self.assertTrue(limiter.acquire('write'))
+        self.assertFalse(limiter.acquire('write'))
+        limiter.release('read')
+        self.assertTrue(limiter.acquire('write'))
+
+    def test_waits_for_release(self):
+        """Проверяем, что запрос дожидается места в пределах timeout."""
+        limiter = Limiter(1, {'read': 1})
+        limiter.acquire('read')
+        threading.Timer(0.05, limiter.release, ('read',)).start()
+        self.assertTrue(limiter.acquire('read', timeout=5))
+
+    def test_class_without_limit_uses_total(self):
+        """Проверяем, что классу без своего лимита достаётся общий."""
+        limiter = Limiter(2, {'read': 2})
+        self.assertTrue(limiter.acquire('upload'))
+        self.assertTrue(limiter.acquire('upload'))
+        self.assertFalse(limiter.acquire('upload'))
+        limiter.release('upload')
+        self.assertTrue(limiter.acquire('read'))
+
+    def test_request_class(self):
+        """Проверяем разделение запросов на чтение, запись и загрузку."""
+        factory = RequestFactory()
+        self.assertEqual(request_class(factory.get('/')), 'read')
+        self.assertEqual(
+            request_class(factory.post('/', {'text': 'Текст'})), 'upload'
+        )
+        self.assertEqual(
+            request_class(factory.post(
+                '/', 'text=1',
+                content_type='application/x-www-form-urlencoded',
+            )),
+            'write',
+        )
+
+    def test_view_class_overrides_method(self):
+        """
+        Проверяем, что класс маршрута из SHEDDING_VIEW_CLASSES важнее
+        метода, а маршрут без класса делится по методу.
+        """
+        request = RequestFactory().get('/')
+        with self.settings(SHEDDING_VIEW_CLASSES={'posts:index': 'feed'}):
+            self.assertEqual(request_class(request, 'posts:index'), 'feed')
+            self.assertEqual(request_class(request, 'posts:profile'), 'read')
+
+
+class LoadSheddingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_write_rejected(self):
+        """Проверяем, что запись сверх лимита получает 503 с Retry-After."""
+        with override_settings(
+            SHEDDING_LIMITS=NO_WRITES, SHEDDING_QUEUE_TIMEOUT_MS=0
+        ):
+            client = Client()
+            client.force_login(self.author)
+            response = client.post(
+                reverse('posts:add_comment', args=(self.post.pk,)),
+                'text=1', content_type='application/x-www-form-urlencoded',
+            )
+        self.assertEqual(
+            response.status_code, HTTPStatus.SERVICE_UNAVAILABLE
+        )
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(self.post.comments.exists())
+
+    def test_follow_by_get_limited_as_write(self):
+        """
+        Проверяем, что подписка GET-запросом идёт по лимиту записи,
+        а не чтения.
+        """
+        with override_settings(
+            SHEDDING_LIMITS=NO_WRITES, SHEDDING_QUEUE_TIMEOUT_MS=0
+        ):
+            client = Client()
+            client.force_login(User.objects.create_user(username='reader'))
+            response = client.get(
+                reverse('posts:profile_follow', args=(self.author.username,))
+            )
+        self.assertEqual(
+            response.status_code, HTTPStatus.SERVICE_UNAVAILABLE
+        )
+        self.assertFalse(self.author.following.exists())
+
+    def test_cached_page_served_instead_of_shedding(self):
+        """
+        Проверяем, что при перегрузке аноним получает страницу из кеша,
+        а страницу, которой в кеше нет, - отказ.
+        """
+        index = reverse('posts:index')
+        fresh = self.client.get(index)
+        with override_settings(
+            SHEDDING_LIMITS=NO_READS, SHEDDING_QUEUE_TIMEOUT_MS=0
+        ):
+            client = Client()
+            response = client.get(index)
+            missing = client.get(
+                reverse('posts:post_detail', args=(self.post.pk,))
+            )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.content, fresh.content)
+        self.assertEqual(missing.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+
+    def test_exempt_views(self):
+        """
+        Проверяем, что пробы балансировщика не отклоняются и не ждут
+        места в очереди.
+        """
+        with override_settings(
+            SHEDDING_LIMITS=NO_READS, SHEDDING_QUEUE_TIMEOUT_MS=2000
+        ):
+            started = time.monotonic()
+            response = Client().get(reverse('healthz'))
+            elapsed = time.monotonic() - started
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertLess(elapsed, 1)
@@ -0,0 +1,98 @@
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from ..slowlog import SlowQueryLog, redact
+
+User = get_user_model()
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=1e-6)
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='hidden-name')
+        Post.objects.create(author=cls.author, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+        SlowQueryLog._explained.clear()
+
+    def entries(self, url):
+        with self.assertLogs('core.slowlog', 'WARNING') as logs:
+            self.client.get(url)
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_entries_attributed_and_redacted(self):
+        """
+        Проверяем, что запись содержит маршрут, место вызова в коде
+        проекта и параметры без строковых значений.
+        """
+        entries = self.entries(
+            reverse('posts:profile', args=(self.author.username,))
+        )
+        user_query = next(
+            entry for entry in entries
+            if 'FROM "auth_user"' in entry['sql']
+            and '<str:11>' in entry['params']
+        )
+        self.assertEqual(user_query['view'], 'posts:profile')
+        self.assertNotIn('hidden-name', json.dumps(entries))
+        self.assertTrue(user_query['site'].startswith(('posts/', 'core/')))
+        self.assertFalse(user_query['site'].startswith('core/slowlog'))
+        self.assertTrue(user_query['plan'])
+
+    def test_plan_captured_once_per_statement(self):
+        """Проверяем, что план снимается один раз на запрос."""
+        url = reverse('posts:profile', args=(self.author.username,))
+        first = self.entries(url)
+        cache.clear()
+        second = self.entries(url)
+        explained = {entry['sql_id'] for entry in first if 'plan' in entry}
+        self.assertTrue(explained)
+        self.assertFalse(any(
+            'plan' in entry for entry in second
+            if entry['sql_id'] in explained
+        ))
+
+
+class SlowQueriesCommandTests(SimpleTestCase):
+    def test_redact(self):
+        """Проверяем, что числа остаются, а строки скрываются."""
+        self.assertEqual(
+            redact([1, None, 'пароль', b'xy']),
+            [1, None, '<str:6>', '<bytes:2>'],
+        )
+
+    def test_summary_reads_rotated_logs(self):
+        """
+        Проверяем, что сводка учитывает ротированные копии и берёт
+        план из записи, где он снят.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'slow.log')
+        entry = {
+            'view': 'posts:index', 'sql_id': 'abc', 'sql': 'SELECT ?',
+            'duration_ms': 150.0, 'site': 'posts/views.py:20',
+        }
+        for name, extra in (
+            (f'{path}.1', {'plan': ['SCAN posts_post']}), (path, {}),
+        ):
+            with open(name, 'w') as log:
+                log.write(json.dumps({**entry, **extra}) + '\n')
+
+        output = io.StringIO()
+        call_command('slow_queries', log=path, stdout=output)
+        text = output.getvalue()
+        self.assertIn('abc: 2 раз, всего 300 мс', text)
+        self.assertIn('posts:index (2)', text)
+        self.assertIn('| SCAN posts_post', text)
@@ -0,0 +1,33 @@
+from django.test import SimpleTestCase
+
+from ..startup import parse_importtime, suspects
+
+IMPORTTIME = '''\
+import time: self [us] | cumulative | imported package
+import time:       261 |        261 |   _io
+import time:      1200 |       5300 |     setuptools._distutils
+import time:       900 |       6200 |   distutils.version
+import time:        50 |       6250 | django.utils.version
+boot 512.3 47000 650
+'''
+
+
+class StartupProfileTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        """
+        Проверяем, что разбираются строки -X importtime, а заголовок
+        и посторонний вывод пропускаются.
+        """
+        imports = parse_importtime(IMPORTTIME.splitlines())
+        self.assertEqual(len(imports), 4)
+        self.assertEqual(imports[1].name, 'setuptools._distutils')
+        self.assertEqual(imports[1].self_us, 1200)
+        self.assertEqual(imports[1].cumulative_us, 5300)
+
+    def test_suspects(self):
+        """Проверяем, что подмена distutils из setuptools замечена."""
+        names = [
+            name for name, advice in
+            suspects(parse_importtime(IMPORTTIME.splitlines()))
+        ]
+        self.assertEqual(names, ['setuptools'])
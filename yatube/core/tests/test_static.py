@@ -0,0 +1,126 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ..middleware.compression import HtmlGZipMiddleware
+from ..middleware.static import (
+    IMMUTABLE_CACHE_CONTROL,
+    StaticFilesMiddleware,
+)
+from ..storage import CompressedManifestStaticFilesStorage
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+    STATICFILES_STORAGE='core.storage.CompressedManifestStaticFilesStorage',
+)
+class StaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed_css = staticfiles_storage.stored_name(
+            'css/bootstrap.min.css'
+        )
+        cls.middleware = StaticFilesMiddleware(lambda request: None)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        """
+        Проверяем, что сборка статики создаёт файлы с хешем в имени
+        и сжатые копии рядом с ними.
+        """
+        self.assertNotEqual(self.hashed_css, 'css/bootstrap.min.css')
+        path = os.path.join(TEMP_STATIC_ROOT, self.hashed_css)
+        with open(path, 'rb') as original, open(path + '.gz', 'rb') as gz:
+            self.assertEqual(gzip.decompress(gz.read()), original.read())
+
+    def test_plain_names_without_manifest(self):
+        """
+        Проверяем, что до сборки статики хранилище отдаёт имена
+        без хеша.
+        """
+        empty_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, empty_root, ignore_errors=True)
+        storage = CompressedManifestStaticFilesStorage(location=empty_root)
+        self.assertEqual(
+            storage.stored_name('css/bootstrap.min.css'),
+            'css/bootstrap.min.css',
+        )
+
+    def test_serves_compressed_variant_with_immutable_cache(self):
+        """
+        Проверяем, что хешированный файл отдаётся в сжатом виде
+        с долгим неизменяемым кешем.
+        """
+        request = self.factory.get(
+            settings.STATIC_URL + self.hashed_css,
+            HTTP_ACCEPT_ENCODING='gzip, deflate',
+        )
+        response = self.middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        response.close()
+
+    def test_serves_plain_file_without_accept_encoding(self):
+        """
+        Проверяем, что без Accept-Encoding отдаётся несжатый файл,
+        а у файла без хеша короткий срок кеширования.
+        """
+        request = self.factory.get(
+            settings.STATIC_URL + 'css/bootstrap.min.css'
+        )
+        response = self.middleware(request)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.STATIC_MAX_AGE}'
+        )
+        response.close()
+
+
+class HtmlGZipMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING='gzip'
+        )
+
+    def test_large_html_is_compressed(self):
+        """Проверяем, что крупный HTML-ответ сжимается."""
+        content = 'a' * settings.HTML_COMPRESS_MIN_SIZE
+        middleware = HtmlGZipMiddleware(lambda request: HttpResponse(content))
+        response = middleware(self.request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_small_or_non_html_is_not_compressed(self):
+        """Проверяем, что мелкие и не HTML-ответы не сжимаются."""
+        responses = [
+            HttpResponse('a' * (settings.HTML_COMPRESS_MIN_SIZE - 1)),
+            HttpResponse(
+                '{}' * settings.HTML_COMPRESS_MIN_SIZE,
+                content_type='application/json'
+            ),
+        ]
+        for original in responses:
+            with self.subTest(content_type=original['Content-Type']):
+                middleware = HtmlGZipMiddleware(lambda request: original)
+                response = middleware(self.request)
+                self.assertFalse(response.has_header('Content-Encoding'))
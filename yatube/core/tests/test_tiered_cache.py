@@ -0,0 +1,244 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.core.signals import request_started
+from django.db import OperationalError
+from django.test import SimpleTestCase, override_settings
+
+from ..cache.tiered import LOCK_STRIPES, Entry, TieredCache
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        request_started.send(sender=None)
+        self.tiered = TieredCache()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def slow_producer(self):
+        with self.calls_lock:
+            self.calls += 1
+        time.sleep(0.2)
+        return 'fresh'
+
+    def run_concurrently(self, threads_count=10):
+        results = []
+
+        def worker():
+            results.append(
+                self.tiered.get_or_set('key', self.slow_producer, 20)
+            )
+
+        threads = [
+            threading.Thread(target=worker) for _ in range(threads_count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_clear_resets_l1(self):
+        """
+        Проверяем, что очистка общего кеша сбрасывает L1 процесса
+        со следующего запроса.
+        """
+        self.tiered.get_or_set('key', lambda: 'first', 20)
+        cache.clear()
+        request_started.send(sender=None)
+        self.assertEqual(
+            self.tiered.get_or_set('key', lambda: 'second', 20), 'second'
+        )
+
+    def test_l1_hit_skips_l2_within_request(self):
+        """
+        Проверяем, что повторное чтение ключа в том же запросе
+        обходится без обращений к L2.
+        """
+        self.tiered.get_or_set('key', lambda: 'first', 20, tags=['tag'])
+        l2 = caches['default']
+        with mock.patch.object(l2, 'get', wraps=l2.get) as get, \
+                mock.patch.object(l2, 'get_many', wraps=l2.get_many) as many:
+            value = self.tiered.get_or_set(
+                'key', lambda: 'second', 20, tags=['tag']
+            )
+        self.assertEqual(value, 'first')
+        get.assert_not_called()
+        many.assert_not_called()
+
+    def test_invalidate_keeps_other_keys(self):
+        """
+        Проверяем, что invalidate() сбрасывает только свой ключ,
+        в том числе в L1 других процессов.
+        """
+        other = TieredCache()
+        for tiered in (self.tiered, other):
+            tiered.get_or_set('key', lambda: 'first', 20)
+            tiered.get_or_set('kept', lambda: 'first', 20)
+        self.tiered.invalidate('key')
+        request_started.send(sender=None)
+        l2 = caches['default']
+        with mock.patch.object(l2, 'get', wraps=l2.get) as get:
+            self.assertEqual(
+                other.get_or_set('kept', lambda: 'second', 20), 'first'
+            )
+        get.assert_not_called()
+        self.assertEqual(
+            other.get_or_set('key', lambda: 'second', 20), 'second'
+        )
+
+    def test_nested_keys_in_same_stripe(self):
+        """
+        Проверяем, что вложенное вычисление ключа из той же полосы
+        блокировок не зависает.
+        """
+        stripe = hash('outer') % LOCK_STRIPES
+        inner = next(
+            key for key in (f'inner:{number}' for number in range(10000))
+            if hash(key) % LOCK_STRIPES == stripe
+        )
+        value = self.tiered.get_or_set(
+            'outer',
+            lambda: self.tiered.get_or_set(inner, lambda: 'inner', 20),
+            20,
+        )
+        self.assertEqual(value, 'inner')
+
+    def test_nested_recomputes_in_opposite_order(self):
+        """
+        Проверяем, что два потока, вложенно пересчитывающие ключи
+        из двух полос в разном порядке, не блокируют друг друга.
+        """
+        def keys_in(stripe, prefix):
+            return (
+                key for key in (f'{prefix}:{n}' for n in range(100000))
+                if hash(key) % LOCK_STRIPES == stripe
+            )
+
+        first, second = keys_in(1, 'a'), keys_in(2, 'b')
+        a_outer, a_inner = next(first), next(first)
+        b_outer, b_inner = next(second), next(second)
+        both_inside = threading.Barrier(2, timeout=5)
+        results = {}
+
+        def nested(outer, inner):
+            def producer():
+                both_inside.wait()
+                return self.tiered.get_or_set(inner, lambda: inner, 20)
+
+            results[outer] = self.tiered.get_or_set(outer, producer, 20)
+
+        threads = [
+            threading.Thread(target=nested, args=(a_outer, b_inner)),
+            threading.Thread(target=nested, args=(b_outer, a_inner)),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertEqual(results, {a_outer: b_inner, b_outer: a_inner})
+
+    def test_single_recompute_on_cold_key(self):
+        """
+        Проверяем, что при пустом кеше значение вычисляется один раз,
+        а конкурентные запросы дожидаются его.
+        """
+        results = self.run_concurrently()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ['fresh'] * 10)
+
+    def test_expired_key_served_stale_during_recompute(self):
+        """
+        Проверяем, что по истечении срока пересчёт выполняет один запрос,
+        а остальные получают устаревшее значение без ожидания.
+        """
+        self.tiered.set_entry('key', Entry('stale', time.time() - 1, 0), 20)
+        results = self.run_concurrently()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(sorted(set(results)), ['fresh', 'stale'])
+        self.assertEqual(
+            self.tiered.get_or_set('key', self.slow_producer, 20), 'fresh'
+        )
+
+    def test_stale_while_revalidate(self):
+        """
+        Проверяем, что после мягкого срока сразу отдаётся старая копия,
+        а обновление выполняется отдельно.
+        """
+        self.tiered.set_entry('key', Entry('stale', time.time() - 1, 0), 20)
+        with override_settings(CACHE_REFRESH_WORKERS=0):
+            value = self.tiered.get_or_set(
+                'key', lambda: 'current', 20, stale_while_revalidate=True,
+                refresher=lambda: 'fresh',
+            )
+        self.assertEqual(value, 'stale')
+        self.assertEqual(self.tiered.get_entry('key').value, 'fresh')
+
+    def test_stale_while_revalidate_without_refresher(self):
+        """
+        Проверяем, что без отдельного refresher запись пересчитывается
+        синхронно: producer запроса не уходит в фоновый поток.
+        """
+        self.tiered.set_entry('key', Entry('stale', time.time() - 1, 0), 20)
+        value = self.tiered.get_or_set(
+            'key', lambda: 'fresh', 20, stale_while_revalidate=True
+        )
+        self.assertEqual(value, 'fresh')
+
+    def test_background_refresh(self):
+        """Проверяем, что фоновое обновление запускается один раз."""
+        self.tiered.set_entry('key', Entry('stale', time.time() - 1, 0), 20)
+        results = [
+            self.tiered.get_or_set(
+                'key', lambda: 'current', 20, stale_while_revalidate=True,
+                refresher=self.slow_producer,
+            ) for _ in range(5)
+        ]
+        self.assertEqual(results, ['stale'] * 5)
+        self.tiered.executor.shutdown(wait=True)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.tiered.get_entry('key').value, 'fresh')
+
+    def test_stale_served_on_database_error(self):
+        """
+        Проверяем, что при ошибке базы отдаётся устаревшая копия,
+        а после жёсткого срока ошибка доходит до вызывающего.
+        """
+        def broken():
+            raise OperationalError('database is locked')
+
+        self.tiered.set_entry('key', Entry('stale', time.time() - 1, 0), 20)
+        self.assertEqual(self.tiered.get_or_set('key', broken, 20), 'stale')
+        with override_settings(CACHE_REFRESH_WORKERS=0):
+            self.assertEqual(
+                self.tiered.get_or_set(
+                    'key', broken, 20, stale_while_revalidate=True
+                ),
+                'stale',
+            )
+
+        with override_settings(CACHE_STALE_TIME=0):
+            with self.assertRaises(OperationalError):
+                self.tiered.get_or_set('key', broken, 20)
+
+    def test_invalidated_tags_recompute(self):
+        """
+        Проверяем, что запись с устаревшим тегом пересчитывается сразу,
+        но при ошибке базы остаётся запасной копией.
+        """
+        def broken():
+            raise OperationalError('database is locked')
+
+        self.tiered.get_or_set('key', lambda: 'first', 20, tags=['tag'])
+        self.tiered.invalidate_tags('tag')
+        self.assertEqual(
+            self.tiered.get_or_set('key', broken, 20, tags=['tag']), 'first'
+        )
+        self.assertEqual(
+            self.tiered.get_or_set('key', lambda: 'second', 20, tags=['tag']),
+            'second',
+        )
@@ -0,0 +1,123 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail.base import ThumbnailBackend
+
+from posts.models import Comment, Post
+from .. import tracing
+from ..thumbnails import TracedThumbnailBackend
+
+User = get_user_model()
+
+
+@override_settings(TRACE_SLOW_MS=0, TRACE_SAMPLE_RATE=0.0)
+class TracingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=author, text='Текст')
+        Comment.objects.create(post=cls.post, author=author, text='Да')
+
+    def setUp(self):
+        cache.clear()
+
+    def traces(self, url):
+        with self.assertLogs('core.tracing', 'INFO') as logs:
+            self.client.get(url)
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_post_detail_spans(self):
+        """
+        Проверяем, что трейс поста содержит вложенные в корневой
+        спан спаны представления, SQL, кеша и шаблонов с include.
+        """
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        trace, = self.traces(url)
+        self.assertEqual(trace['view'], 'posts:post_detail')
+        events = trace['traceEvents']
+        root = events[-1]
+        self.assertEqual(root['name'], f'GET {url}')
+        self.assertEqual(
+            {'request', 'view', 'sql', 'cache', 'template'},
+            {event['cat'] for event in events},
+        )
+        names = {event['name'] for event in events}
+        self.assertIn('posts/post_detail.html', names)
+        self.assertIn('includes/comment.html', names)
+        for event in events:
+            self.assertGreaterEqual(event['ts'], root['ts'])
+            self.assertLessEqual(
+                event['ts'] + event['dur'], root['ts'] + root['dur'] + 1
+            )
+
+    def test_tail_sampling_and_view_filter(self):
+        """
+        Проверяем, что быстрые запросы не сохраняются, а маршруты
+        вне TRACE_VIEWS не трассируются.
+        """
+        with self.settings(TRACE_SLOW_MS=10 ** 6):
+            with self.assertNoLogs('core.tracing', 'INFO'):
+                self.client.get(reverse('posts:index'))
+        with self.assertNoLogs('core.tracing', 'INFO'):
+            self.client.get(reverse('about:author'))
+
+    def test_export_for_viewer(self):
+        """
+        Проверяем, что выгрузка даёт файл Trace Event с подписанной
+        строкой на каждый трейс и отсчётом от начала запроса.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        log = os.path.join(directory.name, 'traces.log')
+        with open(log, 'w') as output:
+            for url in (reverse('posts:index'),
+                        reverse('posts:post_detail', args=(self.post.pk,))):
+                cache.clear()
+                trace, = self.traces(url)
+                output.write(json.dumps(trace) + '\n')
+        exported = os.path.join(directory.name, 'view.json')
+
+        stdout = io.StringIO()
+        call_command(
+            'export_traces', log=log, view=['posts:post_detail'],
+            output=exported, stdout=stdout,
+        )
+        with open(exported) as viewer:
+            events = json.load(viewer)['traceEvents']
+        label, *spans = events
+        self.assertEqual(label['ph'], 'M')
+        self.assertIn('posts:post_detail', label['args']['name'])
+        self.assertEqual(min(event['ts'] for event in spans), 0)
+        self.assertEqual({event['tid'] for event in events}, {1})
+        self.assertIn('posts:post_detail', stdout.getvalue())
+
+
+class TracedThumbnailTests(SimpleTestCase):
+    def test_keyword_arguments_traced(self):
+        """
+        Проверяем, что миниатюра с геометрией, переданной по имени,
+        строится и попадает в трейс спаном с этой геометрией.
+        """
+        trace = tracing.local.trace = tracing.Trace('view', 'GET', '/')
+        self.addCleanup(setattr, tracing.local, 'trace', None)
+        with mock.patch.object(
+            ThumbnailBackend, 'get_thumbnail', return_value='thumb'
+        ):
+            thumbnail = TracedThumbnailBackend().get_thumbnail(
+                file_='posts/cat.jpg', geometry_string='960x339',
+                crop='center',
+            )
+        self.assertEqual(thumbnail, 'thumb')
+        (name, category, _, _, args), = trace.spans
+        self.assertEqual((name, category), ('thumbnail', 'thumbnail'))
+        self.assertEqual(
+            args, {'file': 'posts/cat.jpg', 'geometry': '960x339'}
+        )
@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+
+from posts.models import Comment, Follow, Group, Post
+from ..benchmarks import view_cases
+from .utils import QueryScalingMixin
+
+User = get_user_model()
+
+QUERY_BUDGETS = {
+    'posts:index': 2,
+    'posts:group_list': 3,
+    'posts:profile': 3,
+    'posts:profile (reader)': 6,
+    'posts:post_detail': 5,
+    'posts:post_create': 3,
+    'posts:post_edit': 6,
+    'posts:follow_index': 4,
+    'users:signup': 0,
+    'users:login': 0,
+    'users:logout': 0,
+    'users:password_change_form': 2,
+    'users:password_change_done': 2,
+    'users:password_reset_form': 0,
+    'users:password_reset_done': 0,
+    'users:password_reset_confirm': 1,
+    'users:password_reset_complete': 0,
+    'about:author': 0,
+    'about:tech': 0,
+}
+
+
+class ViewQueryBudgetTests(QueryScalingMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(title='Группа', slug='budget')
+        for number in range(8):
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}'
+            )
+        cls.post = Post.objects.first()
+        for number in range(5):
+            commenter = User.objects.create_user(username=f'reader{number}')
+            Comment.objects.create(
+                post=cls.post, author=commenter, text='Комментарий'
+            )
+
+    def test_query_budgets(self):
+        """
+        Проверяем, что каждая страница укладывается в бюджет
+        запросов при любом размере страницы.
+        """
+        clients = {None: Client(), 'reader': Client(), 'author': Client()}
+        clients['reader'].force_login(self.reader)
+        clients['author'].force_login(self.author)
+        cases = view_cases(self.group, self.author, self.post)
+        self.assertEqual(
+            {case.name for case in cases}, set(QUERY_BUDGETS)
+        )
+        for case in cases:
+            with self.subTest(view=case.name):
+                self.assertQueryBudget(
+                    clients[case.user], case.url, QUERY_BUDGETS[case.name],
+                    status=case.status,
+                )
@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.test import override_settings
+
+from ..queries import QueryInspector
+
+
+class QueryScalingMixin:
+    """Проверки для TestCase: число запросов не зависит от объёма данных."""
+
+    def inspect_get(self, client, url, status=200):
+        cache.clear()
+        with QueryInspector() as inspector:
+            response = client.get(url)
+        self.assertEqual(response.status_code, status, url)
+        return inspector
+
+    def inspect_page_sizes(self, client, url, page_sizes, status=200):
+        inspectors = {}
+        for size in page_sizes:
+            with override_settings(POSTS_PER_PAGE=size):
+                inspectors[size] = self.inspect_get(client, url, status)
+        return inspectors
+
+    def assertNoRepeatedQueries(self, client, url):
+        inspector = self.inspect_get(client, url)
+        if inspector.repeated():
+            self.fail(
+                f'Повторяющиеся запросы на {url}:\n{inspector.report()}'
+            )
+
+    def assertQueriesDoNotScale(self, client, url, page_sizes=(2, 6)):
+        inspectors = self.inspect_page_sizes(client, url, page_sizes)
+        counts = {
+            size: len(inspector.queries)
+            for size, inspector in inspectors.items()
+        }
+        if len(set(counts.values())) > 1:
+            self.fail(
+                f'Число запросов на {url} растёт с размером страницы '
+                f'{counts}:\n{inspectors[max(page_sizes)].report()}'
+            )
+
+    def assertQueryBudget(self, client, url, budget, page_sizes=(2, 6),
+                          status=200):
+        """Запросов к url не больше budget при любом размере страницы."""
+        inspectors = self.inspect_page_sizes(
+            client, url, page_sizes, status
+        )
+        for size, inspector in inspectors.items():
+            if len(inspector.queries) > budget:
+                self.fail(
+                    f'{url}: {len(inspector.queries)} запросов при '
+                    f'бюджете {budget} (страница {size}):\n'
+                    f'{inspector.report()}'
+                )
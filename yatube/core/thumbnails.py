@@ -0,0 +1,16 @@
+from sorl.thumbnail.base import ThumbnailBackend
+
+from .tracing import traced
+
+
+class TracedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, у которого получение миниатюры - спан."""
+
+    @traced(
+        'thumbnail', 'thumbnail',
+        lambda self, file_, geometry_string, **options: {
+            'file': str(file_), 'geometry': geometry_string,
+        },
+    )
+    def get_thumbnail(self, file_, geometry_string, **options):
+        return super().get_thumbnail(file_, geometry_string, **options)
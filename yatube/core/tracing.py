@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+from .queries import normalize
+
+logger = logging.getLogger(__name__)
+
+local = threading.local()
+SQL_NAME_LENGTH = 60
+
+
+class Span:
+    __slots__ = ('trace', 'name', 'category', 'args', 'started')
+
+    def __init__(self, trace, name, category, args):
+        self.trace = trace
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.trace.record(
+            self.name, self.category, self.started, time.perf_counter(),
+            self.args,
+        )
+
+
+class Trace:
+    """
+    Спаны одного запроса. Пока запрос идёт, хранятся кортежи
+    со временем perf_counter; в формат Chrome Trace Event (его
+    открывают Perfetto, chrome://tracing и speedscope) они
+    переводятся, только если трейс решено сохранить.
+    """
+
+    def __init__(self, view, method, path):
+        self.id = uuid.uuid4().hex
+        self.view = view
+        self.method = method
+        self.path = path
+        self.spans = []
+        self.dropped = 0
+        self.epoch = time.time()
+        self.origin = time.perf_counter()
+        self.thread = threading.get_ident()
+
+    def record(self, name, category, started, finished, args):
+        if len(self.spans) >= settings.TRACE_MAX_SPANS:
+            self.dropped += 1
+            return
+        self.spans.append((name, category, started, finished, args))
+
+    def close(self):
+        """Корневой спан от начала запроса; в лимит спанов не входит."""
+        self.finished = time.perf_counter()
+        self.spans.append((
+            f'{self.method} {self.path}', 'request', self.origin,
+            self.finished, {'view': self.view},
+        ))
+        return self.finished - self.origin
+
+    def events(self):
+        pid = os.getpid()
+        return [
+            {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': round((self.epoch + started - self.origin) * 1e6, 1),
+                'dur': round((finished - started) * 1e6, 1),
+                'pid': pid,
+                'tid': self.thread,
+                **({'args': args} if args else {}),
+            }
+            for name, category, started, finished, args in self.spans
+        ]
+
+    def as_dict(self):
+        return {
+            'trace_id': self.id,
+            'view': self.view,
+            'method': self.method,
+            'path': self.path,
+            'duration_ms': round((self.finished - self.origin) * 1000, 3),
+            'dropped_spans': self.dropped,
+            'traceEvents': self.events(),
+        }
+
+
+def span(name, category, args=None):
+    """Спан текущего трейса или пустой контекст, если трейса нет."""
+    trace = getattr(local, 'trace', None)
+    if trace is None:
+        return NULL_SPAN
+    return Span(trace, name, category, args)
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+def traced(name, category, describe=None):
+    """
+    Декоратор: вызов внутри трейса становится спаном, describe
+    по аргументам вызова возвращает его атрибуты.
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            trace = getattr(local, 'trace', None)
+            if trace is None:
+                return function(*args, **kwargs)
+            with Span(
+                trace, name, category,
+                describe(*args, **kwargs) if describe else None,
+            ):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_query(execute, sql, params, many, context):
+    trace = getattr(local, 'trace', None)
+    if trace is None:
+        return execute(sql, params, many, context)
+    normalized = normalize(sql)
+    with Span(trace, normalized[:SQL_NAME_LENGTH], 'sql', {
+        'sql': normalized, 'alias': context['connection'].alias,
+    }):
+        return execute(sql, params, many, context)
+
+
+def start(view, method, path):
+    """Начинает трейс запроса и ставит обёртку SQL на все соединения."""
+    trace = local.trace = Trace(view, method, path)
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(trace_query))
+    return trace, stack
+
+
+def finish(trace, stack):
+    """
+    Хвостовая выборка: сохраняются медленнее TRACE_SLOW_MS и доля
+    TRACE_SAMPLE_RATE остальных. Решение принимается в конце
+    запроса, поэтому медленные запросы не теряются.
+    """
+    stack.close()
+    local.trace = None
+    duration = trace.close()
+    if (
+        duration * 1000 >= settings.TRACE_SLOW_MS
+        or random.random() < settings.TRACE_SAMPLE_RATE
+    ):
+        logger.info(json.dumps(trace.as_dict(), ensure_ascii=False))
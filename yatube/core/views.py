@@ -1,6 +1,13 @@
+import hmac
 from http import HTTPStatus
 
+from django.conf import settings
+from django.core.cache import caches
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render
+from django.views.decorators.cache import never_cache
+
+from . import health, metrics
 
 
 def page_not_found(request, exception):
@@ -17,3 +24,75 @@ def server_error(request):
         'core/500.html',
         status=HTTPStatus.INTERNAL_SERVER_ERROR
     )
+
+
+def cache_stats(request):
+    from django.contrib import admin
+
+    cache = caches['default']
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Статистика кеша',
+        'rows': cache.report() if hasattr(cache, 'report') else None,
+    }
+    return render(request, 'admin/cache_stats.html', context)
+
+
+def client_address(request):
+    """
+    Адрес клиента. Если запрос пришёл от METRICS_TRUSTED_PROXIES,
+    это последний адрес в X-Forwarded-For, не принадлежащий прокси;
+    без такого адреса клиент неизвестен.
+    """
+    address = request.META.get('REMOTE_ADDR')
+    trusted = settings.METRICS_TRUSTED_PROXIES
+    if address not in trusted:
+        return address
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+    for hop in reversed(forwarded):
+        hop = hop.strip()
+        if hop and hop not in trusted:
+            return hop
+    return None
+
+
+def metrics_allowed(request):
+    if settings.METRICS_TOKEN:
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        if hmac.compare_digest(
+            authorization.encode(), f'Bearer {settings.METRICS_TOKEN}'.encode()
+        ):
+            return True
+    return client_address(request) in settings.METRICS_ALLOWED_IPS
+
+
+@never_cache
+def metrics_view(request):
+    """
+    Метрики в формате Prometheus. Доступны с заголовком
+    Authorization: Bearer METRICS_TOKEN или клиентам из
+    METRICS_ALLOWED_IPS, остальным адрес не виден.
+    """
+    if not settings.METRICS_ENABLED or not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@never_cache
+def healthz(request):
+    """Живость процесса для балансировщика: без обращений к базе и кешу."""
+    return HttpResponse('ok', content_type='text/plain')
+
+
+@never_cache
+def readyz(request):
+    """
+    Готовность принимать трафик: 503, пока воркер прогревает кеш
+    или пока база, кеш или хранилище медиа не отвечают в бюджет.
+    """
+    ready, details = health.readiness()
+    return JsonResponse(
+        details,
+        status=HTTPStatus.OK if ready else HTTPStatus.SERVICE_UNAVAILABLE,
+        json_dumps_params={'ensure_ascii': False},
+    )
@@ -1,5 +1,41 @@
 from django.apps import AppConfig
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import cache
+        from .models import Comment, Follow, Group, Post
+        from .sharding import (
+            delete_reference,
+            reference_models,
+            replicate_reference,
+        )
+        from .snapshots import rebuild_on_post_created
+
+        for model in reference_models():
+            post_save.connect(replicate_reference, sender=model)
+            post_delete.connect(delete_reference, sender=model)
+
+        for model, handler in (
+            (Post, cache.invalidate_post_pages),
+            (Group, cache.invalidate_group_pages),
+            (get_user_model(), cache.invalidate_profile_pages),
+            (Comment, cache.invalidate_comment_pages),
+            (Follow, cache.invalidate_follow_pages),
+        ):
+            post_save.connect(handler, sender=model)
+            post_delete.connect(handler, sender=model)
+
+        for model, object_cache in (
+            (Post, cache.post_cache),
+            (Group, cache.group_cache),
+            (get_user_model(), cache.user_cache),
+        ):
+            post_save.connect(object_cache.invalidate, sender=model)
+            post_delete.connect(object_cache.invalidate, sender=model)
+
+        post_save.connect(rebuild_on_post_created, sender=Post)
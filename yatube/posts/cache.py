@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from core.cache.objects import ObjectCache
+from core.cache.tiered import tiered_cache
+from .models import Group, Post
+from .sharding import shard_for
+
+
+def load_posts(pks):
+    """Догружает посты с их шардов: по запросу на каждый шард."""
+    by_shard = {}
+    for pk in pks:
+        by_shard.setdefault(shard_for(pk), []).append(pk)
+    return {
+        post.pk: post
+        for alias, ids in by_shard.items()
+        for post in Post.objects.using(alias).filter(pk__in=ids)
+    }
+
+
+# Пароль и почта в общий кеш не попадают: страницам хватает имён.
+user_cache = ObjectCache(
+    get_user_model(),
+    settings.OBJECT_CACHE_TIME,
+    natural_key='username',
+    fields=('id', 'username', 'first_name', 'last_name'),
+)
+group_cache = ObjectCache(
+    Group, settings.OBJECT_CACHE_TIME, natural_key='slug'
+)
+post_cache = ObjectCache(
+    Post,
+    settings.OBJECT_CACHE_TIME,
+    related={'author': user_cache, 'group': group_cache},
+    loader=load_posts,
+)
+
+
+def index_tags():
+    return ['index']
+
+
+def group_tags(slug):
+    return [f'group:{slug}']
+
+
+def profile_tags(username):
+    return [f'profile:{username}']
+
+
+def post_tags(post_id):
+    return [f'post:{post_id}']
+
+
+def record_group_hit(slug):
+    group_cache.record_hit(slug=slug)
+
+
+def record_profile_hit(username):
+    user_cache.record_hit(username=username)
+
+
+def record_post_hit(post_id):
+    post_cache.record_hit(post_id)
+
+
+def invalidate_post_pages(sender, instance, **kwargs):
+    """
+    Сбрасывает закешированные страницы группы и профиля автора.
+    Главная не сбрасывается и обновляется по истечении срока.
+    """
+    tags = profile_tags(instance.author.username) + post_tags(instance.pk)
+    if instance.group_id is not None:
+        tags += group_tags(instance.group.slug)
+    tiered_cache.invalidate_tags(*tags)
+
+
+def invalidate_group_pages(sender, instance, **kwargs):
+    tiered_cache.invalidate_tags(*group_tags(instance.slug))
+
+
+def invalidate_profile_pages(sender, instance, **kwargs):
+    tiered_cache.invalidate_tags(*profile_tags(instance.username))
+
+
+def invalidate_comment_pages(sender, instance, **kwargs):
+    tiered_cache.invalidate_tags(*post_tags(instance.post_id))
+
+
+def invalidate_follow_pages(sender, instance, **kwargs):
+    tiered_cache.invalidate_tags(*profile_tags(instance.author.username))
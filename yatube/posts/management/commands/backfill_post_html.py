@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.cache.tiered import tiered_cache
+from posts.cache import (
+    group_tags,
+    index_tags,
+    post_cache,
+    post_tags,
+    profile_tags,
+)
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет HTML текста и отрывок у постов, сохранённых '
+        'до появления этих полей или через bulk_create, и сбрасывает '
+        'кеши их страниц.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересчитать все посты, а не только незаполненные.',
+        )
+
+    def handle(self, *args, **options):
+        size = options['batch_size']
+        total = 0
+        for alias in settings.POST_SHARDS:
+            posts = Post.objects.using(alias).order_by()
+            if not options['all']:
+                posts = posts.filter(text_html='')
+            pks = list(posts.values_list('pk', flat=True))
+            for start in range(0, len(pks), size):
+                total += self.update(alias, pks[start:start + size])
+        self.stdout.write(f'Обновлено постов: {total}')
+
+    @staticmethod
+    def update(alias, pks):
+        posts = list(
+            Post.objects.using(alias).filter(pk__in=pks)
+            .select_related('author', 'group')
+            .only('pk', 'text', 'author__username', 'group__slug')
+        )
+        tags = set(index_tags())
+        for post in posts:
+            post.render_text()
+            tags.update(post_tags(post.pk))
+            tags.update(profile_tags(post.author.username))
+            if post.group is not None:
+                tags.update(group_tags(post.group.slug))
+        Post.objects.using(alias).bulk_update(posts, ['text_html', 'excerpt'])
+        post_cache.cache.delete_many([post_cache.key(pk) for pk in pks])
+        tiered_cache.invalidate_tags(*sorted(tags))
+        return len(posts)
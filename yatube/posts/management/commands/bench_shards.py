@@ -0,0 +1,77 @@
+import multiprocessing
+import random
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from django.test.utils import override_settings
+
+from posts.models import Post
+from posts.sharding import local_shards, shard_for
+
+User = get_user_model()
+
+
+def write_posts(deadline, authors):
+    written = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            Post.objects.create(
+                author_id=random.randint(1, authors),
+                text='Текст поста для бенчмарка',
+            )
+            written += 1
+        except OperationalError:
+            errors += 1
+    connections.close_all()
+    return written, errors
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет пропускную способность записи постов при росте числа '
+        'шардов на временных файлах SQLite.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-shards', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--authors', type=int, default=100)
+        parser.add_argument('--seconds', type=float, default=3.0)
+
+    def handle(self, *args, **options):
+        for count in range(1, options['max_shards'] + 1):
+            with tempfile.TemporaryDirectory() as directory:
+                with local_shards(count, directory) as aliases:
+                    with override_settings(POST_SHARDS=aliases):
+                        self.seed_authors(options['authors'])
+                        written, errors = self.measure(options)
+            self.stdout.write(
+                f'shards={count}: '
+                f'posts/s={written / options["seconds"]:8.1f} '
+                f'errors={errors}'
+            )
+
+    @staticmethod
+    def seed_authors(authors):
+        for author_id in range(1, authors + 1):
+            User.objects.using(shard_for(author_id)).bulk_create([
+                User(id=author_id, username=f'bench{author_id}')
+            ])
+
+    @staticmethod
+    def measure(options):
+        connections.close_all()
+        deadline = time.monotonic() + options['seconds']
+        context = multiprocessing.get_context('fork')
+        with context.Pool(options['writers']) as pool:
+            results = pool.starmap(
+                write_posts,
+                [(deadline, options['authors'])] * options['writers'],
+            )
+        return (
+            sum(written for written, _ in results),
+            sum(errors for _, errors in results),
+        )
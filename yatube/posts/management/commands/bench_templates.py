@@ -0,0 +1,91 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.utils import timezone
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def template_engine(cached):
+    """Движок с настройками проекта и явным списком загрузчиков."""
+    config = settings.TEMPLATES[0]
+    options = dict(config['OPTIONS'])
+    options['loaders'] = (
+        [('django.template.loaders.cached.Loader', LOADERS)]
+        if cached else LOADERS
+    )
+    return DjangoTemplates({
+        'NAME': 'cached' if cached else 'uncached',
+        'DIRS': config['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': options,
+    })
+
+
+def fake_posts(count):
+    """Несохранённые посты: рендер меряется без запросов к базе."""
+    author = User(pk=1, username='bench', first_name='Лев', last_name='Т')
+    group = Group(pk=1, title='Группа', slug='bench')
+    now = timezone.now()
+    return [
+        Post(
+            pk=number,
+            text='Текст поста для бенчмарка',
+            excerpt='Текст поста для бенчмарка',
+            author=author,
+            group=group,
+            pub_date=now,
+        )
+        for number in range(1, count + 1)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет время рендера posts/index.html с 10 и 100 постами '
+        'с кешируемыми загрузчиками шаблонов и без них.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, nargs='+', default=[10, 100]
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        for cached in (False, True):
+            engine = template_engine(cached)
+            for count in options['posts']:
+                per_card = self.measure(
+                    engine, request, count, options['repeat']
+                )
+                self.stdout.write(
+                    f'{engine.name:>8} posts={count:<4} '
+                    f'µs/card={per_card * 1e6:8.1f}'
+                )
+
+    @staticmethod
+    def measure(engine, request, count, repeat):
+        page = Paginator(fake_posts(count), count).page(1)
+        context = {'page_obj': page, 'index': True}
+        engine.get_template('posts/index.html').render(context, request)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            template = engine.get_template('posts/index.html')
+            template.render(context, request)
+        return (time.perf_counter() - started) / repeat / count
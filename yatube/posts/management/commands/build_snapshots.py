@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.snapshots import build_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        'Рендерит популярные публичные страницы в статические HTML-файлы '
+        'для отдачи прокси-сервером: первые страницы главной, ленты '
+        'активных групп и профили самых активных авторов. Страница '
+        'перезаписывается, только если её содержимое изменилось.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--root', default=settings.SNAPSHOT_ROOT)
+        parser.add_argument(
+            '--workers', type=int, default=settings.SNAPSHOT_WORKERS
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Обновить только страницы, затронутые новыми постами.',
+        )
+
+    def handle(self, *args, **options):
+        pages, written, removed = build_snapshots(
+            options['root'], options['workers'], options['incremental']
+        )
+        self.stdout.write(
+            f'Страниц: {pages}, записано: {written}, удалено: {removed}'
+        )
@@ -0,0 +1,64 @@
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from posts.seeding import Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими пользователями, группами, '
+        'постами, комментариями и подписками для профилирования. '
+        'При одинаковом --seed данные совпадают.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=300000)
+        parser.add_argument(
+            '--follows', type=float, default=20,
+            help='Среднее число подписок на пользователя.',
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=1.2,
+            help='Показатель степенного закона популярности авторов.',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней распределять публикации.',
+        )
+        parser.add_argument(
+            '--images', type=float, default=0.0,
+            help='Доля постов с тестовой картинкой.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def log(message):
+            self.stdout.write(
+                f'[{time.monotonic() - started:7.1f} с] {message}'
+            )
+
+        counts = Seeder(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            alpha=options['alpha'],
+            days=options['days'],
+            images=options['images'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            log=log if options['verbosity'] > 1 else None,
+        ).run()
+        # bulk_create не шлёт сигналы, кеш страниц о новых данных
+        # не знает.
+        caches['default'].clear()
+        log(', '.join(f'{name}: {count}' for name, count in counts.items()))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.sharding import is_sharded, sync_references
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует пользователей и группы из основной базы на шарды. '
+        'Запускается после migrate на шардах, когда шардирование '
+        'включают на базе с данными.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if not is_sharded():
+            self.stdout.write('Шардирование выключено, копировать некуда.')
+            return
+        copied = sync_references(options['batch_size'])
+        for label, count in copied.items():
+            self.stdout.write(f'{label}: {count}')
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кеш после деплоя или перезапуска: объекты '
+        'популярных постов и пользователей, первые страницы главной '
+        'и лент групп, миниатюры изображений.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--index-pages', type=int, default=settings.CACHE_WARM_INDEX_PAGES
+        )
+        parser.add_argument(
+            '--groups', type=int, default=settings.CACHE_WARM_GROUPS
+        )
+        parser.add_argument(
+            '--posts', type=int, default=settings.CACHE_WARM_POSTS
+        )
+        parser.add_argument(
+            '--users', type=int, default=settings.CACHE_WARM_USERS
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.CACHE_WARM_WORKERS
+        )
+
+    def handle(self, *args, **options):
+        warmed = warm_up(
+            options['index_pages'],
+            options['groups'],
+            options['posts'],
+            options['users'],
+            options['workers'],
+        )
+        self.stdout.write(', '.join(
+            f'{kind}: {count}' for kind, count in warmed.items()
+        ))
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:35
+
+from django.db import migrations, models
+
+from posts.text import render_text
+
+BATCH_SIZE = 500
+
+
+def render_existing(apps, schema_editor):
+    """HTML и отрывок для постов, сохранённых до появления полей."""
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.using(schema_editor.connection.alias)
+    pks = list(posts.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(pks), BATCH_SIZE):
+        batch = list(
+            posts.filter(pk__in=pks[start:start + BATCH_SIZE])
+            .only('pk', 'text')
+        )
+        for post in batch:
+            post.text_html, post.excerpt = render_text(post.text)
+        posts.bulk_update(batch, ['text_html', 'excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_auto_20230606_1433'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Текст поста в HTML'),
+        ),
+        migrations.RunPython(render_existing, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,26 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils.safestring import mark_safe
+
+from core.reverse import cached_reverse
+
+from .sharding import (
+    CommentQuerySet,
+    PostQuerySet,
+    is_sharded,
+    save_on_shard,
+)
+from .text import EXCERPT_MAX_LENGTH, render_text
 
 User = get_user_model()
 
 
+def profile_url(user):
+    """get_absolute_url пользователя, см. ABSOLUTE_URL_OVERRIDES."""
+    return cached_reverse('posts:profile', user.username)
+
+
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
@@ -13,12 +29,26 @@ class Group(models.Model):
     def __str__(self) -> str:
         return self.title
 
+    def get_absolute_url(self):
+        return cached_reverse('posts:group_list', self.slug)
+
 
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Текст нового поста',
     )
+    text_html = models.TextField(
+        'Текст поста в HTML',
+        blank=True,
+        editable=False,
+    )
+    excerpt = models.CharField(
+        'Начало текста',
+        max_length=EXCERPT_MAX_LENGTH,
+        blank=True,
+        editable=False,
+    )
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True,
@@ -44,9 +74,46 @@ class Post(models.Model):
         blank=True
     )
 
+    objects = PostQuerySet.as_manager()
+
+    shard_key = 'author_id'
+
     def __str__(self) -> str:
         return self.text[:settings.MAX_POST_STR_LENGTH]
 
+    def get_absolute_url(self):
+        return cached_reverse('posts:post_detail', self.pk)
+
+    @property
+    def body_html(self):
+        """
+        HTML текста. У строк, записанных в обход save() (bulk_create,
+        update(), SQL) и ещё не заполненных backfill_post_html,
+        рендерится на лету.
+        """
+        return mark_safe(self.text_html or render_text(self.text)[0])
+
+    @property
+    def preview(self):
+        """Отрывок для лент, с тем же запасным вариантом."""
+        return self.excerpt or render_text(self.text)[1]
+
+    def render_text(self):
+        """
+        Готовит экранированный HTML текста и короткий отрывок для лент,
+        чтобы шаблоны не обрабатывали полный текст при каждом показе.
+        """
+        self.text_html, self.excerpt = render_text(self.text)
+
+    def save(self, *args, **kwargs):
+        self.render_text()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'text_html', 'excerpt'}
+        if is_sharded():
+            return save_on_shard(self, super().save, *args, **kwargs)
+        return super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
@@ -70,6 +137,15 @@ class Comment(models.Model):
     )
     created = models.DateTimeField(auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
+    shard_key = 'post_id'
+
+    def save(self, *args, **kwargs):
+        if is_sharded():
+            return save_on_shard(self, super().save, *args, **kwargs)
+        return super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-created']
         verbose_name = 'Комментарий'
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .sharding import is_sharded, shard_of
+
+
+class ShardRouter:
+    """Направляет запись постов и комментариев на шард по shard_key."""
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if is_sharded() and instance is not None and instance._state.db:
+            return instance._state.db
+        return None
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if (
+            is_sharded()
+            and hasattr(model, 'shard_key')
+            and isinstance(instance, model)
+        ):
+            return shard_of(instance)
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not is_sharded():
+            return None
+        aliases = {DEFAULT_DB_ALIAS, *settings.POST_SHARDS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
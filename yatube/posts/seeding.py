@@ -0,0 +1,311 @@
+import io
+import math
+import random
+from bisect import bisect
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Comment, Follow, Group, Post
+from .sharding import shard_for
+
+User = get_user_model()
+
+WORDS = (
+    'город день время дом жизнь работа друг вечер утро книга море '
+    'дорога лето зима весна осень солнце дождь ветер река лес поле '
+    'кофе чай музыка фильм история новость мысль идея вопрос ответ '
+    'сегодня вчера завтра снова всегда иногда рано поздно быстро '
+    'медленно хорошо плохо тихо громко далеко близко очень почти'
+).split()
+
+# Доля публикаций по часам суток: ночью пишут реже, вечером чаще.
+HOUR_WEIGHTS = (
+    2, 1, 1, 1, 1, 2, 3, 5, 6, 6, 6, 6,
+    7, 6, 6, 6, 6, 7, 8, 9, 9, 8, 6, 4,
+)
+SAMPLE_IMAGE_NAME = 'posts/seed.jpg'
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Отключает auto_now_add, чтобы bulk_create сохранил заданные даты."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def sample_image():
+    """Маленькая картинка в хранилище медиа, общая для всех постов."""
+    if not default_storage.exists(SAMPLE_IMAGE_NAME):
+        from PIL import Image
+
+        content = io.BytesIO()
+        Image.new('RGB', (960, 540), (70, 130, 180)).save(content, 'JPEG')
+        default_storage.save(
+            SAMPLE_IMAGE_NAME, ContentFile(content.getvalue())
+        )
+    return SAMPLE_IMAGE_NAME
+
+
+class PowerLaw:
+    """
+    Выбор из n элементов с вероятностью, пропорциональной
+    1 / ранг ** alpha: немногие популярные, длинный хвост остальных.
+    """
+
+    def __init__(self, items, alpha, rng):
+        self.items = items
+        self.rng = rng
+        self.cum_weights = list(accumulate(
+            1 / rank ** alpha for rank in range(1, len(items) + 1)
+        ))
+        self.total = self.cum_weights[-1]
+
+    def choice(self):
+        index = bisect(self.cum_weights, self.rng.random() * self.total)
+        return self.items[min(index, len(self.items) - 1)]
+
+
+class Seeder:
+    """
+    Детерминированно наполняет базу пользователями, группами, постами,
+    комментариями и подписками через bulk_create пачками по batch_size,
+    так что память не растёт с объёмом. Идентификаторы назначаются
+    явно: посты ложатся на шард автора с id, сравнимым с author_id
+    по модулю числа шардов, пользователи и группы копируются на все
+    шарды, как это делает replicate_reference.
+    """
+
+    def __init__(self, users, groups, posts, comments, follows,
+                 alpha=1.2, days=365, images=0.0, batch_size=5000,
+                 seed=0, log=None):
+        self.counts = {
+            'users': users, 'groups': groups, 'posts': posts,
+            'comments': comments, 'follows': follows,
+        }
+        self.alpha = alpha
+        self.days = days
+        self.images = images
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+        self.shards = settings.POST_SHARDS
+        self.reference = [DEFAULT_DB_ALIAS] + [
+            alias for alias in self.shards if alias != DEFAULT_DB_ALIAS
+        ]
+        self.now = timezone.now()
+        self.created = Counter()
+
+    def run(self):
+        user_ids = self.seed_users()
+        group_ids = self.seed_groups()
+        # Популярные авторы и пишут больше, и подписчиков у них больше.
+        self.rng.shuffle(user_ids)
+        authors = PowerLaw(user_ids, self.alpha, self.rng)
+        with explicit_timestamps(
+            Post._meta.get_field('pub_date'),
+            Comment._meta.get_field('created'),
+        ):
+            self.seed_posts(authors, group_ids)
+        self.seed_follows(user_ids, authors)
+        self.reset_sequences()
+        return self.created
+
+    def next_id(self, model, using=DEFAULT_DB_ALIAS):
+        return (
+            model._base_manager.using(using).aggregate(last=Max('pk'))['last']
+            or 0
+        ) + 1
+
+    def bulk_create(self, model, objects, aliases):
+        for alias in aliases:
+            model._base_manager.using(alias).bulk_create(objects)
+
+    def batches(self, first, count):
+        for start in range(first, first + count, self.batch_size):
+            yield range(start, min(start + self.batch_size, first + count))
+
+    def seed_users(self):
+        first = self.next_id(User)
+        password = make_password(None)
+        for ids in self.batches(first, self.counts['users']):
+            self.bulk_create(User, [
+                User(
+                    pk=pk,
+                    username=f'user{pk}',
+                    first_name=self.rng.choice(WORDS).title(),
+                    password=password,
+                    date_joined=self.timestamp(),
+                )
+                for pk in ids
+            ], self.reference)
+            self.created['users'] += len(ids)
+            self.log(f'пользователи: {self.created["users"]}')
+        self.user_ids = range(first, first + self.counts['users'])
+        return list(self.user_ids)
+
+    def seed_groups(self):
+        first = self.next_id(Group)
+        groups = [
+            Group(
+                pk=pk,
+                title=f'Группа {pk}',
+                slug=f'group-{pk}',
+                description=self.text(12),
+            )
+            for pk in range(first, first + self.counts['groups'])
+        ]
+        for start in range(0, len(groups), self.batch_size):
+            self.bulk_create(
+                Group, groups[start:start + self.batch_size], self.reference
+            )
+        self.created['groups'] += len(groups)
+        return [group.pk for group in groups]
+
+    def seed_posts(self, authors, group_ids):
+        count = len(self.shards)
+        next_ids = {alias: self.next_id(Post, alias) for alias in self.shards}
+        image = sample_image() if self.images else ''
+        comments_per_post = self.counts['comments'] / max(
+            self.counts['posts'], 1
+        )
+        while self.created['posts'] < self.counts['posts']:
+            size = min(
+                self.batch_size, self.counts['posts'] - self.created['posts']
+            )
+            posts = {alias: [] for alias in self.shards}
+            for _ in range(size):
+                author_id = authors.choice()
+                alias = shard_for(author_id)
+                # Наименьший свободный на шарде id, сравнимый
+                # с author_id по модулю числа шардов.
+                pk = next_ids[alias] + (
+                    author_id - next_ids[alias]
+                ) % count
+                next_ids[alias] = pk + 1
+                post = Post(
+                    pk=pk,
+                    author_id=author_id,
+                    group_id=(
+                        self.rng.choice(group_ids)
+                        if group_ids and self.rng.random() < 0.7 else None
+                    ),
+                    text=self.text(20),
+                    pub_date=self.timestamp(),
+                    image=image if self.rng.random() < self.images else '',
+                )
+                post.render_text()
+                posts[alias].append(post)
+            for alias, shard_posts in posts.items():
+                Post._base_manager.using(alias).bulk_create(shard_posts)
+                self.seed_comments(alias, shard_posts, comments_per_post)
+            self.created['posts'] += size
+            self.log(f'посты: {self.created["posts"]}')
+
+    def seed_comments(self, alias, posts, per_post):
+        comments = []
+        for post in posts:
+            for _ in range(self.poisson(per_post)):
+                delay = timedelta(minutes=self.rng.expovariate(1 / 180))
+                comments.append(Comment(
+                    post_id=post.pk,
+                    author_id=self.rng.choice(self.user_ids),
+                    text=self.text(8),
+                    created=min(post.pub_date + delay, self.now),
+                ))
+        first = self.next_id(Comment, alias)
+        for offset, comment in enumerate(comments):
+            comment.pk = first + offset
+        Comment._base_manager.using(alias).bulk_create(comments)
+        self.created['comments'] += len(comments)
+
+    def seed_follows(self, user_ids, authors):
+        """
+        Каждый пользователь подписан в среднем на follows авторов,
+        выбранных по степенному закону: число подписчиков у авторов
+        распределено так же.
+        """
+        follows_per_user = self.counts['follows']
+        for start in range(0, len(user_ids), self.batch_size):
+            batch = []
+            for user_id in user_ids[start:start + self.batch_size]:
+                wanted = min(
+                    self.poisson(follows_per_user), len(user_ids) - 1
+                )
+                followed = set()
+                for _ in range(wanted * 3):
+                    if len(followed) == wanted:
+                        break
+                    author_id = authors.choice()
+                    if author_id != user_id:
+                        followed.add(author_id)
+                batch += [
+                    Follow(user_id=user_id, author_id=author_id)
+                    for author_id in followed
+                ]
+            Follow.objects.bulk_create(batch, ignore_conflicts=True)
+            self.created['follows'] += len(batch)
+            self.log(f'подписки: {self.created["follows"]}')
+
+    def reset_sequences(self):
+        """После явных id счётчики автоинкремента нужно подвинуть."""
+        models = [User, Group, Post, Comment, Follow]
+        for alias in {DEFAULT_DB_ALIAS, *self.shards}:
+            connection = connections[alias]
+            statements = connection.ops.sequence_reset_sql(
+                no_style(), models
+            )
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+
+    def text(self, median):
+        """
+        Текст из случайных слов с логнормальной длиной: в основном
+        короткие записи и редкие длинные, как в живой ленте.
+        """
+        length = 1 + int(self.rng.lognormvariate(math.log(median), 0.8))
+        words = self.rng.choices(WORDS, k=length)
+        return ' '.join(words).capitalize() + '.'
+
+    def timestamp(self):
+        """
+        Время публикации за последние days дней: активность сайта
+        растёт со временем и зависит от часа суток.
+        """
+        day = self.days * self.rng.random() ** 0.5
+        hour = self.rng.choices(range(24), HOUR_WEIGHTS)[0]
+        moment = self.now - timedelta(days=int(day))
+        moment = moment.replace(
+            hour=hour,
+            minute=self.rng.randrange(60),
+            second=self.rng.randrange(60),
+        )
+        return min(moment, self.now)
+
+    def poisson(self, mean):
+        """Пуассоновская величина; для больших средних - нормальная."""
+        if mean > 30:
+            return max(0, round(self.rng.gauss(mean, mean ** 0.5)))
+        limit, count, product = math.exp(-mean), 0, 1.0
+        while True:
+            product *= self.rng.random()
+            if product < limit:
+                return count
+            count += 1
@@ -0,0 +1,225 @@
+import heapq
+import os
+from contextlib import contextmanager
+from itertools import islice
+from operator import attrgetter
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    IntegrityError,
+    connections,
+    models,
+    transaction,
+)
+from django.db.models import Max
+
+ID_ALLOCATION_ATTEMPTS = 5
+
+
+def is_sharded():
+    return settings.POST_SHARDS != [DEFAULT_DB_ALIAS]
+
+
+def shard_for(key):
+    """Возвращает алиас базы, на которой лежат строки с данным ключом."""
+    shards = settings.POST_SHARDS
+    return shards[key % len(shards)]
+
+
+def shard_of(instance):
+    return shard_for(getattr(instance, instance.shard_key))
+
+
+class ScatterGather:
+    """
+    Ленивый список постов со всех шардов, упорядоченный по pub_date.
+    Для среза берёт первые stop строк с каждого шарда и сливает их.
+    """
+
+    def __init__(self, querysets):
+        self.querysets = querysets
+        self.ordered = True
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        parts = [
+            queryset if stop is None else queryset[:stop]
+            for queryset in self.querysets
+        ]
+        merged = heapq.merge(
+            *parts, key=attrgetter('pub_date'), reverse=True
+        )
+        return list(islice(merged, start, stop))
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: без полного текста, только отрывок."""
+        return self.select_related('author', 'group').defer(
+            'text', 'text_html'
+        )
+
+    def on_shard_of(self, post_id):
+        return self.using(shard_for(post_id)).filter(pk=post_id)
+
+    def for_author(self, author):
+        return self.using(shard_for(author.pk)).filter(author=author)
+
+    def scatter(self, **filters):
+        """Выборка по всем шардам; без шардирования - обычный QuerySet."""
+        if not is_sharded():
+            return self.filter(**filters)
+        return ScatterGather([
+            self.using(alias).filter(**filters)
+            for alias in settings.POST_SHARDS
+        ])
+
+    def scatter_authors(self, author_ids):
+        if not is_sharded():
+            return self.filter(author_id__in=author_ids)
+        by_shard = {}
+        for author_id in author_ids:
+            by_shard.setdefault(shard_for(author_id), []).append(author_id)
+        return ScatterGather([
+            self.using(alias).filter(author_id__in=ids)
+            for alias, ids in by_shard.items()
+        ])
+
+
+class CommentQuerySet(models.QuerySet):
+    def for_post(self, post):
+        return self.using(shard_for(post.pk)).filter(post=post)
+
+
+def save_on_shard(instance, save, *args, **kwargs):
+    """
+    Сохраняет объект на его шард. Новому посту выдаётся id,
+    сравнимый с author_id по модулю числа шардов, чтобы шард
+    поста определялся по его id.
+    """
+    kwargs['using'] = shard_of(instance)
+    if instance.pk is not None or instance.shard_key != 'author_id':
+        return save(*args, **kwargs)
+
+    alias, count = kwargs['using'], len(settings.POST_SHARDS)
+    index = instance.author_id % count
+    kwargs['force_insert'] = True
+    for attempt in range(ID_ALLOCATION_ATTEMPTS):
+        last = instance.__class__._base_manager.using(alias).aggregate(
+            last=Max('pk')
+        )['last'] or 0
+        instance.pk = (last // count + 1) * count + index
+        try:
+            with transaction.atomic(using=alias):
+                return save(*args, **kwargs)
+        except IntegrityError:
+            instance.pk = None
+            if attempt == ID_ALLOCATION_ATTEMPTS - 1:
+                raise
+
+
+def reference_shards():
+    return [
+        alias for alias in settings.POST_SHARDS if alias != DEFAULT_DB_ALIAS
+    ]
+
+
+def reference_models():
+    """Модели, строки которых копируются на все шарды для внешних ключей."""
+    return (get_user_model(), apps.get_model('posts', 'Group'))
+
+
+def sync_references(batch_size=500):
+    """
+    Доводит копии пользователей и групп на шардах до основной базы:
+    недостающие строки добавляет, существующие перезаписывает.
+    Нужна, когда шардирование включают на базе с данными:
+    replicate_reference копирует только то, что сохранено после.
+    Возвращает число скопированных строк по моделям.
+    """
+    copied = {}
+    for model in reference_models():
+        manager = model._base_manager
+        fields = [
+            field.name for field in model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        pks = list(
+            manager.using(DEFAULT_DB_ALIAS).order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        for start in range(0, len(pks), batch_size):
+            rows = list(
+                manager.using(DEFAULT_DB_ALIAS)
+                .filter(pk__in=pks[start:start + batch_size])
+            )
+            for alias in reference_shards():
+                existing = set(
+                    manager.using(alias)
+                    .filter(pk__in=[row.pk for row in rows])
+                    .values_list('pk', flat=True)
+                )
+                manager.using(alias).bulk_create(
+                    [row for row in rows if row.pk not in existing]
+                )
+                manager.using(alias).bulk_update(
+                    [row for row in rows if row.pk in existing], fields
+                )
+        copied[model._meta.label] = len(pks)
+    return copied
+
+
+def replicate_reference(sender, instance, using, raw=False, **kwargs):
+    """Копирует пользователей и группы на все шарды для внешних ключей."""
+    if raw or using != DEFAULT_DB_ALIAS or not is_sharded():
+        return
+    for alias in reference_shards():
+        instance.save_base(using=alias, raw=True)
+    instance._state.db = using
+
+
+def delete_reference(sender, instance, using, **kwargs):
+    if using != DEFAULT_DB_ALIAS or not is_sharded():
+        return
+    for alias in reference_shards():
+        sender._base_manager.using(alias).filter(pk=instance.pk).delete()
+
+
+@contextmanager
+def local_shards(count, directory):
+    """
+    Подключает count временных файлов SQLite как шарды
+    с применёнными миграциями. Для тестов и бенчмарков.
+    """
+    template = connections.databases[DEFAULT_DB_ALIAS]
+    aliases = []
+    try:
+        for index in range(count):
+            alias = f'shard{index}'
+            aliases.append(alias)
+            connections.databases[alias] = {
+                **template,
+                'NAME': os.path.join(directory, f'{alias}.sqlite3'),
+                'CONN_MAX_AGE': 0,
+                'TEST': {},
+            }
+            call_command('migrate', database=alias, verbosity=0)
+        yield aliases
+    finally:
+        for alias in aliases:
+            connections[alias].close()
+            del connections.databases[alias]
+            if hasattr(connections._connections, alias):
+                delattr(connections._connections, alias)
@@ -0,0 +1,302 @@
+import fcntl
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections, transaction
+from django.db.models import Count
+from django.http import Http404
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Group, Post
+
+MANIFEST_NAME = 'manifest.json'
+LOCK_NAME = '.build.lock'
+
+User = get_user_model()
+
+
+def page_paths(url, pages):
+    """Адреса первых pages страниц ленты: [(адрес, файл снимка)]."""
+    base = url.strip('/')
+    paths = [(url, os.path.join(base, 'index.html'))]
+    for number in range(2, pages + 1):
+        paths.append((
+            f'{url}?page={number}',
+            os.path.join(base, f'page-{number}.html'),
+        ))
+    return paths
+
+
+def page_count(posts):
+    return max(1, math.ceil(posts / settings.POSTS_PER_PAGE))
+
+
+def recent_posts(since):
+    """Группы и авторы постов, опубликованных после since, со всех шардов."""
+    rows = []
+    for alias in settings.POST_SHARDS:
+        rows += Post.objects.using(alias).filter(
+            pub_date__gte=since
+        ).values_list('group_id', 'author_id')
+    return rows
+
+
+def group_sizes(group_ids):
+    sizes = Counter()
+    for alias in settings.POST_SHARDS:
+        sizes.update(dict(
+            Post.objects.using(alias).filter(
+                group_id__in=group_ids
+            ).values_list('group_id').annotate(
+                posts=Count('pk')
+            ).order_by()
+        ))
+    return sizes
+
+
+def author_sizes():
+    sizes = Counter()
+    for alias in settings.POST_SHARDS:
+        sizes.update(dict(
+            Post.objects.using(alias).values_list('author_id').annotate(
+                posts=Count('pk')
+            ).order_by()
+        ))
+    return sizes
+
+
+def snapshot_paths(since=None, changed=None):
+    """
+    Страницы для снимков: первые SNAPSHOT_INDEX_PAGES страниц главной,
+    все страницы активных групп и SNAPSHOT_TOP_PROFILES профилей
+    с наибольшим числом постов. changed - группы и авторы,
+    чьи страницы нужно обновить при инкрементальной сборке; профили
+    из них обновляются, только если входят в те же топ-профили.
+    """
+    posts = sum(
+        Post.objects.using(alias).count() for alias in settings.POST_SHARDS
+    )
+    paths = page_paths(
+        reverse('posts:index'),
+        min(page_count(posts), settings.SNAPSHOT_INDEX_PAGES),
+    )
+
+    authors = author_sizes().most_common(settings.SNAPSHOT_TOP_PROFILES)
+    if changed is None:
+        group_ids = {group for group, _ in recent_posts(since)} - {None}
+    else:
+        group_ids = {group for group, _ in changed} - {None}
+        changed_authors = {author for _, author in changed}
+        authors = [
+            (author_id, posts) for author_id, posts in authors
+            if author_id in changed_authors
+        ]
+
+    sizes = group_sizes(group_ids)
+    for group in Group.objects.filter(pk__in=group_ids):
+        paths += page_paths(
+            reverse('posts:group_list', args=(group.slug,)),
+            page_count(sizes[group.pk]),
+        )
+
+    usernames = dict(User.objects.filter(
+        pk__in=[author_id for author_id, _ in authors]
+    ).values_list('pk', 'username'))
+    for author_id, posts in authors:
+        if author_id in usernames:
+            paths += page_paths(
+                reverse('posts:profile', args=(usernames[author_id],)),
+                page_count(posts),
+            )
+    return paths
+
+
+def render_path(url):
+    """Рендерит страницу как для анонима, в обход кешей страниц."""
+    # django.test тянет unittest и тестовый клиент: импорт здесь,
+    # а не при загрузке приложения, сберегает время запуска воркера.
+    from django.test import RequestFactory
+
+    request = RequestFactory().get(url)
+    request.user = AnonymousUser()
+    match = resolve(request.path_info)
+    view = getattr(match.func, '__wrapped__', match.func)
+    try:
+        response = view(request, *match.args, **match.kwargs)
+    except Http404:
+        return None
+    if response.status_code != 200:
+        return None
+    return response.content
+
+
+def render_in_thread(url):
+    try:
+        return render_path(url)
+    finally:
+        connections.close_all()
+
+
+def write_atomically(path, content):
+    """
+    Пишет файл через временный файл с уникальным именем рядом с ним
+    и os.replace: читатель видит старое или новое содержимое целиком.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    temporary = tempfile.NamedTemporaryFile(
+        dir=directory, prefix=f'.{os.path.basename(path)}.',
+        suffix='.tmp', delete=False,
+    )
+    try:
+        with temporary:
+            temporary.write(content)
+        os.replace(temporary.name, path)
+    except BaseException:
+        os.remove(temporary.name)
+        raise
+
+
+@contextmanager
+def build_lock(root):
+    """
+    Блокировка сборки на файле в root: сборки из разных воркеров
+    идут по очереди, и каждая читает манифест, записанный предыдущей.
+    """
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, LOCK_NAME), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class SnapshotBuilder:
+    """
+    Пишет снимки страниц в root и ведёт манифест с хешами
+    содержимого: файл перезаписывается, только если страница
+    изменилась. Запись атомарная - через временный файл.
+    """
+
+    def __init__(self, root, workers):
+        self.root = root
+        self.workers = workers
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        try:
+            with open(self.manifest_path) as manifest:
+                self.manifest = json.load(manifest)
+        except (OSError, ValueError):
+            self.manifest = {'built_at': None, 'files': {}}
+
+    def build(self, paths, prune=False):
+        if self.workers > 1:
+            with ThreadPoolExecutor(self.workers) as executor:
+                pages = list(executor.map(
+                    render_in_thread, [url for url, _ in paths]
+                ))
+        else:
+            pages = [render_path(url) for url, _ in paths]
+
+        written = removed = 0
+        files = self.manifest['files']
+        for (_, name), content in zip(paths, pages):
+            if content is None:
+                removed += self.remove(name)
+                continue
+            digest = hashlib.sha256(content).hexdigest()
+            if files.get(name) != digest:
+                self.write(name, content)
+                files[name] = digest
+                written += 1
+        if prune:
+            wanted = {name for _, name in paths}
+            for name in set(files) - wanted:
+                removed += self.remove(name)
+        return written, removed
+
+    def write(self, name, content):
+        write_atomically(os.path.join(self.root, name), content)
+
+    def remove(self, name):
+        if self.manifest['files'].pop(name, None) is None:
+            return 0
+        try:
+            os.remove(os.path.join(self.root, name))
+        except FileNotFoundError:
+            pass
+        return 1
+
+    def save(self, built_at):
+        self.manifest['built_at'] = built_at.isoformat()
+        write_atomically(self.manifest_path, json.dumps(
+            self.manifest, indent=2, sort_keys=True
+        ).encode())
+
+
+def build_snapshots(root, workers, incremental=False):
+    """
+    Полная сборка пересобирает все страницы и удаляет лишние снимки,
+    инкрементальная - только главную и страницы групп и авторов
+    постов, опубликованных после прошлой сборки. Сборки в разных
+    процессах не пересекаются: см. build_lock.
+    """
+    with build_lock(root):
+        started = timezone.now()
+        builder = SnapshotBuilder(root, workers)
+        built_at = builder.manifest['built_at']
+        if incremental and built_at:
+            paths = snapshot_paths(
+                changed=recent_posts(parse_datetime(built_at))
+            )
+        else:
+            incremental = False
+            paths = snapshot_paths(
+                since=started - timedelta(days=settings.SNAPSHOT_ACTIVE_DAYS)
+            )
+        written, removed = builder.build(paths, prune=not incremental)
+        builder.save(started)
+    return len(paths), written, removed
+
+
+_rebuild_executor = ThreadPoolExecutor(1, 'snapshots')
+_rebuild_queued = threading.Event()
+
+
+def rebuild_in_background():
+    _rebuild_queued.clear()
+    try:
+        build_snapshots(settings.SNAPSHOT_ROOT, 1, incremental=True)
+    finally:
+        connections.close_all()
+
+
+def rebuild_on_post_created(sender, instance, created, raw=False, **kwargs):
+    """
+    С SNAPSHOT_ON_POST_CREATE новый пост запускает инкрементальную
+    сборку в фоне после коммита; запросы на сборку, пришедшие,
+    пока она ждёт в очереди, объединяются в одну. Сборки других
+    воркеров она дожидается на build_lock.
+    """
+    if not created or raw or not settings.SNAPSHOT_ON_POST_CREATE:
+        return
+
+    def schedule():
+        if not _rebuild_queued.is_set():
+            _rebuild_queued.set()
+            _rebuild_executor.submit(rebuild_in_background)
+
+    transaction.on_commit(schedule, using=instance._state.db)
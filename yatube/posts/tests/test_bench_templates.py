@@ -0,0 +1,16 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+
+class BenchTemplatesCommandTest(SimpleTestCase):
+    def test_reports_time_per_card(self):
+        """Проверяем, что бенчмарк рендерит ленту без обращений к базе."""
+        out = StringIO()
+        call_command('bench_templates', posts=[2], repeat=1, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        for line in lines:
+            self.assertIn('posts=2', line)
+            self.assertIn('µs/card=', line)
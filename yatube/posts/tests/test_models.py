@@ -1,9 +1,11 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
 
 from faker import Faker
 
+from core.reverse import cached_reverse
 from ..models import Group, Post
 
 User = get_user_model()
@@ -36,3 +38,25 @@ class PostModelTest(TestCase):
             with self.subTest(model=model):
                 self.assertEqual(str(model), expected_value,
                                  'Что-то не так')
+
+    def test_absolute_urls(self):
+        """
+        Проверяем, что адреса объектов совпадают с reverse(),
+        а повторный вызов берёт адрес из кеша cached_reverse.
+        """
+        post = PostModelTest.post
+        urls = {
+            post: reverse('posts:post_detail', args=(post.pk,)),
+            PostModelTest.group: reverse(
+                'posts:group_list', args=(PostModelTest.group.slug,)
+            ),
+            PostModelTest.user: reverse(
+                'posts:profile', args=(PostModelTest.user.username,)
+            ),
+        }
+        for model, expected in urls.items():
+            with self.subTest(model=model):
+                self.assertEqual(model.get_absolute_url(), expected)
+                hits = cached_reverse.cache_info().hits
+                self.assertEqual(model.get_absolute_url(), expected)
+                self.assertEqual(cached_reverse.cache_info().hits, hits + 1)
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from faker import Faker
+
+from ..cache import group_cache, post_cache, user_cache
+from ..models import Group, Post
+
+User = get_user_model()
+fake = Faker()
+
+
+class ObjectCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=fake.user_name())
+        cls.group = Group.objects.create(
+            title=fake.text(max_nb_chars=20),
+            slug=fake.slug(),
+            description=fake.text(max_nb_chars=100),
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=fake.text(max_nb_chars=100),
+                group=cls.group if i % 2 else None,
+            ) for i in range(4)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_get_many_hydrates_without_sql(self):
+        """
+        Проверяем, что после прогрева список id превращается в посты
+        с авторами и группами без запросов к базе.
+        """
+        ids = [post.pk for post in self.posts]
+        post_cache.get_many(ids)
+        with self.assertNumQueries(0):
+            posts = post_cache.get_many(ids)
+            self.assertEqual(
+                [posts[pk].author.username for pk in ids],
+                [self.user.username] * len(ids),
+            )
+            self.assertEqual(
+                [posts[pk].group for pk in ids],
+                [None, self.group, None, self.group],
+            )
+
+    def test_natural_key_lookup(self):
+        """Проверяем чтение по slug и username через кеш."""
+        group_cache.get(slug=self.group.slug)
+        user_cache.get(username=self.user.username)
+        with self.assertNumQueries(0):
+            self.assertEqual(group_cache.get(slug=self.group.slug), self.group)
+            self.assertEqual(
+                user_cache.get(username=self.user.username), self.user
+            )
+
+    def test_user_cached_without_secrets(self):
+        """Проверяем, что пароль и почта автора не попадают в кеш."""
+        user_cache.get(username=self.user.username)
+        cached = cache.get(user_cache.key(self.user.pk))
+        self.assertTrue(
+            {'password', 'email'} <= cached.get_deferred_fields()
+        )
+
+    def test_invalidated_on_save_and_delete(self):
+        """
+        Проверяем, что изменение и удаление объекта сбрасывают кеш,
+        в том числе по старому естественному ключу.
+        """
+        group = Group.objects.create(title='Группа', slug='old-slug')
+        group_cache.get(slug='old-slug')
+        group.slug = 'new-slug'
+        group.save()
+        self.assertEqual(group_cache.get(slug='new-slug').pk, group.pk)
+        with self.assertRaises(Group.DoesNotExist):
+            group_cache.get(slug='old-slug')
+
+        post = Post.objects.create(author=self.user, text='Пост')
+        pk = post.pk
+        post_cache.get(pk)
+        post.delete()
+        with self.assertRaises(Post.DoesNotExist):
+            post_cache.get(pk)
@@ -0,0 +1,107 @@
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+
+@override_settings(POST_EXCERPT_LENGTH=20)
+class PostTextTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_html_and_excerpt_rendered_on_save(self):
+        """
+        Проверяем, что при сохранении текст переводится в экранированный
+        HTML, а для лент сохраняется короткий отрывок.
+        """
+        post = Post.objects.create(
+            author=self.user, text='<b>Первый</b>\n\nвторой абзац текста'
+        )
+        self.assertEqual(
+            post.text_html,
+            '<p>&lt;b&gt;Первый&lt;/b&gt;</p>\n\n<p>второй абзац текста</p>',
+        )
+        self.assertEqual(post.excerpt, '<b>Первый</b>\n\nвтор…')
+
+    def test_feed_does_not_load_text(self):
+        """Проверяем, что лента не загружает полный текст постов."""
+        Post.objects.create(author=self.user, text='Текст поста')
+        response = self.client.get(reverse('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertEqual(
+            post.get_deferred_fields(), {'text', 'text_html'}
+        )
+        self.assertContains(response, 'Текст поста')
+
+    def test_backfill_command(self):
+        """Проверяем, что команда заполняет HTML у старых постов."""
+        post = Post.objects.create(author=self.user, text='Текст')
+        Post.objects.filter(pk=post.pk).update(text_html='', excerpt='')
+        out = StringIO()
+        call_command('backfill_post_html', stdout=out)
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p>Текст</p>')
+        self.assertEqual(post.excerpt, 'Текст')
+        self.assertIn('1', out.getvalue())
+
+    def test_migration_renders_existing_posts(self):
+        """Проверяем, что миграция 0008 заполняет HTML у старых постов."""
+        post = Post.objects.create(author=self.user, text='Старый\nтекст')
+        Post.objects.filter(pk=post.pk).update(text_html='', excerpt='')
+        migration = import_module('posts.migrations.0008_post_text_html')
+        migration.render_existing(apps, connection.schema_editor())
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p>Старый<br>текст</p>')
+        self.assertEqual(post.excerpt, 'Старый\nтекст')
+
+    def test_unrendered_post_falls_back_to_text(self):
+        """
+        Проверяем, что пост, записанный в обход save(), показывается
+        с текстом, хотя HTML и отрывок ещё не заполнены.
+        """
+        Post.objects.bulk_create([
+            Post(author=self.user, text='Текст\nиз bulk_create'),
+        ])
+        post = Post.objects.latest('pk')
+        self.assertEqual(post.text_html, '')
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,))
+        )
+        self.assertContains(response, '<p>Текст<br>из bulk_create</p>')
+        self.assertContains(
+            self.client.get(reverse('posts:index')), 'из bulk_create'
+        )
+
+    def test_backfill_invalidates_cached_pages(self):
+        """
+        Проверяем, что после заполнения HTML страницы поста и ленты
+        рендерятся заново, а не берутся из кеша.
+        """
+        Post.objects.bulk_create([Post(author=self.user, text='Текст')])
+        post = Post.objects.latest('pk')
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:post_detail', args=(post.pk,)),
+            reverse('posts:profile', args=(self.user.username,)),
+        )
+        for url in urls:
+            self.client.get(url)
+            self.assertIsNone(self.client.get(url).context)
+        call_command('backfill_post_html', stdout=StringIO())
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertIsNotNone(self.client.get(url).context)
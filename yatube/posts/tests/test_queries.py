@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.tests.utils import QueryScalingMixin
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+POSTS = 8
+
+
+class FeedQueriesTests(QueryScalingMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='queries')
+        authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(POSTS)
+        ]
+        for author in authors:
+            Post.objects.create(author=author, group=cls.group, text='Текст')
+            Follow.objects.create(user=cls.reader, author=author)
+        cls.author = authors[0]
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text='Текст')
+            for _ in range(POSTS)
+        )
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=author, text='Комментарий')
+            for author in authors
+        )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feeds_do_not_scale_with_page_size(self):
+        """
+        Проверяем, что число запросов лент не растёт с размером
+        страницы.
+        """
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+        ]
+        for url in urls:
+            for client in (self.client, self.reader_client):
+                with self.subTest(url=url, client=client):
+                    self.assertQueriesDoNotScale(client, url)
+        self.assertQueriesDoNotScale(
+            self.reader_client, reverse('posts:follow_index')
+        )
+
+    def test_post_detail_comments_without_repeated_queries(self):
+        """Проверяем, что комментарии поста грузятся без N+1."""
+        self.assertNoRepeatedQueries(
+            self.reader_client,
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        )
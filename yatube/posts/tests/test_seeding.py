@@ -0,0 +1,88 @@
+import shutil
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .utils import TEMP_MEDIA_ROOT
+from ..models import Comment, Follow, Group, Post
+from ..seeding import Seeder
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeederTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def seed(self, **options):
+        return Seeder(**{
+            'users': 200, 'groups': 5, 'posts': 600, 'comments': 1200,
+            'follows': 10, 'batch_size': 100, 'seed': 1, **options,
+        }).run()
+
+    def test_counts_and_rendered_text(self):
+        """
+        Проверяем, что созданы все объекты, а у постов из bulk_create
+        заполнены HTML и отрывок.
+        """
+        created = self.seed(images=0.5)
+        self.assertEqual(User.objects.count(), 200)
+        self.assertEqual(Group.objects.count(), 5)
+        self.assertEqual(Post.objects.count(), 600)
+        self.assertEqual(Comment.objects.count(), created['comments'])
+        self.assertEqual(Follow.objects.count(), created['follows'])
+        self.assertFalse(Post.objects.filter(excerpt='').exists())
+        self.assertFalse(Post.objects.filter(text_html='').exists())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertFalse(Follow.objects.filter(user=F('author')).exists())
+
+    def test_deterministic(self):
+        """Проверяем, что одинаковый seed даёт одинаковые данные."""
+        self.seed()
+        first = list(Post.objects.order_by('pk').values_list(
+            'author_id', 'text'
+        ))
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.seed()
+        second = list(Post.objects.order_by('pk').values_list(
+            'author_id', 'text'
+        ))
+        self.assertEqual(first, second)
+
+    def test_realistic_distributions(self):
+        """
+        Проверяем, что подписчики распределены по степенному закону,
+        а даты публикаций растянуты на заданный период.
+        """
+        self.seed(days=30)
+        followers = sorted(
+            Follow.objects.values('author').annotate(
+                count=Count('pk')
+            ).values_list('count', flat=True),
+            reverse=True,
+        )
+        self.assertGreater(followers[0], 10 * followers[len(followers) // 2])
+        now = timezone.now()
+        self.assertTrue(Post.objects.filter(
+            pub_date__lt=now - timedelta(days=20)
+        ).exists())
+        self.assertFalse(Post.objects.filter(
+            pub_date__lt=now - timedelta(days=31)
+        ).exists())
+        self.assertFalse(Post.objects.filter(pub_date__gt=now).exists())
+
+    def test_new_rows_after_seeding(self):
+        """Проверяем, что после явных id обычное создание работает."""
+        self.seed()
+        post = Post.objects.create(
+            author=User.objects.first(), text='Новый пост'
+        )
+        self.assertGreater(post.pk, 600)
@@ -0,0 +1,163 @@
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from faker import Faker
+
+from ..models import Comment, Group, Post
+from ..seeding import Seeder
+from ..sharding import local_shards, shard_for
+
+User = get_user_model()
+fake = Faker()
+
+
+class ShardingTests(TransactionTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        shards = local_shards(2, directory.name)
+        self.shards = shards.__enter__()
+        self.addCleanup(shards.__exit__, None, None, None)
+        sharded = override_settings(POST_SHARDS=self.shards)
+        sharded.enable()
+        self.addCleanup(sharded.disable)
+        cache.clear()
+
+        self.group = Group.objects.create(
+            title=fake.text(max_nb_chars=20),
+            slug=fake.slug(),
+            description=fake.text(max_nb_chars=100),
+        )
+        self.authors = [
+            User.objects.create_user(username=fake.user_name() + str(i))
+            for i in range(2)
+        ]
+        self.posts = [
+            Post.objects.create(
+                author=self.authors[i % 2],
+                text=fake.text(max_nb_chars=100),
+                group=self.group,
+            ) for i in range(6)
+        ]
+
+    def test_rows_placed_on_author_shard(self):
+        """
+        Проверяем, что пост попадает на шард автора, id поста указывает
+        на тот же шард, а комментарии лежат рядом с постом.
+        """
+        for post in self.posts:
+            with self.subTest(post=post.pk):
+                alias = shard_for(post.author_id)
+                self.assertEqual(shard_for(post.pk), alias)
+                self.assertTrue(
+                    Post.objects.using(alias).filter(pk=post.pk).exists()
+                )
+
+        post = self.posts[1]
+        comment = Comment.objects.create(
+            post=post, author=self.authors[0], text='Комментарий'
+        )
+        self.assertTrue(
+            Comment.objects.for_post(post).filter(pk=comment.pk).exists()
+        )
+
+    def test_profile_hits_only_its_shard(self):
+        """Проверяем, что профиль автора читает только его шард."""
+        author = self.authors[1]
+        other_shard = shard_for(self.authors[0].pk)
+        with CaptureQueriesContext(connections[other_shard]) as queries:
+            response = self.client.get(
+                reverse('posts:profile', args=(author.username,))
+            )
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_index_merges_shards_by_pub_date(self):
+        """
+        Проверяем, что главная страница собирает посты со всех шардов
+        в порядке убывания даты публикации.
+        """
+        response = self.client.get(reverse('posts:index'))
+        page = response.context['page_obj']
+        self.assertEqual(page.paginator.count, len(self.posts))
+        self.assertEqual(
+            [post.pk for post in page],
+            [post.pk for post in reversed(self.posts)],
+        )
+
+    def test_post_detail_found_by_id(self):
+        """Проверяем, что страница поста находит пост на его шарде."""
+        post = self.posts[2]
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,))
+        )
+        self.assertEqual(response.context['post'], post)
+        # Три поста автора лежат на его шарде, в default их нет.
+        self.assertEqual(response.context['author_posts'], 3)
+
+    def test_seeder_places_rows_on_shards(self):
+        """
+        Проверяем, что генератор данных кладёт посты и комментарии
+        на шард автора, а пользователей копирует на все шарды.
+        """
+        Seeder(
+            users=20, groups=2, posts=50, comments=50, follows=2,
+            batch_size=16,
+        ).run()
+        users = User.objects.count()
+        for alias in self.shards:
+            self.assertEqual(User.objects.using(alias).count(), users)
+            for author_id, post_id in Post.objects.using(alias).values_list(
+                'author_id', 'pk'
+            ):
+                self.assertEqual(shard_for(author_id), alias)
+                self.assertEqual(shard_for(post_id), alias)
+            for post_id in Comment.objects.using(alias).values_list(
+                'post_id', flat=True
+            ):
+                self.assertEqual(shard_for(post_id), alias)
+        self.assertEqual(
+            sum(Post.objects.using(alias).count() for alias in self.shards),
+            len(self.posts) + 50,
+        )
+
+    def test_references_synced_to_new_shards(self):
+        """
+        Проверяем, что команда копирует на шарды пользователей и группы,
+        созданные до включения шардирования, и обновляет их копии.
+        """
+        with override_settings(POST_SHARDS=[DEFAULT_DB_ALIAS]):
+            old_user = User.objects.create_user(username='old_user')
+            old_group = Group.objects.create(title='Старая', slug='old')
+        User.objects.using(self.shards[0]).filter(
+            pk=self.authors[0].pk
+        ).update(first_name='Устаревшее')
+        self.authors[0].refresh_from_db()
+
+        call_command('sync_shard_references', batch_size=2, verbosity=0)
+        for alias in self.shards:
+            with self.subTest(alias=alias):
+                self.assertTrue(
+                    User.objects.using(alias).filter(pk=old_user.pk).exists()
+                )
+                self.assertTrue(
+                    Group.objects.using(alias).filter(
+                        pk=old_group.pk, slug='old'
+                    ).exists()
+                )
+                self.assertEqual(
+                    User.objects.using(alias).get(
+                        pk=self.authors[0].pk
+                    ).first_name,
+                    self.authors[0].first_name,
+                )
+        post = Post.objects.create(author=old_user, text='Пост')
+        self.assertEqual(
+            Post.objects.on_shard_of(post.pk).get().author, old_user
+        )
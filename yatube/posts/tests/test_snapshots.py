@@ -0,0 +1,111 @@
+import os
+import tempfile
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from ..models import Group, Post
+from ..snapshots import build_lock, build_snapshots
+
+User = get_user_model()
+
+
+class SnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='cats')
+        for i in range(12):
+            Post.objects.create(
+                author=cls.user, text=f'Пост {i}', group=cls.group
+            )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+
+    def read(self, name):
+        with open(os.path.join(self.root, name), encoding='utf-8') as page:
+            return page.read()
+
+    def test_full_build_writes_only_changed_pages(self):
+        """
+        Проверяем, что сборка пишет главную, все страницы активной
+        группы и профиль, а повторная сборка ничего не перезаписывает.
+        """
+        pages, written, _ = build_snapshots(self.root, 1)
+        self.assertEqual(pages, written)
+        for name in (
+            'index.html',
+            'page-2.html',
+            'group/cats/index.html',
+            'group/cats/page-2.html',
+            'profile/author/index.html',
+        ):
+            with self.subTest(name=name):
+                self.assertIn('Пост', self.read(name))
+
+        self.assertEqual(build_snapshots(self.root, 1)[1], 0)
+
+    def test_incremental_build(self):
+        """
+        Проверяем, что инкрементальная сборка обновляет страницы
+        группы нового поста и не трогает остальные.
+        """
+        build_snapshots(self.root, 1)
+        dogs = Group.objects.create(title='Собаки', slug='dogs')
+        Post.objects.create(author=self.user, text='Новый пост', group=dogs)
+
+        pages, written, removed = build_snapshots(
+            self.root, 1, incremental=True
+        )
+        self.assertIn('Новый пост', self.read('group/dogs/index.html'))
+        self.assertIn('Новый пост', self.read('index.html'))
+        self.assertEqual(pages, written)
+        self.assertEqual(removed, 0)
+
+    @override_settings(SNAPSHOT_TOP_PROFILES=1)
+    def test_incremental_build_keeps_top_profiles(self):
+        """
+        Проверяем, что инкрементальная сборка пишет профили только
+        авторов из топа, как и полная.
+        """
+        build_snapshots(self.root, 1)
+        newbie = User.objects.create_user(username='newbie')
+        Post.objects.create(author=newbie, text='Первый пост')
+        Post.objects.create(author=self.user, text='Ещё пост')
+
+        build_snapshots(self.root, 1, incremental=True)
+        self.assertFalse(
+            os.path.exists(os.path.join(self.root, 'profile/newbie'))
+        )
+        self.assertIn('Ещё пост', self.read('profile/author/index.html'))
+
+    def test_builds_serialised_by_lock(self):
+        """
+        Проверяем, что сборка ждёт, пока другая держит блокировку,
+        а записи не оставляют временных файлов.
+        """
+        acquired = threading.Event()
+
+        def wait_for_lock():
+            with build_lock(self.root):
+                acquired.set()
+
+        with build_lock(self.root):
+            thread = threading.Thread(target=wait_for_lock)
+            thread.start()
+            self.assertFalse(acquired.wait(0.2))
+        thread.join(10)
+        self.assertTrue(acquired.is_set())
+
+        build_snapshots(self.root, 1)
+        leftovers = [
+            name
+            for _, _, names in os.walk(self.root)
+            for name in names
+            if name.endswith('.tmp')
+        ]
+        self.assertEqual(leftovers, [])
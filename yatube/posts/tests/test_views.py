@@ -79,6 +79,31 @@ class PostsViewsTests(TestCase):
 
         self.assertNotEqual(page_content2, page_content3)
 
+    def test_cache_group_and_profile(self):
+        """
+        Проверяем, что страницы группы и профиля кешируются,
+        а новый пост автора в группе сразу сбрасывает их кеш.
+        """
+        urls = (
+            reverse('posts:group_list', args=(PostsViewsTests.group.slug,)),
+            reverse('posts:profile', args=(PostsViewsTests.user.username,)),
+        )
+        for url in urls:
+            self.client.get(url)
+            with self.subTest(url=url):
+                with self.assertNumQueries(0):
+                    self.client.get(url)
+
+        new_post = Post.objects.create(
+            author=PostsViewsTests.user,
+            text=fake.text(max_nb_chars=200),
+            group=PostsViewsTests.group,
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.context['page_obj'][0], new_post)
+
     def test_post_in_index(self):
         """
         Проверяем, что в контекст домашней страницы передаётся ключ
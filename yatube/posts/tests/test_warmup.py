@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..cache import group_cache, post_cache, user_cache
+from ..models import Group, Post
+from ..warmup import page_fetcher, warm_up
+
+User = get_user_model()
+
+# Статистика популярности в памяти: настоящий stats.sqlite3 общий
+# с работающим сайтом, тесты не должны его очищать и засорять.
+TEST_CACHES = {
+    **settings.CACHES,
+    'stats': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+
+@override_settings(CACHES=TEST_CACHES, POPULARITY_CACHE='stats')
+class WarmUpTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='cats')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        for object_cache in (group_cache, post_cache, user_cache):
+            object_cache.popularity.flush()
+        cache.clear()
+        caches['stats'].clear()
+
+    def test_popular_objects_and_pages_warmed(self):
+        """
+        Проверяем, что прогрев загружает в кеш популярные объекты
+        и страницы, после чего их чтение не обращается к базе.
+        """
+        popular = self.posts[1]
+        for _ in range(3):
+            post_cache.get(popular.pk)
+        post_cache.get(self.posts[0].pk)
+        user_cache.get(username=self.user.username)
+        group_cache.get(slug=self.group.slug)
+        self.assertEqual(post_cache.popularity.top(1), [popular.pk])
+
+        cache.clear()
+        warmed = warm_up(
+            index_pages=1, groups=5, posts=1, users=5, workers=1
+        )
+        self.assertEqual(warmed['posts'], 1)
+        self.assertEqual(warmed['pages'], 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                post_cache.get(popular.pk).author.username,
+                self.user.username,
+            )
+            self.client.get(reverse('posts:index'))
+            self.client.get(reverse('posts:group_list', args=('cats',)))
+
+    def test_page_cache_hits_counted(self):
+        """
+        Проверяем, что страницы, отданные из кеша анонимов, учитываются
+        в популярности их объектов и попадают в прогрев.
+        """
+        pages = {
+            group_cache: reverse('posts:group_list', args=('cats',)),
+            user_cache: reverse('posts:profile', args=('author',)),
+            post_cache: reverse(
+                'posts:post_detail', args=(self.posts[2].pk,)
+            ),
+        }
+        for url in pages.values():
+            for _ in range(3):
+                self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(pages[post_cache])
+        self.assertEqual(group_cache.top(1), [self.group.pk])
+        self.assertEqual(user_cache.top(1), [self.user.pk])
+        self.assertEqual(post_cache.top(1), [self.posts[2].pk])
+        self.assertAlmostEqual(
+            group_cache.natural_popularity.counts()['cats'], 2, places=3
+        )
+
+    def test_one_client_per_thread(self):
+        """
+        Проверяем, что прогрев страниц в одном потоке обходится
+        одним тестовым клиентом.
+        """
+        urls = [reverse('posts:index'), reverse('about:author')]
+        with mock.patch('django.test.Client', wraps=Client) as client:
+            fetch_page = page_fetcher()
+            self.assertEqual([fetch_page(url) for url in urls], [True] * 2)
+        self.assertEqual(client.call_count, 1)
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+# Размер колонки excerpt: от настройки не зависит, чтобы её изменение
+# не порождало миграций. POST_EXCERPT_LENGTH не может быть больше.
+EXCERPT_MAX_LENGTH = 300
+
+
+def render_text(text):
+    """
+    Экранированный HTML текста и короткий отрывок для лент.
+    Без моделей: функцией пользуется и миграция 0008.
+    """
+    length = min(settings.POST_EXCERPT_LENGTH, EXCERPT_MAX_LENGTH)
+    if len(text) <= length:
+        # Truncator медленно обходит текст посимвольно,
+        # а короткий текст он всё равно вернёт целиком.
+        excerpt = text
+    else:
+        excerpt = Truncator(text).chars(length)
+    return linebreaks(text, autoescape=True), excerpt
@@ -1,6 +1,30 @@
 from django.conf import settings
 from django.core.paginator import Paginator
 
+from .models import Post
+from .sharding import shard_for
+from .text import render_text
+
+
+def fill_excerpts(posts):
+    """
+    Отрывки постов, записанных в обход save() и ещё не заполненных
+    backfill_post_html: текст догружается одним запросом на шард,
+    а не ленивым запросом на каждую карточку.
+    """
+    missing = [post for post in posts if not post.excerpt]
+    by_shard = {}
+    for post in missing:
+        by_shard.setdefault(shard_for(post.pk), []).append(post.pk)
+    texts = {}
+    for alias, pks in by_shard.items():
+        texts.update(
+            Post.objects.using(alias).filter(pk__in=pks)
+            .values_list('pk', 'text')
+        )
+    for post in missing:
+        post.excerpt = render_text(texts.get(post.pk, ''))[1]
+
 
 def get_page_obj(request, post_list):
     paginator = Paginator(post_list, settings.POSTS_PER_PAGE)
@@ -8,5 +32,7 @@ def get_page_obj(request, post_list):
     page_number = request.GET.get('page')
 
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = list(page_obj.object_list)
+    fill_excerpts(page_obj.object_list)
 
     return page_obj
@@ -1,23 +1,27 @@
 from django.conf import settings
-from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import (
-    redirect,
-    render,
-    get_object_or_404,
+from django.shortcuts import redirect, render
+
+from core.cache.decorators import cache_page
+from core.cache.objects import get_cached_object_or_404
+from .cache import (
+    group_cache,
+    group_tags,
+    index_tags,
+    post_cache,
+    profile_tags,
+    user_cache,
 )
-from django.views.decorators.cache import cache_page
-
 from .forms import PostForm, CommentForm
-from .models import Follow, Group, Post
+from .models import Follow, Post
 from .utils import get_page_obj
 
-User = get_user_model()
-
 
-@cache_page(settings.CACHE_TIME)
+@cache_page(
+    settings.CACHE_TIME, tags=index_tags, stale_while_revalidate=True
+)
 def index(request):
-    post_list = Post.objects.select_related('author', 'group')
+    post_list = Post.objects.for_feed().scatter()
 
     page_obj = get_page_obj(request, post_list)
 
@@ -28,10 +32,13 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@cache_page(
+    settings.CACHE_TIME, tags=group_tags, stale_while_revalidate=True
+)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = get_cached_object_or_404(group_cache, slug=slug)
 
-    post_list = group.posts.select_related('author', 'group')
+    post_list = Post.objects.for_feed().scatter(group=group)
 
     page_obj = get_page_obj(request, post_list)
 
@@ -42,10 +49,13 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@cache_page(
+    settings.CACHE_TIME, tags=profile_tags, stale_while_revalidate=True
+)
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
+    user = get_cached_object_or_404(user_cache, username=username)
 
-    post_list = user.posts.select_related('author', 'group')
+    post_list = Post.objects.for_feed().for_author(user)
 
     page_obj = get_page_obj(request, post_list)
 
@@ -65,11 +75,14 @@ def profile(request, username):
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_cached_object_or_404(post_cache, post_id)
     form = CommentForm()
     comments = post.comments.all().select_related('post', 'author')
     context = {
         'post': post,
+        # Посты автора лежат на его шарде, а не в базе закешированного
+        # автора, поэтому не post.author.posts.
+        'author_posts': Post.objects.for_author(post.author).count(),
         'form': form,
         'comments': comments
     }
@@ -95,7 +108,7 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_cached_object_or_404(post_cache, post_id)
 
     form = PostForm(
         request.POST or None,
@@ -121,7 +134,7 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_cached_object_or_404(post_cache, post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid:
         comment = form.save(commit=False)
@@ -133,7 +146,11 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = Post.objects.for_feed().scatter_authors(
+        Follow.objects.filter(user=request.user).values_list(
+            'author_id', flat=True
+        )
+    )
 
     page_obj = get_page_obj(request, post_list)
 
@@ -153,7 +170,7 @@ def profile_follow(request, username):
             author__username=username
         ).exists()
     ):
-        author = get_object_or_404(User, username=username)
+        author = get_cached_object_or_404(user_cache, username=username)
         Follow.objects.create(
             user=request.user,
             author=author,
@@ -163,7 +180,7 @@ def profile_follow(request, username):
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_cached_object_or_404(user_cache, username=username)
     Follow.objects.filter(
         user=request.user,
         author=author,
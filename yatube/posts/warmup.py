@@ -0,0 +1,122 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.urls import reverse
+
+from core.health import warming
+from .cache import group_cache, post_cache, user_cache
+from .snapshots import page_paths
+
+logger = logging.getLogger(__name__)
+
+# Те же параметры, что у {% thumbnail %} в includes/post.html.
+POST_THUMBNAIL = ('960x339', {'crop': 'center', 'upscale': True})
+
+
+def page_fetcher():
+    """
+    fetch_page с одним клиентом на поток прогрева: клиент при первом
+    запросе собирает цепочку middleware, и собирать её на каждый
+    адрес дорого.
+    """
+    # django.test не грузится при старте воркера, см. snapshots.
+    from django.test import Client
+
+    clients = threading.local()
+
+    def fetch_page(url):
+        """Запрашивает страницу как аноним, заполняя кеш страниц."""
+        client = getattr(clients, 'client', None)
+        if client is None:
+            client = clients.client = Client(
+                HTTP_HOST=settings.ALLOWED_HOSTS[0]
+            )
+        # Cookie прошлого ответа увели бы запрос мимо кеша анонимов.
+        client.cookies.clear()
+        return client.get(url).status_code == 200
+    return fetch_page
+
+
+def warm_thumbnail(image):
+    from sorl.thumbnail import get_thumbnail
+
+    geometry, options = POST_THUMBNAIL
+    get_thumbnail(image, geometry, **options)
+    return True
+
+
+def run(function, items, workers):
+    """
+    Выполняет function для каждого элемента в пуле потоков.
+    Сбой одного элемента не прерывает прогрев остальных.
+    """
+    def safe(item):
+        try:
+            return function(item)
+        except Exception:
+            logger.warning('Не удалось прогреть %s', item, exc_info=True)
+            return False
+
+    def in_thread(item):
+        try:
+            return safe(item)
+        finally:
+            connections.close_all()
+
+    if workers <= 1:
+        return [safe(item) for item in items]
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(in_thread, items))
+
+
+def warm_up(index_pages, groups, posts, users, workers):
+    """
+    Прогревает кеш: объекты самых читаемых постов и пользователей,
+    первые страницы главной и лент популярных групп и миниатюры
+    популярных постов. Что грузить, берётся из статистики обращений
+    к кешу объектов и к страницам из кеша. Возвращает число
+    прогретых элементов по видам.
+    """
+    loaded_posts = post_cache.warm(post_cache.top(posts))
+    loaded_users = user_cache.warm(user_cache.top(users))
+    loaded_groups = group_cache.warm(group_cache.top(groups))
+
+    urls = [url for url, _ in page_paths(reverse('posts:index'), index_pages)]
+    for group in loaded_groups.values():
+        urls.append(reverse('posts:group_list', args=(group.slug,)))
+    images = [post.image for post in loaded_posts.values() if post.image]
+
+    pages = run(page_fetcher(), urls, workers)
+    thumbnails = run(warm_thumbnail, images, workers)
+
+    return {
+        'posts': len(loaded_posts),
+        'users': len(loaded_users),
+        'groups': len(loaded_groups),
+        'pages': sum(pages),
+        'thumbnails': sum(thumbnails),
+    }
+
+
+def warm_up_in_background():
+    """
+    Прогрев при старте процесса, не задерживающий приём запросов.
+    Пока он идёт, /readyz отвечает, что воркер не готов.
+    """
+    def target():
+        try:
+            warm_up(
+                index_pages=settings.CACHE_WARM_INDEX_PAGES,
+                groups=settings.CACHE_WARM_GROUPS,
+                posts=settings.CACHE_WARM_POSTS,
+                users=settings.CACHE_WARM_USERS,
+                workers=settings.CACHE_WARM_WORKERS,
+            )
+        finally:
+            warming.clear()
+
+    warming.set()
+    threading.Thread(target=target, name='cache-warm-up', daemon=True).start()
@@ -1,5 +1,7 @@
 import os
 
+from django.utils.module_loading import import_string
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -11,7 +13,13 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = 'hv_idur7u0(@k8sjj0*59n1zx(8&w(u^-^!whnj%llc1u=4h9o'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Отладка включается только явно (DJANGO_DEBUG=1 при разработке):
+# без переменной отладочные приложения не загружаются.
+DEBUG = os.getenv('DJANGO_DEBUG', '0') == '1'
+
+# Воркеры без /admin/ запускают с DJANGO_ADMIN=0: модули админки
+# не импортируются при старте.
+ADMIN_ENABLED = os.getenv('DJANGO_ADMIN', '1') == '1'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -28,7 +36,6 @@ ALLOWED_HOSTS = [
 
 INSTALLED_APPS = [
     'posts.apps.PostsConfig',
-    'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -38,26 +45,45 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
     'sorl.thumbnail',
-    'debug_toolbar'
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.tracing.TracingMiddleware',
+    'core.middleware.metrics.MetricsMiddleware',
+    'core.middleware.compression.HtmlGZipMiddleware',
+    'core.middleware.static.StaticFilesMiddleware',
+    'core.middleware.shedding.LoadSheddingMiddleware',
+    'core.middleware.profiling.SamplingProfilerMiddleware',
+    'core.middleware.queries.QueryInspectorMiddleware',
+    'core.middleware.slowlog.SlowQueryLogMiddleware',
+    'core.middleware.replicas.ReplicaPinMiddleware',
+    'core.middleware.anonymous.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.middleware.tracing.TracedViewMiddleware',
 ]
 
+if ADMIN_ENABLED:
+    INSTALLED_APPS.insert(1, 'django.contrib.admin')
+
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    # TracedViewMiddleware должен остаться последним.
+    MIDDLEWARE.insert(
+        len(MIDDLEWARE) - 1, 'debug_toolbar.middleware.DebugToolbarMiddleware'
+    )
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -68,12 +94,23 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
             ],
+            'builtins': ['core.templatetags.tracing'],
         },
     },
 ]
 
+# Загрузчики не указаны: при DEBUG=False Django сам оборачивает их
+# в cached.Loader, и шаблоны компилируются один раз на процесс.
+
+# Путь разрешается при вызове: загрузка настроек не тянет код приложений.
+ABSOLUTE_URL_OVERRIDES = {
+    'auth.user': lambda user: import_string('posts.models.profile_url')(user),
+}
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+TEST_RUNNER = 'core.test_runner.TemporaryCachesRunner'
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -82,7 +119,42 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
+    },
+}
+
+DATABASE_ROUTERS = [
+    'posts.routers.ShardRouter',
+    'core.routers.ReplicaRouter',
+]
+
+POST_SHARDS = ['default']
+
+# Реплики - копии основной базы в db_<имя>.sqlite3, их обновляет
+# sync_replicas. Алиасы заводятся только для перечисленных реплик.
+DATABASE_REPLICAS = os.getenv('DJANGO_DB_REPLICAS', '').split()
+DATABASES.update({
+    replica: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db_{replica}.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'TEST': {
+            'MIRROR': 'default',
+        },
     }
+    for replica in DATABASE_REPLICAS
+})
+
+REPLICA_PIN_COOKIE = 'pin_primary'
+REPLICA_PIN_SECONDS = 10
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
 }
 
 
@@ -130,12 +202,170 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'core.storage.CompressedManifestStaticFilesStorage'
+    )
+
+STATIC_MAX_AGE = 60 * 60
+
+HTML_COMPRESS_MIN_SIZE = 1024
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 POSTS_PER_PAGE = 10
 MAX_POST_STR_LENGTH = 15
+POST_EXCERPT_LENGTH = 300
 CACHE_TIME = 20
+CACHE_STALE_TIME = 60
+CACHE_L1_MAX_ENTRIES = 256
+CACHE_L1_CHECK_INTERVAL = 1.0
+CACHE_LOCK_TIMEOUT = 10
+CACHE_LOCK_WAIT = 2.0
+CACHE_EARLY_RECOMPUTE_BETA = 1.0
+CACHE_REFRESH_WORKERS = 2
+OBJECT_CACHE_TIME = 60 * 60
+POPULARITY_CACHE = 'stats'
+POPULARITY_HALF_LIFE = 60 * 60
+POPULARITY_MAX_ITEMS = 1000
+POPULARITY_FLUSH_INTERVAL = 10
+CACHE_WARM_INDEX_PAGES = 3
+CACHE_WARM_GROUPS = 50
+CACHE_WARM_POSTS = 200
+CACHE_WARM_USERS = 100
+CACHE_WARM_WORKERS = 4
+CACHE_WARM_ON_STARTUP = False
+# Параметры запроса, которые входят в ключ кеша страниц, и шаблоны
+# допустимых значений; остальные параметры на ключ не влияют.
+CACHE_QUERY_PARAMS = {
+    'page': r'\d{1,6}',
+}
+ANONYMOUS_CACHE_ROUTES = {
+    'posts:index': 'posts.cache.index_tags',
+    'posts:group_list': 'posts.cache.group_tags',
+    'posts:profile': 'posts.cache.profile_tags',
+    'posts:post_detail': 'posts.cache.post_tags',
+    'about:author': None,
+    'about:tech': None,
+}
+# Маршрут -> функция, которая по его аргументам учитывает обращение
+# к объекту, когда страница отдана из кеша и представление не вызвано.
+ANONYMOUS_CACHE_HITS = {
+    'posts:group_list': 'posts.cache.record_group_hit',
+    'posts:profile': 'posts.cache.record_profile_hit',
+    'posts:post_detail': 'posts.cache.record_post_hit',
+}
+
+SNAPSHOT_ROOT = os.path.join(BASE_DIR, 'snapshots')
+SNAPSHOT_WORKERS = 4
+SNAPSHOT_INDEX_PAGES = 5
+SNAPSHOT_TOP_PROFILES = 20
+SNAPSHOT_ACTIVE_DAYS = 7
+SNAPSHOT_ON_POST_CREATE = False
+
+QUERY_INSPECTOR_SAMPLE_RATE = 0.0
+QUERY_INSPECTOR_THRESHOLD = 3
+QUERY_INSPECTOR_STRICT = False
+
+PROFILER_SAMPLE_RATE = 0.0
+PROFILER_HEADER = 'X-Profile'
+PROFILER_TOKEN_MAX_AGE = 60 * 60
+PROFILER_TRACEMALLOC = False
+PROFILER_TRACEMALLOC_FRAMES = 1
+PROFILER_FLUSH_INTERVAL = 30
+PROFILER_ROOT = os.path.join(BASE_DIR, 'profiles')
+
+METRICS_ENABLED = True
+# За прокси на том же хосте REMOTE_ADDR у всех запросов 127.0.0.1,
+# поэтому в продакшене /metrics открывается только по токену. Список
+# адресов имеет смысл, когда прокси перечислены в
+# METRICS_TRUSTED_PROXIES: тогда адрес клиента берётся
+# из X-Forwarded-For.
+METRICS_ALLOWED_IPS = ['127.0.0.1'] if DEBUG else []
+METRICS_TRUSTED_PROXIES = []
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.log')
+
+TRACE_VIEWS = ['posts:']
+TRACE_SLOW_MS = 200
+TRACE_SAMPLE_RATE = 0.0
+TRACE_MAX_SPANS = 5000
+TRACE_LOG = os.path.join(BASE_DIR, 'traces.log')
+
+SHEDDING_MAX_IN_FLIGHT = 40
+SHEDDING_LIMITS = {
+    'read': 32,
+    'write': 4,
+    'upload': 2,
+    'feed': 8,
+}
+# Классы маршрутов, которым не подходит деление по методу: подписки
+# пишут в базу GET-запросом, а лента подписок не кешируется
+# и собирается со всех шардов.
+SHEDDING_VIEW_CLASSES = {
+    'posts:profile_follow': 'write',
+    'posts:profile_unfollow': 'write',
+    'posts:follow_index': 'feed',
+}
+SHEDDING_QUEUE_TIMEOUT_MS = 100
+SHEDDING_RETRY_AFTER = 1
+SHEDDING_EXEMPT_VIEWS = ['healthz', 'readyz', 'metrics']
+
+HEALTH_CACHE_SECONDS = 2
+HEALTH_BUDGETS_MS = {
+    'database': 50,
+    'cache': 50,
+    'storage': 200,
+}
+
+THUMBNAIL_BACKEND = 'core.thumbnails.TracedThumbnailBackend'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'message',
+        },
+        'traces': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': TRACE_LOG,
+            'maxBytes': 50 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'core.slowlog': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'core.tracing': {
+            'handlers': ['traces'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+BENCHMARK_BASELINE = os.path.join(BASE_DIR, 'benchmark_views.json')
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
@@ -144,10 +374,31 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.backends.stats.StatsCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'BACKEND': 'core.cache.backends.sqlite.SQLiteCache',
+            'OPTIONS': {
+                'MAX_BYTES': 256 * 1024 * 1024,
+            },
+            'COMPRESS_MIN_SIZE': 1024,
+        },
     }
 }
 
+CACHES['stats'] = {
+    'BACKEND': 'core.cache.backends.sqlite.SQLiteCache',
+    'LOCATION': os.path.join(BASE_DIR, 'stats.sqlite3'),
+}
+
+if DEBUG:
+    CACHES['default']['OPTIONS'].update({
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    })
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -1,20 +1,35 @@
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib import admin
 from django.urls import path, include
 
+from core.views import cache_stats, healthz, metrics_view, readyz
+
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.csrf_failure'
 handler500 = 'core.views.server_error'
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
+    path('healthz', healthz, name='healthz'),
+    path('readyz', readyz, name='readyz'),
     path('', include('posts.urls', namespace='posts')),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
 ]
 
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+
+    urlpatterns = [
+        path(
+            'admin/cache/',
+            admin.site.admin_view(cache_stats),
+            name='cache_stats',
+        ),
+        path('admin/', admin.site.urls),
+    ] + urlpatterns
+
 if settings.DEBUG:
     import debug_toolbar
 